@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from risk_model import FACTOR_NAMES, round_risk
+
+# Additive breakdown of a risk score into an age baseline plus one contribution
+# per factor, in percentage points. The model is risk = min(age * 0.15 * prod(m), 100),
+# so in log space every factor adds log(m) independently of the others and that
+# is its exact Shapley value for the uncapped log-risk. The points above the
+# baseline (after the cap and rounding) are shared out in proportion to log(m),
+# which keeps the decomposition exact: baseline + sum(contributions) == risk.
+
+
+def baseline_risk(age):
+    """Risk with every factor neutral: age * 0.15, rounded like the score."""
+    return round_risk(np.minimum(np.asarray(age, dtype=float) * 0.15, 100))
+
+
+def attribute(age, multipliers, risk):
+    """Vectorized attributions.
+
+    `multipliers` has a trailing axis ordered like FACTOR_NAMES (as returned by
+    score_arrays) and `risk` is the matching score. Returns (baseline,
+    contributions), with contributions shaped like `multipliers`.
+    """
+    baseline = baseline_risk(age)
+    log_multipliers = np.log(np.asarray(multipliers, dtype=float))
+    total = log_multipliers.sum(axis=-1, keepdims=True)
+    excess = np.asarray(risk, dtype=float) - baseline
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(total > 0, log_multipliers / total, 0.0)
+    return baseline, shares * excess[..., None]
+
+
+def patient_attribution(age, risk, risk_factors):
+    """(baseline, {factor: points}) for one calculate_qrisk3 result."""
+    multipliers = np.array([risk_factors[factor] for factor in FACTOR_NAMES])
+    baseline, contributions = attribute(age, multipliers, risk)
+    return float(baseline), dict(zip(FACTOR_NAMES, contributions.tolist()))
+
+
+def summarize(age, multipliers, risk, chunk_size=1_000_000):
+    """Cohort-level attribution summary per factor, computed in chunks for any cohort size."""
+    age = np.asarray(age)
+    multipliers = np.asarray(multipliers).reshape(len(age), len(FACTOR_NAMES))
+    risk = np.asarray(risk, dtype=float)
+    totals = np.zeros(len(FACTOR_NAMES))
+    affected = np.zeros(len(FACTOR_NAMES), dtype=np.int64)
+    for start in range(0, len(age), chunk_size):
+        stop = start + chunk_size
+        _, contributions = attribute(age[start:stop], multipliers[start:stop], risk[start:stop])
+        totals += contributions.sum(axis=0)
+        affected += (contributions > 0).sum(axis=0)
+    return summary_frame(totals, affected, len(age))
+
+
+def summary_frame(totals, affected, count):
+    """Per-factor summary from contribution totals and counts of patients with a non-zero contribution."""
+    count = max(count, 1)
+    return pd.DataFrame({
+        "Factor": FACTOR_NAMES,
+        "Mean Contribution (points)": totals / count,
+        "Patients Affected (%)": 100 * affected / count,
+        "Share of Added Risk (%)": 100 * totals / totals.sum() if totals.sum() > 0 else 0.0,
+    }).sort_values("Mean Contribution (points)", ascending=False, kind="stable")
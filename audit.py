@@ -0,0 +1,267 @@
+import argparse
+import atexit
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from risk_model import INPUT_NAMES, MODEL_VERSION
+from shared_cache import REPLICA_ID
+import warmup
+
+# Audit log of every "Calculate Risk" event: the inputs, the result and the
+# model version. Recording an event only stores a tuple in a fixed-size ring
+# buffer; a background thread serializes the buffered events every
+# LIFELINE_AUDIT_FLUSH_SECONDS and appends them to gzip-compressed JSONL files
+# in LIFELINE_AUDIT_DIR, one file per process at a time:
+#
+#     audit-20261019T142503-<replica id>-0001.jsonl.gz
+#
+# Files are created exclusively and only ever appended to. A new one is started
+# after LIFELINE_AUDIT_ROTATE_BYTES of events or LIFELINE_AUDIT_ROTATE_SECONDS;
+# old files are never deleted here, retention is left to the archive. Every
+# batch is sync-flushed and fsynced, so a file cut short by a crash still reads
+# back up to its last batch (`python audit.py cat FILE...`).
+#
+# A slow or stalled disk only ever holds up the writer thread. When the buffer
+# is full, LIFELINE_AUDIT_POLICY decides: "drop" (the default) drops the new
+# event at once, "block" waits up to LIFELINE_AUDIT_BLOCK_SECONDS for room and
+# then drops it. A failed write is retried in a new file, so a batch that
+# failed part-way may appear twice. The queued, written and dropped counts are
+# refreshed in the warmup status file after every written batch.
+
+AUDIT_DIR = os.environ.get("LIFELINE_AUDIT_DIR", "audit_log")
+CAPACITY = int(os.environ.get("LIFELINE_AUDIT_CAPACITY", 4096))
+POLICY = os.environ.get("LIFELINE_AUDIT_POLICY", "drop")
+BLOCK_SECONDS = float(os.environ.get("LIFELINE_AUDIT_BLOCK_SECONDS", 0.25))
+FLUSH_SECONDS = float(os.environ.get("LIFELINE_AUDIT_FLUSH_SECONDS", 1.0))
+ROTATE_BYTES = int(os.environ.get("LIFELINE_AUDIT_ROTATE_BYTES", 64 * 2**20))
+ROTATE_SECONDS = float(os.environ.get("LIFELINE_AUDIT_ROTATE_SECONDS", 3600))
+POLICIES = ("drop", "block")
+# Pause after a failed write before retrying the batch
+RETRY_SECONDS = 1.0
+
+
+def event_record(event):
+    """The JSON object written for an event tuple queued by record_assessment."""
+    timestamp, session, inputs, risk, risk_factors = event
+    return {
+        "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds"),
+        "event": "calculate_risk",
+        "model_version": MODEL_VERSION,
+        "session": session,
+        "inputs": dict(zip(INPUT_NAMES, inputs)),
+        "risk": risk,
+        "risk_factors": risk_factors,
+    }
+
+
+class AuditLog:
+    def __init__(self, directory=AUDIT_DIR, capacity=CAPACITY, policy=POLICY, block_seconds=BLOCK_SECONDS,
+                 flush_seconds=FLUSH_SECONDS, rotate_bytes=ROTATE_BYTES, rotate_seconds=ROTATE_SECONDS,
+                 on_written=None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown audit policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.directory = directory
+        self.capacity = capacity
+        self.policy = policy
+        self.block_seconds = block_seconds
+        self.flush_seconds = flush_seconds
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        # Called on the writer thread after each written batch
+        self.on_written = on_written
+        # Ring buffer: `pending` events starting at slot `head`
+        self.slots = [None] * capacity
+        self.head = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.files = 0
+        # Writer thread state
+        self.file = None
+        self.file_bytes = 0
+        self.file_opened = 0.0
+        self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, event):
+        """Queue an event without touching the disk; False if it was dropped."""
+        with self.lock:
+            if self.pending == self.capacity and self.policy == "block" and not self.stopping:
+                self.not_full.wait_for(lambda: self.pending < self.capacity, self.block_seconds)
+            if self.pending == self.capacity or self.stopping:
+                self.dropped += 1
+                return False
+            end = self.head + self.pending
+            self.slots[end - self.capacity if end >= self.capacity else end] = event
+            self.pending += 1
+            self.queued += 1
+            # Start writing early rather than let a burst fill the buffer
+            wake = self.pending == self.capacity // 2
+        if wake:
+            self.wakeup.set()
+        return True
+
+    def _take(self):
+        # Everything buffered so far, oldest first, as at most two slices of the ring
+        with self.lock:
+            start, end = self.head, self.head + self.pending
+            if end <= self.capacity:
+                batch = self.slots[start:end]
+                self.slots[start:end] = [None] * self.pending
+            else:
+                batch = self.slots[start:] + self.slots[:end - self.capacity]
+                self.slots[start:] = [None] * (self.capacity - start)
+                self.slots[:end - self.capacity] = [None] * (end - self.capacity)
+            self.head = end % self.capacity
+            self.pending = 0
+            self.not_full.notify_all()
+            return batch
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(self.directory, f"audit-{stamp}-{REPLICA_ID}-{self.files + 1:04d}.jsonl.gz")
+        self.file = gzip.open(path, "xb")
+        self.files += 1
+        self.file_bytes = 0
+        self.file_opened = time.monotonic()
+
+    def _close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+
+    def _rotation_due(self):
+        return self.file is not None and (self.file_bytes >= self.rotate_bytes
+                                          or time.monotonic() - self.file_opened >= self.rotate_seconds)
+
+    def _write(self, batch):
+        if self._rotation_due():
+            self._close()
+        if self.file is None:
+            self._open()
+        data = "".join(json.dumps(event_record(event), separators=(",", ":")) + "\n" for event in batch).encode()
+        self.file.write(data)
+        # Sync flush, so everything written so far decompresses even if the process dies
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file_bytes += len(data)
+        with self.lock:
+            self.written += len(batch)
+
+    def _run(self):
+        # A batch that failed to write is kept and retried before taking more, so
+        # a stalled disk fills the ring buffer and the policy applies
+        batch = []
+        while True:
+            stopping = self.stopping
+            if not stopping:
+                self.wakeup.wait(self.flush_seconds)
+                self.wakeup.clear()
+            if not batch:
+                batch = self._take()
+            if batch:
+                try:
+                    self._write(batch)
+                    batch = []
+                    if self.on_written is not None:
+                        self.on_written()
+                except OSError:
+                    with self.lock:
+                        self.write_errors += 1
+                    self._close()
+                    if stopping:
+                        dropped = len(batch) + len(self._take())
+                        with self.lock:
+                            self.dropped += dropped
+                        return
+                    time.sleep(RETRY_SECONDS)
+                    continue
+            elif self._rotation_due():
+                self._close()
+            if stopping and not self.pending:
+                self._close()
+                return
+
+    def close(self, timeout=5.0):
+        """Write what is buffered and stop; gives up after timeout seconds if the disk is stalled."""
+        with self.lock:
+            self.stopping = True
+            self.not_full.notify_all()
+        self.wakeup.set()
+        self.thread.join(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "policy": self.policy,
+                "capacity": self.capacity,
+                "pending": self.pending,
+                "queued": self.queued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "write_errors": self.write_errors,
+                "files": self.files,
+            }
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_log():
+    """Process-wide audit log, started on first use and flushed at exit."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            # Keep the counters in the status file current
+            _log = AuditLog(on_written=warmup.write_status)
+            atexit.register(_log.close)
+        return _log
+
+
+def record_assessment(session, inputs, risk, risk_factors):
+    # Serialization happens on the writer thread; the request only pays for queueing
+    return get_log().record((time.time(), session, tuple(inputs), risk, risk_factors))
+
+
+def stats():
+    """The audit counters, or None before the first event of this process."""
+    return None if _log is None else _log.stats()
+
+
+def read_events(path):
+    """The events in one audit file, including one still being written or cut short by a crash."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                # A line without its newline is the unflushed tail of the last batch
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except EOFError:
+            return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read audit log files.")
+    parser.add_argument("command", choices=["cat"])
+    parser.add_argument("paths", nargs="+", help="audit-*.jsonl.gz files, written in name order")
+    args = parser.parse_args()
+
+    for path in sorted(args.paths):
+        for record in read_events(path):
+            sys.stdout.write(json.dumps(record) + "\n")
@@ -0,0 +1,64 @@
+"""Audit log cost on the request path, with a healthy and a stalled disk.
+
+Records a burst of assessment events and reports the per-call latency of
+record_assessment and the queued/written/dropped counts. --stall makes every
+batch write wait that long first, as a slow or hung disk would:
+
+    python benchmarks/bench_audit.py --events 20000 --stall 0 2 --policy drop block
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import audit
+from risk_model import calculate_qrisk3
+
+
+class StalledLog(audit.AuditLog):
+    def __init__(self, stall, **kwargs):
+        self.stall = stall
+        super().__init__(**kwargs)
+
+    def _write(self, batch):
+        time.sleep(self.stall)
+        super()._write(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--stall", type=float, nargs="+", default=[0.0, 2.0], help="seconds per batch write")
+    parser.add_argument("--policy", nargs="+", default=["drop", "block"], choices=audit.POLICIES)
+    parser.add_argument("--capacity", type=int, default=audit.CAPACITY)
+    args = parser.parse_args()
+
+    inputs = [55, "Male", True, False, 150, 6.0, 31.0, False, False, "Sedentary", "Poor", "Moderate", True, False,
+              "Less than 6 hours", False, False]
+    risk, risk_factors = calculate_qrisk3(*inputs)
+    print(f"{'stall s':>8}{'policy':>8}{'p50 us':>9}{'p99 us':>9}{'max us':>10}{'queued':>9}{'written':>9}{'dropped':>9}")
+    for stall in args.stall:
+        for policy in args.policy:
+            with tempfile.TemporaryDirectory() as directory:
+                log = StalledLog(stall, directory=directory, capacity=args.capacity, policy=policy)
+                audit._log = log
+                latencies = np.empty(args.events)
+                for i in range(args.events):
+                    started = time.perf_counter()
+                    audit.record_assessment("bench", inputs, risk, risk_factors)
+                    latencies[i] = time.perf_counter() - started
+                log.close(timeout=stall + 5)
+                stats = log.stats()
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+                print(f"{stall:>8.1f}{policy:>8}{p50:>9.1f}{p99:>9.1f}{latencies.max() * 1e6:>10.0f}"
+                      f"{stats['queued']:>9,}{stats['written']:>9,}{stats['dropped']:>9,}")
+
+
+if __name__ == "__main__":
+    main()
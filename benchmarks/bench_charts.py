@@ -0,0 +1,84 @@
+"""Server CPU time and payload size per assessment for the two chart modes.
+
+Both modes go through the same serialization Streamlit applies: st.pyplot
+rasterizes a matplotlib figure to PNG, st.plotly_chart builds and serializes a
+Plotly figure to JSON that the browser renders.
+
+    python benchmarks/bench_charts.py --assessments 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.io
+import plotly.tools
+
+import charts
+from attribution import patient_attribution
+from risk_model import calculate_qrisk3
+
+
+def plotly_payload(spec):
+    figure = plotly.tools.return_figure_from_figure_or_data(spec, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False).encode()
+
+
+def render_server(age, risk, risk_factors):
+    # Gauge was already a Plotly chart; the factor breakdown is rasterized
+    baseline, contributions = patient_attribution(age, risk, risk_factors)
+    return [plotly_payload(charts.gauge_spec(risk)),
+            charts.figure_to_png(charts.factor_bars_figure(baseline, contributions, risk_factors))]
+
+
+def render_client(age, risk, risk_factors):
+    baseline, contributions = patient_attribution(age, risk, risk_factors)
+    return [plotly_payload(charts.gauge_spec(risk)),
+            plotly_payload(charts.factor_bars_spec(baseline, contributions, risk_factors))]
+
+
+def random_patient(rng):
+    age = rng.randint(25, 84)
+    risk, risk_factors = calculate_qrisk3(
+        age, rng.choice(["Male", "Female"]), rng.random() < 0.3, rng.random() < 0.2, rng.choice([None, 120, 160]),
+        rng.choice([None, 4.0, 6.5]), rng.choice([None, 25.0, 33.0]), rng.random() < 0.1, rng.random() < 0.1,
+        rng.choice(["Not Specified", "Sedentary", "Moderate", "Active"]),
+        rng.choice(["Not Specified", "Unhealthy", "Balanced", "Healthy"]),
+        rng.choice(["Not Specified", "Never", "Occasionally", "Frequent"]), rng.random() < 0.3, rng.random() < 0.2,
+        rng.choice(["Not Specified", "Less than 6 hours", "6-8 hours"]), rng.random() < 0.1, rng.random() < 0.1)
+    return age, risk, risk_factors
+
+
+def measure(render, patients):
+    render(*patients[0])  # warm imports and caches
+    sizes = []
+    started = time.process_time()
+    for patient in patients:
+        sizes.append(sum(len(payload) for payload in render(*patient)))
+    cpu = time.process_time() - started
+    return cpu / len(patients), sum(sizes) / len(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assessments", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    patients = [random_patient(rng) for _ in range(args.assessments)]
+    print(f"{args.assessments} assessments\n")
+    print(f"{'mode':<10}{'CPU ms/assessment':>20}{'payload KB/assessment':>24}")
+    results = {}
+    for mode, render in [("server", render_server), ("client", render_client)]:
+        cpu, size = measure(render, patients)
+        results[mode] = (cpu, size)
+        print(f"{mode:<10}{cpu * 1000:>20.1f}{size / 1024:>24.1f}")
+    print(f"\nclient mode: {results['server'][0] / results['client'][0]:.1f}x less CPU, "
+          f"{results['server'][1] / results['client'][1]:.1f}x smaller payload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Cohort explorer query latency with the bundled cohorts replicated to millions of rows.
+
+Compares the prebuilt cube and bitmap indexes against filtering the raw
+columns with pandas on every widget change:
+
+    python benchmarks/bench_cohorts.py --replicate 1 10 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from cohorts import CohortIndex
+
+
+def random_filters(index, rng):
+    youngest, oldest = index.age_range
+    low = rng.randint(youngest, oldest)
+    return {
+        "cohorts": rng.sample(index.names, rng.randint(1, len(index.names))),
+        "ages": (low, rng.randint(low, oldest)),
+        "sex": rng.choice([None, 0, 1]),
+        "smoking": rng.choice([None, 0, 1]),
+        "diabetes": rng.choice([None, 0, 1]),
+    }
+
+
+def pandas_query(frame, names, filters):
+    mask = frame["cohort"].isin([names.index(name) for name in filters["cohorts"]])
+    mask &= frame["age"].between(*filters["ages"])
+    for name in ["sex", "smoking", "diabetes"]:
+        if filters[name] is not None:
+            mask &= frame[name] == filters[name]
+    matching = frame[mask]
+    return matching.groupby("cohort")["score"].agg(["count", "mean"]), matching.head(200)
+
+
+def timed(function, queries):
+    latencies = []
+    for filters in queries:
+        started = time.perf_counter()
+        function(filters)
+        latencies.append(time.perf_counter() - started)
+    return np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicate", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    base = CohortIndex.from_bundled()
+    rng = random.Random(0)
+    queries = [random_filters(base, rng) for _ in range(args.queries)]
+    print(f"{'rows':>12}{'build s':>10}{'index p50/p99 ms':>20}{'pandas p50/p99 ms':>20}")
+    for times in args.replicate:
+        started = time.perf_counter()
+        index = base.replicate(times) if times > 1 else base
+        build = time.perf_counter() - started
+        frame = pd.DataFrame({name: values for name, values in index.columns.items() if values.ndim == 1})
+
+        def indexed(filters):
+            index.summary(**filters)
+            index.matching_rows(**filters, limit=200)
+
+        index_p50, index_p99 = timed(indexed, queries)
+        pandas_p50, pandas_p99 = timed(lambda filters: pandas_query(frame, index.names, filters), queries)
+        print(f"{index.size:>12,}{build:>10.1f}{index_p50:>10.1f}/{index_p99:<9.1f}{pandas_p50:>10.1f}/{pandas_p99:<9.1f}")
+
+
+if __name__ == "__main__":
+    main()
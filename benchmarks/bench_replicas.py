@@ -0,0 +1,143 @@
+"""Per-replica memory and shared-cache hit rates with several app replicas.
+
+Each replica is a separate process that warms the shared resources and scores a
+stream of assessments, the way a Streamlit worker would. Run from anywhere:
+
+    python benchmarks/bench_replicas.py --replicas 4 --assessments 500
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_replica(assessments, seed):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import shared_cache
+    import warmup
+    from risk_model import calculate_qrisk3
+
+    started = time.perf_counter()
+    warmup.start()
+    failed = []
+    for name in warmup.TASKS:
+        try:
+            warmup.get(name)
+        except Exception:
+            failed.append(name)
+    startup_seconds = time.perf_counter() - started
+    artifact_stats = shared_cache.get_cache().stats()
+
+    # Scoring is cheaper than a cache lookup, so only the trend aggregates touch the cache per assessment
+    rng = random.Random(seed)
+    cache = shared_cache.get_cache()
+    trends = warmup.get("trend_aggregator")
+    for _ in range(assessments):
+        inputs = [rng.randrange(25, 85, 5), rng.choice(["Male", "Female"]), rng.random() < 0.2, rng.random() < 0.1,
+                  rng.choice([None, 120, 150]), rng.choice([None, 4.5, 6.0]), rng.choice([None, 24.0, 32.0]),
+                  False, False, rng.choice(["Not Specified", "Sedentary", "Moderate", "Active"]),
+                  "Not Specified", "Not Specified", rng.random() < 0.3, False, "Not Specified", False, False]
+        risk, risk_factors = calculate_qrisk3(*inputs)
+        trends.add(inputs[0], inputs[1], risk, risk_factors)
+    # Write the shard now rather than on the background flush
+    trends.flush()
+    trends.snapshot()
+
+    return {
+        "startup_seconds": startup_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "failed_tasks": failed,
+        "artifact_cache": artifact_stats,
+        "cache": cache.stats(),
+    }
+
+
+def spawn_replica(cache_url, index, assessments):
+    env = dict(os.environ, LIFELINE_CACHE_URL=cache_url, LIFELINE_REPLICA_ID=f"bench-{index}",
+               LIFELINE_STATUS_FILE=os.devnull)
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--replica", "--assessments", str(assessments),
+                             "--seed", str(index)], env=env, stdout=subprocess.PIPE, text=True)
+
+
+def run_mode(cache_url, replicas, assessments):
+    # The first replica starts against a cold cache; the rest start together once it is warm
+    first = spawn_replica(cache_url, 0, assessments)
+    results = [json.loads(first.communicate()[0])]
+    others = [spawn_replica(cache_url, i, assessments) for i in range(1, replicas)]
+    results += [json.loads(process.communicate()[0]) for process in others]
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("local Redis stand-in did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--assessments", type=int, default=500)
+    parser.add_argument("--replica", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.replica:
+        print(json.dumps(run_replica(args.assessments, args.seed)))
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix="lifeline-cache-")
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "shared_cache.py"), "serve", str(port)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        modes = [
+            ("isolated (memory://)", "memory://"),
+            ("shared file/mmap", f"file://{cache_dir}"),
+            ("shared Redis protocol", f"redis://127.0.0.1:{port}/0"),
+        ]
+        print(f"{args.replicas} replicas, {args.assessments} assessments each\n")
+        print(f"{'mode':<24}{'replica':>8}{'max RSS MB':>12}{'startup s':>11}{'artifact hits':>15}{'all hits':>10}")
+        for label, url in modes:
+            results = run_mode(url, args.replicas, args.assessments)
+            for i, result in enumerate(results):
+                print(f"{label:<24}{i:>8}{result['max_rss_mb']:>12.1f}{result['startup_seconds']:>11.2f}"
+                      f"{result['artifact_cache']['hit_rate']:>15.1%}{result['cache']['hit_rate']:>10.1%}")
+            warm = results[1:] or results
+            print(f"{'':<24}{'mean*':>8}{sum(r['max_rss_mb'] for r in warm) / len(warm):>12.1f}"
+                  f"{sum(r['startup_seconds'] for r in warm) / len(warm):>11.2f}"
+                  f"{sum(r['artifact_cache']['hit_rate'] for r in warm) / len(warm):>15.1%}"
+                  f"{sum(r['cache']['hit_rate'] for r in warm) / len(warm):>10.1%}\n")
+        failed = sorted({name for result in results for name in result["failed_tasks"]})
+        if failed:
+            print(f"Tasks that failed to load (missing data files?): {', '.join(failed)}")
+        print("* mean over the replicas that started against a warm cache")
+    finally:
+        server.terminate()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
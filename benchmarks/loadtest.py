@@ -0,0 +1,285 @@
+"""Load-test a local Streamlit server running main.py with concurrent sessions.
+
+Starts `streamlit run` headless and drives it over the same websocket protocol
+the browser uses. Each simulated session loads the page, fills in the form,
+clicks "Calculate Risk", then clicks "Download Your Heart Health Report" on the
+Prevention tab and fetches the file. Switching tabs happens in the browser
+without a server round trip (every tab's content arrives with each script
+run), so the Prevention tab is checked in the "calculate" response rather
+than timed as its own step.
+
+Reports per-step latency percentiles plus the server process's CPU time and
+RSS growth (read from /proc, so Linux only):
+
+    python benchmarks/loadtest.py --concurrency 8 --sessions 80
+
+Assets the script references by absolute paths that do not exist on this
+machine (the sidebar logo and favicon) are swapped for a generated placeholder.
+Use --app to point at another checkout, e.g. one with the BRFSS dataset present.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STEPS = ["load", "calculate", "download"]
+
+WIDGET_TYPES = {"slider", "radio", "number_input", "checkbox", "selectbox", "button", "download_button"}
+MEASUREMENTS = [("Blood Pressure (mmHg)", 90, 190), ("Cholesterol Level (mmol/L)", 3.0, 8.0),
+                ("Body Mass Index (BMI)", 18.0, 40.0)]
+# The Prevention tab's action plan heading in each locale; sessions pick a random language like any selectbox
+PREVENTION_MARKERS = ("## Your Personalized Action Plan", "## Ang Iyong Personal na Plano ng Pagkilos")
+
+
+def write_app(path):
+    """Copy of the script with missing absolute asset paths replaced by a placeholder image."""
+    from PIL import Image
+
+    directory = tempfile.mkdtemp(prefix="loadtest-")
+    placeholder = os.path.join(directory, "placeholder.png")
+    Image.new("RGB", (64, 64), "white").save(placeholder)
+    source = open(path, encoding="utf-8").read()
+    for asset in set(re.findall(r'"([A-Za-z]:/[^"]+\.(?:jpg|jpeg|png))"', source)):
+        if not os.path.exists(asset):
+            source = source.replace(f'"{asset}"', repr(placeholder))
+    script = os.path.join(directory, os.path.basename(path))
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(source)
+    return script
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_stats(pid):
+    """(RSS bytes, peak RSS bytes, CPU seconds) of a process, from /proc."""
+    memory = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            memory[key] = value
+    with open(f"/proc/{pid}/stat") as stat:
+        # Fields after the parenthesised command name; utime and stime are the 12th and 13th
+        fields = stat.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return int(memory["VmRSS"].split()[0]) * 1024, int(memory["VmHWM"].split()[0]) * 1024, cpu
+
+
+class Session:
+    def __init__(self, port, rng):
+        self.port = port
+        self.rng = rng
+        self.connection = None
+        self.widgets = {}  # label -> element proto from the last run
+        self.states = {}  # widget id -> WidgetState sent with every rerun
+        self.markdown = []
+        self.exceptions = 0
+
+    async def connect(self):
+        self.connection = await websocket_connect(f"ws://127.0.0.1:{self.port}/_stcore/stream",
+                                                  subprotocols=["streamlit"])
+
+    async def rerun(self, trigger=None):
+        """Send the widget states like the browser does and wait for the script run to finish."""
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        states = list(self.states.values())
+        if trigger is not None:
+            state = WidgetState(id=trigger)
+            state.trigger_value = True
+            states.append(state)
+        message.rerun_script.widget_states.widgets.extend(states)
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+
+        self.widgets, self.markdown, self.exceptions = {}, [], 0
+        while True:
+            payload = await self.connection.read_message()
+            if payload is None:
+                raise ConnectionError("server closed the websocket")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self.record(forward.delta.new_element)
+            elif kind == "script_finished":
+                return
+
+    def record(self, element):
+        kind = element.WhichOneof("type")
+        if kind in WIDGET_TYPES:
+            # The assessment form comes first; later widgets with the same label belong to other tabs
+            self.widgets.setdefault(getattr(element, kind).label, (kind, getattr(element, kind)))
+        elif kind == "markdown":
+            self.markdown.append(element.markdown.body)
+        elif kind == "exception":
+            self.exceptions += 1
+
+    def set(self, label, value):
+        kind, widget = self.widgets[label]
+        state = WidgetState(id=widget.id)
+        if kind == "slider":
+            state.double_array_value.data[:] = [value]
+        elif kind in ("radio", "selectbox"):
+            state.int_value = list(widget.options).index(value)
+        elif kind == "number_input":
+            state.double_value = value
+        elif kind == "checkbox":
+            state.bool_value = value
+        self.states[widget.id] = state
+
+    def fill_form(self):
+        self.set("Age", self.rng.randint(25, 84))
+        self.set("Sex", self.rng.choice(["Male", "Female"]))
+        # Leave some measurements empty, as real users do
+        for label, low, high in MEASUREMENTS:
+            if self.rng.random() < 0.8:
+                self.set(label, self.rng.randint(low, high) if isinstance(low, int)
+                         else round(self.rng.uniform(low, high), 1))
+        for label, (kind, widget) in list(self.widgets.items()):
+            if kind == "checkbox":
+                self.set(label, self.rng.random() < 0.2)
+            elif kind == "selectbox":
+                self.set(label, self.rng.choice(list(widget.options)))
+
+    async def download_report(self):
+        _, button = self.widgets["Download Your Heart Health Report"]
+        await self.rerun(trigger=button.id)
+        # The rerun re-registers the report, so fetch the URL it was given this time
+        _, button = self.widgets["Download Your Heart Health Report"]
+        response = await AsyncHTTPClient().fetch(f"http://127.0.0.1:{self.port}{button.url}")
+        return len(response.body)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+
+    async def timed(self, step, session, action):
+        started = time.perf_counter()
+        try:
+            await action()
+            failed = session.exceptions > 0
+        except Exception:
+            failed = True
+        self.latencies[step].append(time.perf_counter() - started)
+        self.errors[step] += failed
+        return not failed
+
+
+async def run_session(port, recorder, seed):
+    session = Session(port, random.Random(seed))
+
+    async def load():
+        await session.connect()
+        await session.rerun()
+
+    async def calculate():
+        session.fill_form()
+        _, button = session.widgets["Calculate Risk"]
+        await session.rerun(trigger=button.id)
+        if not any(marker in body for body in session.markdown for marker in PREVENTION_MARKERS):
+            raise RuntimeError("Prevention tab was not rendered")
+
+    try:
+        if await recorder.timed("load", session, load) and await recorder.timed("calculate", session, calculate):
+            await recorder.timed("download", session, session.download_report)
+    finally:
+        if session.connection is not None:
+            session.connection.close()
+
+
+async def drive(port, sessions, concurrency, seed, recorder):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with limit:
+            await run_session(port, recorder, seed + i)
+
+    await asyncio.gather(*(limited(i) for i in range(sessions)))
+
+
+def start_server(script, app_dir, port):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [app_dir, os.environ.get("PYTHONPATH")])))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true",
+         "--server.port", str(port), "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "main.py"))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app_dir = os.path.dirname(os.path.abspath(args.app))
+    port = free_port()
+    server = start_server(write_app(args.app), app_dir, port)
+    try:
+        # One warm-up session so imports and shared resources are not billed to the first users
+        warm = Recorder()
+        asyncio.run(drive(port, 1, 1, args.seed - 1, warm))
+        if any(warm.errors.values()):
+            raise RuntimeError(f"warm-up session failed: {warm.errors}")
+
+        rss_before, _, cpu_before = process_stats(server.pid)
+        recorder = Recorder()
+        started = time.perf_counter()
+        asyncio.run(drive(port, args.sessions, args.concurrency, args.seed, recorder))
+        wall = time.perf_counter() - started
+        rss_after, rss_peak, cpu_after = process_stats(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    cpu = cpu_after - cpu_before
+    print(f"{args.sessions} sessions at concurrency {args.concurrency}: {wall:.1f}s wall, "
+          f"{args.sessions / wall:.2f} sessions/s\n")
+    print(f"{'step':<12}{'n':>5}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step in STEPS:
+        latencies = recorder.latencies[step]
+        print(f"{step:<12}{len(latencies):>5}{recorder.errors[step]:>8}"
+              + "".join(f"{percentile(latencies, q) * 1000:>10.0f}" for q in (0.5, 0.9, 0.99) if latencies)
+              + (f"{max(latencies) * 1000:>10.0f}" if latencies else ""))
+    print(f"\nserver CPU: {cpu:.1f}s ({cpu / wall:.0%} of one core, {cpu / args.sessions * 1000:.0f} ms/session)")
+    print(f"server RSS: {rss_before / 2**20:.0f} MB -> {rss_after / 2**20:.0f} MB "
+          f"({(rss_after - rss_before) / args.sessions / 1024:+.0f} KB/session), peak {rss_peak / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
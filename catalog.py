@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+# User-facing text (recommendations and the Prevention tab) per locale. Sources
+# are locales/<locale>.json, key -> string or list of strings; translators edit
+# those and run
+#
+#     python catalog.py            # compile every locale
+#     python catalog.py --check    # exit 1 if a compiled file is out of date
+#
+# to write locales/<locale>.cat: a header, a key-sorted index of (key offset,
+# key length, value offset, value length) records and a UTF-8 blob. The header
+# holds a hash of the source JSON, so a compiled file is used exactly when it
+# matches its source, whatever the file times after a clone or checkout. A
+# catalog is opened on its first lookup and memory-mapped, so replicas on a host
+# share its pages and a locale nobody asks for costs nothing. Lookups binary-search the
+# index; each value is decoded and interned once per process and the same
+# objects are then handed to every session, which only stores its locale code.
+# Keys missing from a locale fall back to English.
+
+LOCALES_DIR = "locales"
+# Locale code -> name shown in the language selector
+LOCALES = {"en": "English", "fil": "Filipino"}
+DEFAULT_LOCALE = "en"
+
+MAGIC = b"LLCAT2\0\0"
+# SHA-256 of the source JSON file
+SOURCE_HASH_SIZE = 32
+COUNT = struct.Struct("<I")
+HEADER_SIZE = len(MAGIC) + SOURCE_HASH_SIZE + COUNT.size
+RECORD = struct.Struct("<IIII")
+# Value type markers and the separator between the items of a list value
+STRING, LIST = b"s", b"l"
+ITEM_SEPARATOR = "\x1f"
+
+
+def source_path(locale):
+    return os.path.join(LOCALES_DIR, f"{locale}.json")
+
+
+def compiled_path(locale):
+    return os.path.join(LOCALES_DIR, f"{locale}.cat")
+
+
+def source_hash(locale):
+    with open(source_path(locale), "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compile_entries(entries, source_digest=bytes(SOURCE_HASH_SIZE)):
+    """The compiled catalog bytes for a dict of key -> string or list of strings."""
+    keys = sorted(entries, key=lambda key: key.encode())
+    blob_offset = HEADER_SIZE + RECORD.size * len(keys)
+    records, blob = [], bytearray()
+    for key in keys:
+        value = entries[key]
+        if isinstance(value, str):
+            raw_value = STRING + value.encode()
+        elif isinstance(value, list) and all(isinstance(item, str) and ITEM_SEPARATOR not in item for item in value):
+            raw_value = LIST + ITEM_SEPARATOR.join(value).encode()
+        else:
+            raise ValueError(f"{key}: values must be strings or lists of strings")
+        raw_key = key.encode()
+        key_offset = blob_offset + len(blob)
+        records.append(RECORD.pack(key_offset, len(raw_key), key_offset + len(raw_key), len(raw_value)))
+        blob += raw_key + raw_value
+    return MAGIC + source_digest + COUNT.pack(len(keys)) + b"".join(records) + bytes(blob)
+
+
+def compile_locale(locale):
+    with open(source_path(locale), "rb") as f:
+        source = f.read()
+    return compile_entries(json.loads(source), hashlib.sha256(source).digest())
+
+
+def _decode(raw):
+    text = raw[1:].decode()
+    if raw[:1] == STRING:
+        return sys.intern(text)
+    return [sys.intern(item) for item in text.split(ITEM_SEPARATOR)] if text else []
+
+
+class Catalog:
+    """One locale's compiled catalog. Returned values are shared, so treat them as read-only."""
+
+    def __init__(self, locale, data, fallback=None):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{locale}: not a compiled catalog")
+        self.locale = locale
+        self.data = data
+        (self.count,) = COUNT.unpack_from(data, len(MAGIC) + SOURCE_HASH_SIZE)
+        self.fallback = fallback
+        # Key -> decoded value, filled in as keys are first looked up
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _find(self, key):
+        raw_key = key.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = RECORD.unpack_from(
+                self.data, HEADER_SIZE + middle * RECORD.size)
+            probe = self.data[key_offset:key_offset + key_length]
+            if probe < raw_key:
+                low = middle + 1
+            elif probe > raw_key:
+                high = middle
+            else:
+                return self.data[value_offset:value_offset + value_length]
+        return None
+
+    def _store(self, key, value):
+        with self.lock:
+            return self.values.setdefault(key, value)
+
+    def get(self, key):
+        value = self.values.get(key)
+        if value is None:
+            raw = self._find(key)
+            if raw is not None:
+                value = _decode(raw)
+            elif self.fallback is not None:
+                value = self.fallback.get(key)
+            else:
+                raise KeyError(key)
+            value = self._store(key, value)
+        return value
+
+    def recommendation(self, recommendation_id):
+        """The {"title", "tips", "impact"} dict for a recommendation, built once per locale."""
+        key = f"recommendations.{recommendation_id}"
+        value = self.values.get(key)
+        if value is None:
+            value = self._store(key, {"title": self.get(f"{key}.title"), "tips": self.get(f"{key}.tips"),
+                                      "impact": self.get(f"{key}.impact")})
+        return value
+
+
+_catalogs = {}
+_catalogs_lock = threading.RLock()
+
+
+def _load(locale):
+    path = compiled_path(locale)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:len(MAGIC)] == MAGIC and data[len(MAGIC):len(MAGIC) + SOURCE_HASH_SIZE] == source_hash(locale):
+            return data
+        data.close()
+    # Not compiled yet, compiled by another version, or the source was edited since: compile it in memory
+    return compile_locale(locale)
+
+
+def get_catalog(locale=DEFAULT_LOCALE):
+    catalog = _catalogs.get(locale)
+    if catalog is None:
+        if locale not in LOCALES:
+            raise ValueError(f"unknown locale {locale!r}, expected one of {', '.join(LOCALES)}")
+        with _catalogs_lock:
+            catalog = _catalogs.get(locale)
+            if catalog is None:
+                fallback = None if locale == DEFAULT_LOCALE else get_catalog(DEFAULT_LOCALE)
+                catalog = _catalogs[locale] = Catalog(locale, _load(locale), fallback)
+    return catalog
+
+
+def text(key, locale=DEFAULT_LOCALE):
+    return get_catalog(locale).get(key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile locales/<locale>.json into locales/<locale>.cat.")
+    parser.add_argument("--check", action="store_true", help="only report compiled catalogs that are out of date")
+    args = parser.parse_args()
+
+    default_keys = set(json.load(open(source_path(DEFAULT_LOCALE), encoding="utf-8")))
+    stale = []
+    for locale in LOCALES:
+        data = compile_locale(locale)
+        missing = default_keys - set(json.load(open(source_path(locale), encoding="utf-8")))
+        if missing:
+            print(f"{locale}: {len(missing)} keys fall back to {DEFAULT_LOCALE}: {', '.join(sorted(missing))}")
+        path = compiled_path(locale)
+        current = open(path, "rb").read() if os.path.exists(path) else None
+        if args.check:
+            if current != data:
+                stale.append(path)
+        elif current != data:
+            with open(path, "wb") as f:
+                f.write(data)
+            print(f"Wrote {path} ({len(data):,} bytes)")
+    if stale:
+        print(f"Out of date: {', '.join(stale)}; run `python catalog.py`")
+        sys.exit(1)
@@ -0,0 +1,267 @@
+import io
+import math
+import os
+
+from matplotlib.figure import Figure
+import plotly.graph_objects as go
+
+# Static charts shared by every session. They are built with the object-oriented
+# matplotlib API (not pyplot) so they can be rendered from a background thread.
+
+# Per-patient charts are sent to the browser as small Plotly JSON specs and drawn
+# client-side ("client"), or rasterized on the server with matplotlib ("server").
+CHART_MODE = os.environ.get("LIFELINE_CHART_MODE", "client")
+
+RISK_BANDS = [
+    {"range": [0, 20], "color": "green"},
+    {"range": [20, 40], "color": "yellow"},
+    {"range": [40, 60], "color": "orange"},
+    {"range": [60, 80], "color": "red"},
+    {"range": [80, 100], "color": "blue"}
+]
+
+MAJOR_RISK_FACTORS = {
+    'Factor': ['Smoking', 'High Blood Pressure', 'Diabetes', 'Obesity', 'Physical Inactivity', 'Poor Diet'],
+    'Relative Risk': [2.5, 2.0, 1.8, 1.6, 1.5, 1.7]
+}
+
+HEART_DISEASE_TYPES = {
+    'Type': ['Coronary Artery Disease', 'Heart Failure', 'Arrhythmias', 'Valve Disease', 'Congenital Heart Disease'],
+    'Prevalence': [42, 23, 15, 12, 8]
+}
+
+
+def figure_to_png(fig):
+    # Same settings st.pyplot uses, so precomputed images look identical
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def create_risk_factors_tree():
+    fig = go.Figure()
+
+    # Define the center point and radius
+    center_x, center_y = 0.5, 0.5
+    radius = 0.35
+
+    # Define main categories and their factors
+    categories = {
+        'Demographic\nFactors': ['Age', 'Sex'],
+        'Clinical\nMeasurements': ['Blood Pressure', 'Cholesterol Ratio', 'BMI'],
+        'Pre-existing\nConditions': ['Diabetes', 'Atrial Fibrillation', 'Kidney Disease'],
+        'Other Medical\nConditions': ['Rheumatoid Arthritis', 'Mental Illness', 'Migraine'],
+        'Lifestyle &\nHistory': ['Smoking', 'Family History', 'Medications']
+    }
+
+    # Calculate positions for main categories
+    n_categories = len(categories)
+    angles = [2 * math.pi * i / n_categories - math.pi / 2 for i in range(n_categories)]
+
+    # Add central node
+    fig.add_trace(go.Scatter(
+        x=[center_x],
+        y=[center_y],
+        mode='markers+text',
+        text=['QRISK3\nFactors'],
+        textposition='middle center',
+        textfont=dict(color='#000000'),
+        marker=dict(size=60, color='#2E86C1'),  # Original size
+        name='Central'
+    ))
+
+    # Add categories and their factors
+    colors = ['#3498DB', '#E74C3C', '#2ECC71', '#F1C40F', '#9B59B6']
+
+    for i, (category, factors) in enumerate(categories.items()):
+        # Calculate category position
+        cat_x = center_x + radius * math.cos(angles[i])
+        cat_y = center_y + radius * math.sin(angles[i])
+
+        # Add category node
+        fig.add_trace(go.Scatter(
+            x=[cat_x],
+            y=[cat_y],
+            mode='markers+text',
+            text=[category],
+            textposition='middle center',
+            textfont=dict(color='#000000'),
+            marker=dict(size=45, color=colors[i]),  # Original size
+            name=category
+        ))
+
+        # Add line from center to category
+        fig.add_trace(go.Scatter(
+            x=[center_x, cat_x],
+            y=[center_y, cat_y],
+            mode='lines',
+            line=dict(color=colors[i], width=2),
+            showlegend=False
+        ))
+
+    # Update layout
+    fig.update_layout(
+        showlegend=False,
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[0, 1]),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[0, 1]),
+        plot_bgcolor='white',
+        title=dict(
+            text='QRISK3 Risk Factor Categories',
+            x=0.5,
+            y=0.95,
+            xanchor='center',
+            yanchor='top',
+            font=dict(size=24, color='#000000')  # Original size
+        ),
+        height=450,  # Only changed the overall height
+        margin=dict(l=20, r=20, t=80, b=20)
+    )
+
+    return fig
+
+
+def major_risk_factors_figure():
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    bars = ax.bar(MAJOR_RISK_FACTORS['Factor'], MAJOR_RISK_FACTORS['Relative Risk'], color='#ff9999')
+
+    for i, bar in enumerate(bars):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+                f'{MAJOR_RISK_FACTORS["Relative Risk"][i]}x',
+                ha='center', fontsize=9)
+
+    ax.set_ylabel('Relative Risk Increase')
+    ax.set_title('Impact of Major Risk Factors on Heart Disease')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    return fig
+
+
+def heart_disease_types_figure():
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.pie(HEART_DISEASE_TYPES['Prevalence'], labels=HEART_DISEASE_TYPES['Type'], autopct='%1.1f%%',
+           startangle=90, shadow=True, explode=[0.1, 0, 0, 0, 0],
+           colors=['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0'])
+    ax.axis('equal')
+    ax.set_title('Distribution of Heart Disease Types')
+    fig.tight_layout()
+    return fig
+
+
+def gauge_spec(risk, band=None):
+    """Risk gauge; `band` is an optional (low, high) uncertainty interval drawn over the colour bands."""
+    steps = list(RISK_BANDS)
+    title = "Heart Disease Risk"
+    if band is not None:
+        low, high = band
+        steps.append({"range": [low, high], "color": "rgba(60, 60, 60, 0.35)", "thickness": 0.35})
+        title += f"<br><span style='font-size:0.7em'>likely range {low}%–{high}%</span>"
+    return {
+        "data": [{
+            "type": "indicator",
+            "mode": "gauge+number",
+            "value": risk,
+            "title": {"text": title},
+            "gauge": {"axis": {"range": [0, 100]},
+                      "bar": {"color": "pink"},
+                      "steps": steps},
+        }],
+        "layout": {},
+    }
+
+
+BASELINE_LABEL = "Age (baseline)"
+
+
+def sorted_contributions(baseline, contributions, risk_factors):
+    """[(label, points, multiplier label)], the age baseline first, then factors by contribution."""
+    # Stable sort keeps dict order among equal contributions; horizontal bars are drawn bottom-up
+    factors = sorted(contributions.items(), key=lambda item: item[1], reverse=True)
+    return [(BASELINE_LABEL, baseline, "")] + [(factor, points, f" ({risk_factors[factor]:.1f}x)")
+                                               for factor, points in factors]
+
+
+def factor_bars_spec(baseline, contributions, risk_factors):
+    """Additive breakdown of the risk (see attribution.attribute): bars sum to the score."""
+    rows = sorted_contributions(baseline, contributions, risk_factors)
+    names = [name for name, _, _ in rows]
+    return {
+        "data": [{
+            "type": "bar",
+            "orientation": "h",
+            "x": [points for _, points, _ in rows],
+            "y": names,
+            "marker": {"color": ["lightgray"] + ["skyblue"] * (len(rows) - 1)},
+            "text": [f"{points:.1f}{multiplier}" if name == BASELINE_LABEL else f"+{points:.1f}{multiplier}"
+                     for name, points, multiplier in rows],
+            "textposition": "outside",
+            "cliponaxis": False,
+        }],
+        "layout": {
+            "title": {"text": "How Each Factor Contributes to Your Risk Score"},
+            "xaxis": {"title": {"text": "Contribution to 10-Year Risk (percentage points)"}},
+            "yaxis": {"categoryorder": "array", "categoryarray": names, "autorange": "reversed"},
+            "height": 600,
+            "margin": {"l": 200, "r": 80, "t": 60, "b": 50},
+        },
+    }
+
+
+def factor_bars_figure(baseline, contributions, risk_factors):
+    rows = sorted_contributions(baseline, contributions, risk_factors)
+    names = [name for name, _, _ in rows]
+    values = [points for _, points, _ in rows]
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
+    bars = ax.barh(names, values, color=['lightgray'] + ['skyblue'] * (len(rows) - 1))
+    ax.invert_yaxis()
+
+    # Add values at the end of each bar
+    for bar, (name, points, multiplier) in zip(bars, rows):
+        sign = "" if name == BASELINE_LABEL else "+"
+        ax.text(bar.get_width() + 0.05, bar.get_y() + bar.get_height()/2,
+                f'{sign}{points:.1f}{multiplier}',
+                va='center', fontsize=8)
+
+    ax.set_xlabel("Contribution to 10-Year Risk (percentage points)")
+    ax.set_title("How Each Factor Contributes to Your Risk Score")
+    fig.tight_layout()
+    return fig
+
+
+def risk_by_age_spec(aggregator):
+    """Mean risk per age band with the interquartile range shaded, from a trends.TrendAggregator."""
+    data = []
+    for (sex_label, line_label), color in zip([("Male", "Men"), ("Female", "Women")], ["31, 119, 180", "255, 127, 14"]):
+        df_age = aggregator.age_curve(sex_label).dropna(subset=["Mean"])
+        ages = df_age["Age"].tolist()
+        # The band is one closed shape: P75 left to right, then P25 back
+        data.append({
+            "type": "scatter",
+            "x": ages + ages[::-1],
+            "y": df_age["P75"].tolist() + df_age["P25"].tolist()[::-1],
+            "fill": "toself",
+            "fillcolor": f"rgba({color}, 0.15)",
+            "line": {"width": 0},
+            "hoverinfo": "skip",
+            "showlegend": False,
+        })
+        data.append({
+            "type": "scatter",
+            "mode": "lines+markers",
+            "x": ages,
+            "y": df_age["Mean"].tolist(),
+            "name": line_label,
+            "line": {"color": f"rgb({color})", "width": 2},
+        })
+    return {
+        "data": data,
+        "layout": {
+            "title": {"text": "10-Year Heart Disease Risk by Age and Sex"},
+            "xaxis": {"title": {"text": "Age"}, "showgrid": True, "griddash": "dash"},
+            "yaxis": {"title": {"text": "Risk Percentage (%)"}, "showgrid": True, "griddash": "dash"},
+        },
+    }
@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+
+from attribution import attribute, summary_frame
+from risk_model import FACTOR_NAMES, score_arrays
+from trends import MG_DL_PER_MMOL_L
+
+# Bundled cohorts mapped to one schema (cohort, age in years, sex, smoking,
+# diabetes, app risk score, the cohort's own outcome label) and indexed once
+# for the cohort explorer. Filter queries are answered from two structures
+# built at load time, so their cost does not depend on the number of rows:
+#   - a count cube over cohort x age x sex x smoking x diabetes x score bin,
+#     plus score, outcome and per-factor attribution sums per cell, for
+#     distributions, rates and what drives the risk of the selected group;
+#   - packed bitmap indexes per attribute value (cumulative by age, so an age
+#     range is two bitmaps) for drilling down to the matching records.
+
+# Attribute codes; UNKNOWN marks values the source dataset does not record
+NO, YES, UNKNOWN = 0, 1, 2
+SEX_LABELS = ["Male", "Female", "Unknown"]
+FLAG_LABELS = ["No", "Yes", "Unknown"]
+
+MAX_AGE = 110
+SCORE_BIN_WIDTH = 5
+SCORE_BINS = 100 // SCORE_BIN_WIDTH
+
+
+def _flag(values):
+    # 0/1 answers; anything else (missing, or a mean imputed upstream) is unknown
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+    return np.where(values == 1, YES, np.where(values == 0, NO, UNKNOWN)).astype(np.uint8)
+
+
+def load_framingham(path):
+    data = pd.read_csv(path)
+    return pd.DataFrame({
+        "age": data["age"],
+        "sex": np.where(data["sex"] == "M", 0, 1),
+        "smoking": np.where(data["is_smoking"] == "YES", YES, NO),
+        "diabetes": _flag(data["diabetes"]),
+        "blood_pressure": data["sysBP"],
+        "cholesterol": data["totChol"] / MG_DL_PER_MMOL_L,
+        "bmi": data["BMI"],
+        "family_history": False,
+        "outcome": data["TenYearRisk"],
+    })
+
+
+def load_heart_disease_risk(path):
+    # Min-max scaled features. Ages come in two encodings: the Framingham rows are
+    # age / 70 (32-70 years), the rest repeat the prediction dataset's (age - 14) / 89
+    # scaled again by 1/70. Other measurements cannot be unscaled and are left out.
+    data = pd.read_csv(path)
+    scaled = data["Age"].to_numpy()
+    age = np.where(scaled * 70 >= 31.5, np.rint(scaled * 70), 14 + np.rint(scaled * 89 * 70))
+    gender = data["Gender"].to_numpy()
+    return pd.DataFrame({
+        "age": age,
+        "sex": np.where(gender == 1, 0, np.where(gender == 0, 1, UNKNOWN)),
+        "smoking": _flag(data["Smoking"]),
+        "diabetes": _flag(data["Diabetes"]),
+        "blood_pressure": np.nan,
+        "cholesterol": np.nan,
+        "bmi": np.nan,
+        "family_history": False,
+        "outcome": data["Heart Attack Risk (Binary)"],
+    })
+
+
+def load_heart_attack_prediction(path):
+    # Ages are min-max scaled over 14-103 years
+    data = pd.read_csv(path)
+    gender = data["Gender"].astype(str)
+    return pd.DataFrame({
+        "age": 14 + np.rint(data["Age"] * 89),
+        "sex": np.where(gender.isin(["Male", "1"]), 0, np.where(gender.isin(["Female", "0"]), 1, UNKNOWN)),
+        "smoking": _flag(data["Smoking"]),
+        "diabetes": _flag(data["Diabetes"]),
+        "blood_pressure": np.nan,
+        "cholesterol": np.nan,
+        # Only the obesity flag survives scaling; stand in a BMI on the matching side of 30
+        "bmi": np.where(data["Obesity"] == 1, 35.0, np.where(data["Obesity"] == 0, 25.0, np.nan)),
+        "family_history": data["Family History"] == 1,
+        "outcome": data["Heart Attack Risk (Binary)"],
+    })
+
+
+def load_south_african(path):
+    # Men from a high-risk region of the Western Cape; tobacco is cumulative kg
+    data = pd.read_csv(path)
+    return pd.DataFrame({
+        "age": data["age"],
+        "sex": 0,
+        "smoking": np.where(data["tobacco"] > 0, YES, NO),
+        "diabetes": UNKNOWN,
+        "blood_pressure": data["sbp"],
+        "cholesterol": np.nan,
+        "bmi": data["obesity"],
+        "family_history": data["famhist"] == "Present",
+        "outcome": data["chd"],
+    })
+
+
+# Display name -> (CSV file, loader, outcome description)
+COHORTS = {
+    "Framingham": ("data_cardiovascular_risk.csv", load_framingham, "10-year CHD"),
+    "Heart Disease Risk": ("heart_disease_risk.csv", load_heart_disease_risk, "heart attack risk"),
+    "Heart Attack Prediction": ("heart-disease-risk-prediction-dataset.csv", load_heart_attack_prediction,
+                                "heart attack risk"),
+    "South African Heart": ("risk_data.csv", load_south_african, "coronary heart disease"),
+}
+
+
+def load_cohorts(cohorts=COHORTS):
+    """Columns for every bundled cohort in the common schema, scored with the app's model."""
+    frames = []
+    for code, (path, loader, _) in enumerate(cohorts.values()):
+        frame = loader(path)
+        frame.insert(0, "cohort", code)
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True)
+
+    neutral = np.zeros(len(data), dtype=bool)
+    score, multipliers = score_arrays(
+        data["age"].to_numpy(dtype=float), np.array(SEX_LABELS)[data["sex"].to_numpy()],
+        data["smoking"].to_numpy() == YES, data["diabetes"].to_numpy() == YES,
+        data["blood_pressure"].to_numpy(dtype=float), data["cholesterol"].to_numpy(dtype=float),
+        data["bmi"].to_numpy(dtype=float), neutral, neutral, "Not Specified", "Not Specified", "Not Specified",
+        data["family_history"].to_numpy(dtype=bool), neutral, "Not Specified", neutral, neutral)
+    _, contributions = attribute(data["age"].to_numpy(dtype=float), multipliers, score)
+    return {
+        "cohort": data["cohort"].to_numpy(dtype=np.uint8),
+        "age": np.clip(data["age"].to_numpy(), 0, MAX_AGE).astype(np.uint8),
+        "sex": data["sex"].to_numpy(dtype=np.uint8),
+        "smoking": data["smoking"].to_numpy(dtype=np.uint8),
+        "diabetes": data["diabetes"].to_numpy(dtype=np.uint8),
+        "score": score.astype(np.float32),
+        "outcome": data["outcome"].fillna(0).to_numpy(dtype=np.uint8),
+        # Points each factor adds to the score, one column per FACTOR_NAMES entry
+        "contributions": contributions.astype(np.float32),
+    }
+
+
+class CohortSummary:
+    def __init__(self, counts, histogram, score_sum, outcome_sum, contribution_sum, affected):
+        # Per cohort: matching records, score histogram (SCORE_BINS wide), score and outcome sums,
+        # and per factor the summed contributions and the records it contributes to
+        self.counts = counts
+        self.histogram = histogram
+        self.score_sum = score_sum
+        self.outcome_sum = outcome_sum
+        self.contribution_sum = contribution_sum
+        self.affected = affected
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean_score(self):
+        return float(self.score_sum.sum() / self.count) if self.count else float("nan")
+
+    @property
+    def outcome_rate(self):
+        return float(self.outcome_sum.sum() / self.count) if self.count else float("nan")
+
+    def attribution(self):
+        """Per-factor attribution summary for the whole selection (see attribution.summary_frame)."""
+        return summary_frame(self.contribution_sum.sum(axis=0), self.affected.sum(axis=0), self.count)
+
+    def score_quantile(self, q):
+        """Quantile of the score, interpolated within its histogram bin."""
+        histogram = self.histogram.sum(axis=0)
+        if not histogram.sum():
+            return float("nan")
+        cumulative = np.cumsum(histogram)
+        target = q * cumulative[-1]
+        i = int(np.searchsorted(cumulative, target))
+        below = cumulative[i - 1] if i else 0
+        return (i + (target - below) / histogram[i]) * SCORE_BIN_WIDTH
+
+
+class CohortIndex:
+    def __init__(self, columns, names):
+        self.columns = columns
+        self.names = list(names)
+        size = len(columns["cohort"])
+        shape = (len(self.names), MAX_AGE + 1, 3, 3, 3)
+        cell = np.ravel_multi_index(
+            (columns["cohort"], columns["age"], columns["sex"], columns["smoking"], columns["diabetes"]), shape)
+        score_bin = np.minimum(columns["score"] // SCORE_BIN_WIDTH, SCORE_BINS - 1).astype(np.intp)
+
+        cells = int(np.prod(shape))
+        self.cube = np.bincount(cell * SCORE_BINS + score_bin,
+                                minlength=cells * SCORE_BINS).reshape(shape + (SCORE_BINS,)).astype(np.int32)
+        self.score_sum = np.bincount(cell, weights=columns["score"], minlength=cells).reshape(shape)
+        self.outcome_sum = np.bincount(cell, weights=columns["outcome"], minlength=cells).reshape(shape)
+        factors = len(FACTOR_NAMES)
+        self.contribution_sum = np.zeros(shape + (factors,))
+        self.affected = np.zeros(shape + (factors,), dtype=np.int32)
+        for i in range(factors):
+            contributions = columns["contributions"][:, i]
+            self.contribution_sum[..., i] = np.bincount(cell, weights=contributions, minlength=cells).reshape(shape)
+            self.affected[..., i] = np.bincount(cell, weights=contributions > 0, minlength=cells).reshape(shape)
+
+        # Packed bitmaps, one bit per row. Ages are cumulative: bit set when age <= a.
+        self.size = size
+        self.bitmaps = {}
+        for name, values in [("cohort", range(len(self.names))), ("sex", range(3)), ("smoking", range(3)),
+                             ("diabetes", range(3))]:
+            for value in values:
+                self.bitmaps[name, value] = np.packbits(columns[name] == value)
+        order = np.argsort(columns["age"], kind="stable")
+        self.age_at_most = np.zeros((MAX_AGE + 1, (size + 7) // 8), dtype=np.uint8)
+        bits = np.zeros(size, dtype=bool)
+        ages = columns["age"][order]
+        start = 0
+        for age in range(MAX_AGE + 1):
+            end = np.searchsorted(ages, age, side="right")
+            bits[order[start:end]] = True
+            start = end
+            self.age_at_most[age] = np.packbits(bits)
+
+    @classmethod
+    def from_bundled(cls):
+        return cls(load_cohorts(), COHORTS)
+
+    @property
+    def age_range(self):
+        return int(self.columns["age"].min()), int(self.columns["age"].max())
+
+    def _selections(self, cohorts, ages, sex, smoking, diabetes):
+        cohort_codes = [self.names.index(name) for name in cohorts] if cohorts is not None else range(len(self.names))
+        low, high = ages if ages is not None else (0, MAX_AGE)
+        # None means any value, including unknown
+        choose = lambda value: [0, 1, 2] if value is None else [value]
+        return list(cohort_codes), (low, high), choose(sex), choose(smoking), choose(diabetes)
+
+    def summary(self, cohorts=None, ages=None, sex=None, smoking=None, diabetes=None):
+        """Aggregates for records matching the filters, read from the cube."""
+        cohort_codes, (low, high), sexes, smokes, diabetes_values = self._selections(
+            cohorts, ages, sex, smoking, diabetes)
+        index = np.ix_(cohort_codes, np.arange(low, high + 1), sexes, smokes, diabetes_values)
+        histogram = self.cube[index].sum(axis=(1, 2, 3, 4))
+        return CohortSummary(histogram.sum(axis=1), histogram, self.score_sum[index].sum(axis=(1, 2, 3, 4)),
+                             self.outcome_sum[index].sum(axis=(1, 2, 3, 4)),
+                             self.contribution_sum[index].sum(axis=(1, 2, 3, 4)),
+                             self.affected[index].sum(axis=(1, 2, 3, 4)))
+
+    def matching_rows(self, cohorts=None, ages=None, sex=None, smoking=None, diabetes=None, limit=None):
+        """Row numbers of matching records, from the bitmap indexes."""
+        cohort_codes, (low, high), sexes, smokes, diabetes_values = self._selections(
+            cohorts, ages, sex, smoking, diabetes)
+        selected = self.age_at_most[high].copy()
+        if low > 0:
+            selected &= ~self.age_at_most[low - 1]
+        for name, values in [("cohort", cohort_codes), ("sex", sexes), ("smoking", smokes),
+                             ("diabetes", diabetes_values)]:
+            if len(values) < (len(self.names) if name == "cohort" else 3):
+                mask = self.bitmaps[name, values[0]].copy()
+                for value in values[1:]:
+                    mask |= self.bitmaps[name, value]
+                selected &= mask
+        if limit is None:
+            return np.flatnonzero(np.unpackbits(selected, count=self.size))
+        # Every non-zero byte holds at least one match, so only the first `limit` need unpacking
+        offsets = np.flatnonzero(selected)[:limit]
+        bits = np.unpackbits(selected[offsets]).reshape(-1, 8)
+        rows = (offsets[:, None] * 8 + np.arange(8))[bits.astype(bool)]
+        return rows[:limit]
+
+    def records(self, rows):
+        """Decoded records for display."""
+        columns = self.columns
+        return pd.DataFrame({
+            "Cohort": np.array(self.names)[columns["cohort"][rows]],
+            "Age": columns["age"][rows],
+            "Sex": np.array(SEX_LABELS)[columns["sex"][rows]],
+            "Smoking": np.array(FLAG_LABELS)[columns["smoking"][rows]],
+            "Diabetes": np.array(FLAG_LABELS)[columns["diabetes"][rows]],
+            "Risk Score (%)": np.round(columns["score"][rows], 2),
+            "Outcome": columns["outcome"][rows],
+        })
+
+    def replicate(self, times):
+        """Index over the cohorts repeated `times` over, for load testing."""
+        return CohortIndex({name: np.tile(values, (times,) + (1,) * (values.ndim - 1))
+                            for name, values in self.columns.items()}, self.names)
@@ -0,0 +1,298 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from risk_model import (FACTOR_NAMES, INPUT_NAMES, build_recommendation_table, calculate_qrisk3,
+                        get_recommendations, recommendation_mask, score_arrays, score_encoded)
+from scored_cohort import MULTIPLIER_CODES, MULTIPLIER_LEVELS
+from validation import BOOLEAN_FIELDS, CATEGORICAL_FIELDS, validate_records
+
+# Golden outputs of calculate_qrisk3 and get_recommendations over the whole
+# discrete input space: every widget option of every categorical and boolean
+# input, every age, and each measurement empty, at its threshold and one widget
+# step above it (so a moved threshold or a > turned into >= is caught). That is
+# 3.5M answer combinations x 60 ages = 212M scores, stored compactly because the
+# reference scores a patient from the age and the 16 multipliers alone: each
+# combination maps to one of 147,456 distinct multiplier vectors, and only each
+# vector's risk per age (uint16 hundredths of a percent) and recommendation set
+# are stored.
+#
+# A check scores every combination once plus every vector at every age (~12M
+# rows, seconds for the vectorized engines); --exhaustive scores all 212M.
+#
+#     python golden.py generate
+#     python golden.py check --engine vectorized encoded
+#     python golden.py check --engine scalar --sample 500000
+
+CORPUS_PATH = "golden_corpus.npz"
+CORPUS_VERSION = 1
+
+AGES = list(range(25, 85))
+MEASUREMENT_VALUES = {
+    "blood_pressure": [None, 140, 141],
+    "cholesterol": [None, 5.0, 5.01],
+    "bmi": [None, 30.0, 30.01],
+}
+
+
+def input_axes():
+    """Input name -> enumerated values for every calculate_qrisk3 argument except age."""
+    axes = {}
+    for name in INPUT_NAMES[1:]:
+        if name in CATEGORICAL_FIELDS:
+            axes[name] = CATEGORICAL_FIELDS[name][1]
+        elif name in BOOLEAN_FIELDS:
+            axes[name] = [False, True]
+        else:
+            axes[name] = MEASUREMENT_VALUES[name]
+    return axes
+
+
+class Corpus:
+    def __init__(self, axes, ages, vector_ids, factor_codes, risk, recommendation_ids, recommendations):
+        self.axes = axes
+        self.ages = np.asarray(ages)
+        # Answer combination (row-major over axes) -> distinct multiplier vector
+        self.vector_ids = vector_ids
+        # Per vector: MULTIPLIER_LEVELS codes, risk * 100 per age, recommendation set
+        self.factor_codes = factor_codes
+        self.risk = risk
+        self.recommendation_ids = recommendation_ids
+        # Distinct get_recommendations outputs as lists of (key, value) pairs, in order
+        self.recommendations = recommendations
+        self.shape = tuple(len(values) for values in axes.values())
+        self.columns = {name: _column(values) for name, values in axes.items()}
+
+    def __len__(self):
+        return len(self.vector_ids) * len(self.ages)
+
+    @classmethod
+    def load(cls, path=CORPUS_PATH):
+        with np.load(path) as data:
+            if int(data["version"]) != CORPUS_VERSION:
+                raise ValueError(f"{path} is corpus version {int(data['version'])}, expected {CORPUS_VERSION}")
+            return cls(json.loads(str(data["axes"])), data["ages"], data["vector_ids"], data["factor_codes"],
+                       data["risk"], data["recommendation_ids"], json.loads(str(data["recommendations"])))
+
+    def save(self, path=CORPUS_PATH):
+        np.savez_compressed(path, version=CORPUS_VERSION, axes=json.dumps(self.axes), ages=self.ages,
+                            vector_ids=self.vector_ids, factor_codes=self.factor_codes, risk=self.risk,
+                            recommendation_ids=self.recommendation_ids,
+                            recommendations=json.dumps(self.recommendations))
+
+    def patients(self, combinations):
+        """Columns of answers (everything but age) for the given combination indices."""
+        digits = np.unravel_index(combinations, self.shape)
+        return {name: self.columns[name][index] for name, index in zip(self.axes, digits)}
+
+
+def _column(values):
+    # Measurements keep None as an object, like the empty number inputs
+    if any(value is None for value in values):
+        return np.array(values, dtype=object)
+    return np.array(values)
+
+
+def generate(path=CORPUS_PATH):
+    """Score the whole input space with calculate_qrisk3 and get_recommendations and save it."""
+    axes = input_axes()
+    names = list(axes)
+    vector_index = {}
+    representatives = []
+    vector_ids = np.empty(int(np.prod([len(values) for values in axes.values()])), dtype=np.uint32)
+    for combination, values in enumerate(itertools.product(*axes.values())):
+        answers = dict(zip(names, values))
+        _, risk_factors = calculate_qrisk3(AGES[0], **answers)
+        codes = bytes(MULTIPLIER_CODES[risk_factors[factor]] for factor in FACTOR_NAMES)
+        if codes not in vector_index:
+            vector_index[codes] = len(representatives)
+            representatives.append(answers)
+        vector_ids[combination] = vector_index[codes]
+
+    factor_codes = np.frombuffer(b"".join(vector_index), dtype=np.uint8).reshape(-1, len(FACTOR_NAMES))
+    risk = np.empty((len(representatives), len(AGES)), dtype=np.uint16)
+    recommendation_index = {}
+    recommendation_ids = np.empty(len(representatives), dtype=np.uint16)
+    for vector, answers in enumerate(representatives):
+        for column, age in enumerate(AGES):
+            score, risk_factors = calculate_qrisk3(age, **answers)
+            risk[vector, column] = round(score * 100)
+        key = json.dumps(list(get_recommendations(risk_factors).items()))
+        recommendation_ids[vector] = recommendation_index.setdefault(key, len(recommendation_index))
+
+    corpus = Corpus(axes, AGES, vector_ids, factor_codes, risk, recommendation_ids,
+                    [json.loads(key) for key in recommendation_index])
+    corpus.save(path)
+    return corpus
+
+
+# Engines take a dict of 1-D columns keyed by INPUT_NAMES and return (risk,
+# multipliers) shaped (n,) and (n, 16), like score_arrays.
+
+def scalar_engine(inputs):
+    # Plain Python values, as the widgets return; round() on NumPy scalars rounds differently
+    columns = {name: np.asarray(values).tolist() for name, values in inputs.items()}
+    count = len(columns["age"])
+    risk = np.empty(count)
+    multipliers = np.empty((count, len(FACTOR_NAMES)))
+    for row in range(count):
+        risk[row], risk_factors = calculate_qrisk3(**{name: values[row] for name, values in columns.items()})
+        multipliers[row] = [risk_factors[factor] for factor in FACTOR_NAMES]
+    return risk, multipliers
+
+
+def vectorized_engine(inputs):
+    return score_arrays(**inputs)
+
+
+def encoded_engine(inputs):
+    batch = validate_records(inputs)
+    if not batch.valid.all():
+        raise ValueError(f"validation rejected corpus inputs: {batch.error_summary()}")
+    return score_encoded(batch.columns)
+
+
+def table_recommender():
+    table = build_recommendation_table()
+    return lambda risk_factors: table[recommendation_mask(risk_factors)]
+
+
+ENGINES = {
+    "scalar": scalar_engine,
+    "vectorized": vectorized_engine,
+    "encoded": encoded_engine,
+}
+
+RECOMMENDERS = {
+    "scalar": lambda: get_recommendations,
+    "table": table_recommender,
+}
+
+
+class CheckResult:
+    def __init__(self, name, checked, mismatches, examples, seconds):
+        self.name = name
+        self.checked = checked
+        self.mismatches = mismatches
+        # Up to a few (inputs, expected, actual) tuples for the report
+        self.examples = examples
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.mismatches == 0
+
+    def __str__(self):
+        status = "OK" if self.ok else f"{self.mismatches:,} MISMATCHES"
+        lines = [f"{self.name}: {self.checked:,} checked in {self.seconds:.1f}s, {status}"]
+        lines += [f"    {inputs}: expected {expected}, got {actual}" for inputs, expected, actual in self.examples]
+        return "\n".join(lines)
+
+
+def _row_chunks(corpus, exhaustive, sample, seed, chunk_size):
+    # Yields (combination, age column) index arrays. The default plan scores
+    # every combination once (cycling through the ages) plus every multiplier
+    # vector at every age, about 12M rows; exhaustive scores all 212M.
+    age_count = len(corpus.ages)
+    if exhaustive:
+        total = len(corpus)
+
+        def select(rows):
+            return np.divmod(rows, age_count)
+    else:
+        combinations = np.arange(len(corpus.vector_ids))
+        _, representatives = np.unique(corpus.vector_ids, return_index=True)
+        plan_combinations = np.concatenate([combinations, np.repeat(representatives, age_count)])
+        plan_ages = np.concatenate([combinations % age_count, np.tile(np.arange(age_count), len(representatives))])
+        total = len(plan_combinations)
+
+        def select(rows):
+            return plan_combinations[rows], plan_ages[rows]
+
+    if sample is not None and sample < total:
+        rows = np.sort(np.random.default_rng(seed).choice(total, sample, replace=False))
+        for start in range(0, sample, chunk_size):
+            yield select(rows[start:start + chunk_size])
+    else:
+        for start in range(0, total, chunk_size):
+            yield select(np.arange(start, min(start + chunk_size, total)))
+
+
+def check_scores(engine, corpus, exhaustive=False, sample=None, chunk_size=200_000, seed=0, name="scores",
+                 max_examples=5):
+    """Compare an engine's risk and multipliers with the corpus.
+
+    `sample` checks that many random rows of the plan instead of all of them,
+    for engines too slow to score millions of rows.
+    """
+    started = time.perf_counter()
+    checked = mismatches = 0
+    examples = []
+    for combinations, age_columns in _row_chunks(corpus, exhaustive, sample, seed, chunk_size):
+        inputs = dict(corpus.patients(combinations), age=corpus.ages[age_columns])
+        vectors = corpus.vector_ids[combinations]
+        risk, multipliers = engine(inputs)
+        expected_risk = corpus.risk[vectors, age_columns] / 100
+        expected_multipliers = MULTIPLIER_LEVELS[corpus.factor_codes[vectors]]
+        wrong = (risk != expected_risk) | (multipliers != expected_multipliers).any(axis=-1)
+        checked += len(wrong)
+        mismatches += int(wrong.sum())
+        for row in np.flatnonzero(wrong)[:max_examples - len(examples)]:
+            examples.append(({name: values[row] for name, values in inputs.items()},
+                             (expected_risk[row], expected_multipliers[row].tolist()),
+                             (risk[row], multipliers[row].tolist())))
+    return CheckResult(name, checked, mismatches, examples, time.perf_counter() - started)
+
+
+def check_recommendations(recommender, corpus, name="recommendations", max_examples=5):
+    """Compare a get_recommendations replacement with the corpus for every distinct multiplier vector."""
+    started = time.perf_counter()
+    mismatches = 0
+    examples = []
+    for codes, expected in zip(corpus.factor_codes, corpus.recommendation_ids):
+        risk_factors = dict(zip(FACTOR_NAMES, MULTIPLIER_LEVELS[codes].tolist()))
+        # Same shape as the JSON round trip of the stored lists of (key, value) pairs
+        actual = [[key, value] for key, value in recommender(risk_factors).items()]
+        if actual != corpus.recommendations[expected]:
+            mismatches += 1
+            if len(examples) < max_examples:
+                examples.append((risk_factors, [key for key, _ in corpus.recommendations[expected]],
+                                 [key for key, _ in actual]))
+    return CheckResult(name, len(corpus.factor_codes), mismatches, examples, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or check the golden scoring corpus.")
+    parser.add_argument("command", choices=["generate", "check"])
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--engine", nargs="+", choices=list(ENGINES), default=["vectorized", "encoded"])
+    parser.add_argument("--recommender", nargs="+", choices=list(RECOMMENDERS), default=list(RECOMMENDERS))
+    parser.add_argument("--exhaustive", action="store_true", help="Check all 212M scores (minutes, not seconds)")
+    parser.add_argument("--sample", type=int, default=None, help="Check this many random rows instead of all")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        started = time.perf_counter()
+        corpus = generate(args.corpus)
+        print(f"Wrote {len(corpus):,} scores ({len(corpus.factor_codes):,} multiplier vectors, "
+              f"{len(corpus.recommendations)} recommendation sets) to {args.corpus} "
+              f"in {time.perf_counter() - started:.0f}s")
+        return 0
+
+    corpus = Corpus.load(args.corpus)
+    results = [check_scores(ENGINES[name], corpus, exhaustive=args.exhaustive, sample=args.sample,
+                            name=f"{name} engine")
+               for name in args.engine]
+    results += [check_recommendations(RECOMMENDERS[name](), corpus, name=f"{name} recommendations")
+                for name in args.recommender]
+    for result in results:
+        print(result)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from cohorts import COHORTS
+
+# Which features of the bundled datasets carry signal for their own outcome
+# labels, for the About the Model tab. On every bootstrap sample a logistic
+# regression on all features is refit, and:
+#   - permutation importance is the drop in out-of-bag AUC when one feature is
+#     shuffled (the model is never refit for it);
+#   - univariate odds ratios come from one logistic regression per feature,
+#     per standard deviation for measurements and yes vs no for flags.
+# The spread across replicates gives the intervals. Replicates run in a
+# process pool; each dataset's feature matrix lives in shared memory that the
+# workers map instead of receiving a pickled copy per task, and each replicate
+# has its own seed so results do not depend on the number of processes.
+#
+#     python importance.py --replicates 500 --processes 8
+#
+# The results are written to a versioned JSON artifact that the app loads at
+# startup; rerun the study when a dataset changes. At startup the app only
+# compares dataset sizes with the artifact; the recorded SHA-1 digests are
+# verified by `python importance.py --check` (exit 1 when stale), e.g. in CI.
+
+IMPORTANCE_PATH = "feature_importance.json"
+# Bump when the method or the artifact layout changes
+IMPORTANCE_VERSION = 1
+
+# Dataset (named as in cohorts.COHORTS) -> (outcome column, columns that are not features).
+# The text risk label restates the binary outcome, so it would leak it.
+STUDY_COLUMNS = {
+    "Framingham": ("TenYearRisk", ["id"]),
+    "Heart Disease Risk": ("Heart Attack Risk (Binary)", []),
+    "Heart Attack Prediction": ("Heart Attack Risk (Binary)", ["Heart Attack Risk (Text)"]),
+    "South African Heart": ("chd", []),
+}
+
+# Text answers to yes/no columns; the first value of each pair is "yes"
+TEXT_FLAGS = [("M", "F"), ("YES", "NO"), ("Present", "Absent"), ("Male", "Female"), ("1", "0")]
+
+DEFAULT_REPLICATES = 500
+DEFAULT_LEVEL = 0.95
+# Replicates per task: enough to amortize scheduling, small enough to balance the pool
+REPLICATES_PER_TASK = 5
+RIDGE = 1e-4
+
+
+class StudyData:
+    """One dataset prepared for the study: imputed features, outcome and feature metadata."""
+
+    def __init__(self, name, path, features, kinds, x, y):
+        self.name = name
+        self.path = path
+        self.features = features
+        # "binary" (0/1, odds ratio yes vs no) or "per SD" (standardized)
+        self.kinds = kinds
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def from_csv(cls, name, path, outcome, excluded):
+        data = pd.read_csv(path)
+        y = pd.to_numeric(data[outcome], errors="coerce").fillna(0).to_numpy(dtype=float)
+        features, kinds, columns = [], [], []
+        for column in data.columns:
+            if column == outcome or column in excluded:
+                continue
+            values, label = _numeric(data[column])
+            present = values[~np.isnan(values)]
+            # Flags, allowing a few values imputed upstream (e.g. a column mean) that count as missing
+            binary = len(present) > 0 and np.isin(present, [0, 1]).mean() >= 0.95
+            if binary:
+                values = np.where(np.isin(values, [0, 1]), values, np.nan)
+                fill = float(np.bincount(values[~np.isnan(values)].astype(int), minlength=2).argmax())
+            else:
+                fill = float(np.nanmedian(values))
+            values = np.where(np.isnan(values), fill, values)
+            if not binary:
+                scale = values.std()
+                if scale == 0:
+                    continue
+                values = (values - values.mean()) / scale
+            features.append(f"{column} ({label})" if label else column)
+            kinds.append("binary" if binary else "per SD")
+            columns.append(values)
+        return cls(name, path, features, kinds, np.column_stack(columns), y)
+
+
+def _numeric(series):
+    # Numbers as floats (NaN when missing); yes/no text as 1/0 plus the "yes" label
+    if series.dtype != object:
+        return series.to_numpy(dtype=float), None
+    text = series.astype(str)
+    values = np.full(len(series), np.nan)
+    label = None
+    for yes, no in TEXT_FLAGS:
+        if text.isin([yes, no]).any():
+            values[text == yes] = 1
+            values[text == no] = 0
+            label = label or yes
+    return values, label
+
+
+def load_study_data(datasets=STUDY_COLUMNS):
+    return [StudyData.from_csv(name, COHORTS[name][0], outcome, excluded)
+            for name, (outcome, excluded) in datasets.items()]
+
+
+def fit_logistic(x, y, iterations=25):
+    """Logistic regression coefficients (intercept first) by Newton's method with a small ridge."""
+    design = np.column_stack([np.ones(len(x)), x])
+    beta = np.zeros(design.shape[1])
+    penalty = RIDGE * len(x) * np.eye(len(beta))
+    penalty[0, 0] = 0
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(design @ beta)))
+        gradient = design.T @ (y - p) - penalty @ beta
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + penalty
+        step = np.linalg.solve(hessian, gradient)
+        beta += step
+        if np.abs(step).max() < 1e-8:
+            break
+    return beta
+
+
+def univariate_log_odds(x, y, iterations=25):
+    """Slope of a separate logistic regression on each column, fitted together.
+
+    Each model has two parameters, so the Newton steps are solved in closed form
+    for all columns at once.
+    """
+    intercept = np.zeros(x.shape[1])
+    slope = np.zeros(x.shape[1])
+    ridge = RIDGE * len(x)
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(intercept + x * slope)))
+        residual = y[:, None] - p
+        weight = p * (1 - p)
+        g0, g1 = residual.sum(axis=0), (x * residual).sum(axis=0) - ridge * slope
+        h00, h01, h11 = weight.sum(axis=0), (x * weight).sum(axis=0), (x * x * weight).sum(axis=0) + ridge
+        determinant = h00 * h11 - h01 * h01
+        step0 = (h11 * g0 - h01 * g1) / determinant
+        step1 = (h00 * g1 - h01 * g0) / determinant
+        intercept += step0
+        slope += step1
+        if max(np.abs(step0).max(), np.abs(step1).max()) < 1e-8:
+            break
+    return slope
+
+
+def auc(scores, y):
+    """Area under the ROC curve from average ranks (ties count half)."""
+    positives = y.sum()
+    negatives = len(y) - positives
+    if positives == 0 or negatives == 0:
+        return np.nan
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    # Average rank of each distinct score, 1-based
+    average_rank = np.cumsum(counts) - (counts - 1) / 2
+    rank_sum = average_rank[inverse][y == 1].sum()
+    return (rank_sum - positives * (positives + 1) / 2) / (positives * negatives)
+
+
+def replicate(x, y, seed):
+    """(out-of-bag AUC, AUC drop per feature, univariate log odds per feature) for one bootstrap sample."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(y), len(y))
+    out_of_bag = np.setdiff1d(np.arange(len(y)), rows)
+    beta = fit_logistic(x[rows], y[rows])
+    held_out, held_out_y = x[out_of_bag], y[out_of_bag]
+    linear = beta[0] + held_out @ beta[1:]
+    baseline = auc(linear, held_out_y)
+    drops = np.empty(x.shape[1])
+    for feature in range(x.shape[1]):
+        # Swap one feature's term for its shuffled values without copying the matrix
+        shuffled = rng.permutation(held_out[:, feature])
+        drops[feature] = baseline - auc(linear + (shuffled - held_out[:, feature]) * beta[feature + 1], held_out_y)
+    return baseline, drops, univariate_log_odds(x[rows], y[rows])
+
+
+# Worker state: dataset index -> (x, y) views of the shared memory blocks
+_blocks = []
+_arrays = []
+
+
+def _init_worker(layout):
+    global _blocks, _arrays
+    _blocks, _arrays = [], []
+    for x_name, x_shape, y_name, y_shape in layout:
+        x_block, y_block = SharedMemory(name=x_name), SharedMemory(name=y_name)
+        _blocks += [x_block, y_block]
+        _arrays.append((np.ndarray(x_shape, dtype=float, buffer=x_block.buf),
+                        np.ndarray(y_shape, dtype=float, buffer=y_block.buf)))
+
+
+def run_replicates(dataset, replicates, seed):
+    x, y = _arrays[dataset]
+    results = [replicate(x, y, np.random.SeedSequence([seed, dataset, number])) for number in replicates]
+    aucs, drops, log_odds = zip(*results)
+    return dataset, list(replicates), np.array(aucs), np.array(drops), np.array(log_odds)
+
+
+def _share(array):
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block
+
+
+def run_study(studies, replicates=DEFAULT_REPLICATES, processes=None, seed=0):
+    """Bootstrap results per dataset: {"auc": (R,), "drops": (R, features), "log_odds": (R, features)}."""
+    processes = processes or os.cpu_count() or 1
+    results = [{"auc": np.empty(replicates), "drops": np.empty((replicates, len(study.features))),
+                "log_odds": np.empty((replicates, len(study.features)))} for study in studies]
+    # Largest datasets first so the pool does not wait on one big task at the end
+    order = sorted(range(len(studies)), key=lambda i: -studies[i].x.size)
+    tasks = [(dataset, range(start, min(start + REPLICATES_PER_TASK, replicates)), seed)
+             for dataset in order for start in range(0, replicates, REPLICATES_PER_TASK)]
+
+    def collect(result):
+        dataset, numbers, aucs, drops, log_odds = result
+        results[dataset]["auc"][numbers] = aucs
+        results[dataset]["drops"][numbers] = drops
+        results[dataset]["log_odds"][numbers] = log_odds
+
+    blocks = []
+    try:
+        layout = []
+        for study in studies:
+            blocks += [_share(study.x), _share(study.y)]
+            layout.append((blocks[-2].name, study.x.shape, blocks[-1].name, study.y.shape))
+        if processes == 1:
+            _init_worker(layout)
+            for task in tasks:
+                collect(run_replicates(*task))
+        else:
+            with Pool(processes, initializer=_init_worker, initargs=(layout,)) as pool:
+                for result in pool.imap_unordered(_run_task, tasks):
+                    collect(result)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return results
+
+
+def _run_task(task):
+    return run_replicates(*task)
+
+
+def _interval(values, level):
+    tail = (1 - level) / 2 * 100
+    low, high = np.nanpercentile(values, [tail, 100 - tail], axis=0)
+    return np.nanmean(values, axis=0), low, high
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def summarize(studies, results, replicates, seed, level=DEFAULT_LEVEL):
+    """The artifact: per dataset, model AUC and per-feature importance and odds ratio with intervals."""
+    datasets = []
+    for study, result in zip(studies, results):
+        auc_mean, auc_low, auc_high = _interval(result["auc"], level)
+        importance, importance_low, importance_high = _interval(result["drops"], level)
+        _, odds_low, odds_high = _interval(np.exp(result["log_odds"]), level)
+        odds_ratio = np.exp(np.nanmedian(result["log_odds"], axis=0))
+        features = [{
+            "feature": feature,
+            "kind": kind,
+            "importance": float(importance[i]),
+            "importance_low": float(importance_low[i]),
+            "importance_high": float(importance_high[i]),
+            "odds_ratio": float(odds_ratio[i]),
+            "odds_ratio_low": float(odds_low[i]),
+            "odds_ratio_high": float(odds_high[i]),
+        } for i, (feature, kind) in enumerate(zip(study.features, study.kinds))]
+        datasets.append({
+            "name": study.name,
+            "file": study.path,
+            "sha1": file_digest(study.path),
+            "bytes": os.path.getsize(study.path),
+            "rows": len(study.y),
+            "outcome_rate": float(study.y.mean()),
+            "auc": [float(auc_mean), float(auc_low), float(auc_high)],
+            "features": sorted(features, key=lambda feature: -feature["importance"]),
+        })
+    return {"version": IMPORTANCE_VERSION, "replicates": replicates, "seed": seed, "level": level,
+            "datasets": datasets}
+
+
+def load_artifact(path=IMPORTANCE_PATH):
+    """The saved study, or None when it is missing, from another version, or a dataset changed size."""
+    try:
+        with open(path) as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if artifact.get("version") != IMPORTANCE_VERSION:
+        return None
+    # A stat per dataset; the digests are left to check_artifact so startup never reads the datasets
+    for dataset in artifact["datasets"]:
+        if not os.path.exists(dataset["file"]) or os.path.getsize(dataset["file"]) != dataset.get("bytes"):
+            return None
+    return artifact
+
+
+def check_artifact(path=IMPORTANCE_PATH):
+    """Names of the artifact's datasets whose file is missing or no longer matches its SHA-1 digest."""
+    with open(path) as f:
+        artifact = json.load(f)
+    return [dataset["name"] for dataset in artifact["datasets"]
+            if not os.path.exists(dataset["file"]) or file_digest(dataset["file"]) != dataset["sha1"]]
+
+
+def importance_frame(dataset):
+    """Display table for one dataset of the artifact, most important feature first."""
+    return pd.DataFrame({
+        "Feature": [feature["feature"] for feature in dataset["features"]],
+        "AUC Drop When Shuffled": [f"{feature['importance']:.3f} ({feature['importance_low']:.3f} to "
+                                   f"{feature['importance_high']:.3f})" for feature in dataset["features"]],
+        "Odds Ratio": [f"{feature['odds_ratio']:.2f} ({feature['odds_ratio_low']:.2f} to "
+                       f"{feature['odds_ratio_high']:.2f})" for feature in dataset["features"]],
+        "Odds Ratio For": ["yes vs no" if feature["kind"] == "binary" else "+1 SD"
+                           for feature in dataset["features"]],
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bootstrap feature-importance study over the bundled datasets.")
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=IMPORTANCE_PATH)
+    parser.add_argument("--check", action="store_true",
+                        help="only verify that the datasets still match the digests in --output")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = check_artifact(args.output)
+        if stale:
+            print(f"{args.output} is out of date for {', '.join(stale)}; rerun `python importance.py`")
+            sys.exit(1)
+        print(f"{args.output} matches its datasets")
+        sys.exit(0)
+
+    started = time.perf_counter()
+    studies = load_study_data()
+    results = run_study(studies, args.replicates, args.processes, args.seed)
+    artifact = summarize(studies, results, args.replicates, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(artifact, f, indent=1)
+    print(f"{args.replicates} replicates of {len(studies)} datasets in {time.perf_counter() - started:.1f}s; "
+          f"wrote {args.output}")
+    for dataset in artifact["datasets"]:
+        top = ", ".join(feature["feature"] for feature in dataset["features"][:3])
+        print(f"  {dataset['name']}: AUC {dataset['auc'][0]:.3f}, top features {top}")
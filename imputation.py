@@ -0,0 +1,112 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from risk_model import calculate_qrisk3
+from trends import AGE_BANDS, MG_DL_PER_MMOL_L, age_band
+
+# Missing blood pressure, cholesterol or BMI is filled in from the distribution of
+# people of the same age band and sex in the bundled cohort. The model only looks at
+# whether each measurement is above its threshold, so the table stores the joint
+# probability of the three "high" indicators (8 cells) per age band and sex.
+# Imputing is then a table lookup plus at most 8 scoring calls, not a dataset scan.
+
+MEASUREMENTS = ["blood_pressure", "cholesterol", "bmi"]
+THRESHOLDS = {"blood_pressure": 140, "cholesterol": 5.0, "bmi": 30}
+SEXES = ["Male", "Female"]
+
+# Bands with fewer complete records borrow the nearest band that has enough
+MIN_BAND_COUNT = 50
+
+# Stand-in values on either side of each threshold; only the side matters to the model
+_BELOW = {"blood_pressure": 120, "cholesterol": 4.0, "bmi": 25.0}
+_ABOVE = {"blood_pressure": 160, "cholesterol": 6.5, "bmi": 35.0}
+
+
+class ImputedRisk:
+    def __init__(self, expected, low, high, outcomes, missing):
+        self.expected = expected
+        # Central 90% interval of the risk over the possible values of the missing inputs
+        self.low = low
+        self.high = high
+        # [(probability, risk)] for each combination of the missing indicators
+        self.outcomes = outcomes
+        self.missing = missing
+
+
+class ImputationModel:
+    def __init__(self, joint, counts):
+        # joint[band, sex, high_bp, high_chol, high_bmi] sums to 1 over the last three axes
+        self.joint = joint
+        # Number of complete records behind each (band, sex) cell after borrowing
+        self.counts = counts
+
+    @classmethod
+    def from_dataset(cls, path="data_cardiovascular_risk.csv"):
+        data = pd.read_csv(path).dropna(subset=["sysBP", "totChol", "BMI"])
+        bands = data["age"].map(age_band).to_numpy()
+        sexes = np.where(data["sex"] == "M", 0, 1)
+        high = np.stack([
+            data["sysBP"].to_numpy() > THRESHOLDS["blood_pressure"],
+            data["totChol"].to_numpy() / MG_DL_PER_MMOL_L > THRESHOLDS["cholesterol"],
+            data["BMI"].to_numpy() > THRESHOLDS["bmi"],
+        ], axis=1).astype(int)
+
+        tallies = np.zeros((len(AGE_BANDS), len(SEXES), 2, 2, 2))
+        np.add.at(tallies, (bands, sexes, high[:, 0], high[:, 1], high[:, 2]), 1)
+        band_counts = tallies.sum(axis=(2, 3, 4))
+
+        joint = np.zeros_like(tallies)
+        counts = np.zeros(band_counts.shape, dtype=int)
+        for band, sex in itertools.product(range(len(AGE_BANDS)), range(len(SEXES))):
+            source = min((b for b in range(len(AGE_BANDS)) if band_counts[b, sex] >= MIN_BAND_COUNT),
+                         key=lambda b: abs(b - band))
+            joint[band, sex] = tallies[source, sex] / band_counts[source, sex]
+            counts[band, sex] = band_counts[source, sex]
+        return cls(joint, counts)
+
+    def to_dict(self):
+        return {"joint": self.joint.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(np.array(data["joint"]), np.array(data["counts"]))
+
+    def impute(self, inputs):
+        """Expected risk for calculate_qrisk3 keyword `inputs` with missing measurements.
+
+        Measurements that were entered fix their indicator; the rest are weighted by
+        their probability conditional on age band, sex and the entered ones.
+        """
+        cell = self.joint[age_band(inputs["age"]), 0 if inputs["sex"] == "Male" else 1]
+        missing = [name for name in MEASUREMENTS if inputs[name] is None]
+
+        # Restrict the joint table to the observed indicator values and renormalise
+        index = tuple(slice(None) if name in missing else int(inputs[name] > THRESHOLDS[name])
+                      for name in MEASUREMENTS)
+        conditional = cell[index]
+        total = conditional.sum()
+        conditional = conditional / total if total > 0 else np.full(conditional.shape, 1 / conditional.size)
+
+        outcomes = []
+        for combination in itertools.product([0, 1], repeat=len(missing)):
+            filled = dict(inputs)
+            for name, is_high in zip(missing, combination):
+                filled[name] = _ABOVE[name] if is_high else _BELOW[name]
+            risk, _ = calculate_qrisk3(**filled)
+            probability = float(conditional[combination]) if missing else 1.0
+            outcomes.append((probability, risk))
+
+        expected = sum(probability * risk for probability, risk in outcomes)
+        return ImputedRisk(round(expected, 2), _weighted_quantile(outcomes, 0.05),
+                           _weighted_quantile(outcomes, 0.95), outcomes, missing)
+
+
+def _weighted_quantile(outcomes, q):
+    cumulative = 0.0
+    for probability, risk in sorted(outcomes, key=lambda outcome: outcome[1]):
+        cumulative += probability
+        if cumulative >= q - 1e-12:
+            return risk
+    return max(risk for _, risk in outcomes)
@@ -0,0 +1,698 @@
+import hashlib
+import html
+import os
+import re
+import sys
+import textwrap
+import threading
+import time
+
+import plotly.io
+import plotly.offline
+import streamlit as st
+import streamlit.components.v1 as components
+
+import charts
+import importance
+import warmup
+
+# The "About the Model" and "Heart Health Insights" tabs. Each page is written
+# once against the subset of the Streamlit API it needs, so it can either be
+# rendered live (ui is the st module) or pre-rendered by `python info_pages.py`
+# into a self-contained HTML bundle that any static file server can host:
+#
+#     python info_pages.py static_site
+#     LIFELINE_STATIC_PAGES_URL=https://static.example.org/lifeline python serve.py
+#
+# With the URL set, the static parts (the About tab and the heart disease
+# facts) are iframes of the bundle and cost the app no Python at all; without
+# it (or before the bundle is published) they render live as before. The risk
+# trends sub-tab is never bundled: it reads the population aggregates, which
+# every assessment updates, and is rendered live from a snapshot refreshed every
+# LIFELINE_TRENDS_REFRESH_SECONDS. Streamlit's own static file serving sends
+# .html and .js as text/plain, so it cannot host the bundle itself.
+
+STATIC_PAGES_URL = os.environ.get("LIFELINE_STATIC_PAGES_URL", "").rstrip("/")
+STATIC_PAGES_DIR = "static_site"
+# How stale the risk trends sub-tab may be. Every tab runs on every rerun, so the
+# snapshot (one cache read per replica shard), its chart and its table are built
+# at most this often per process and shared by all sessions.
+TRENDS_REFRESH_SECONDS = float(os.environ.get("LIFELINE_TRENDS_REFRESH_SECONDS", 10))
+
+
+def markdown_to_html(text):
+    """HTML for the Markdown the pages use: headings, paragraphs, lists, rules, code, bold, italics and links."""
+    blocks, paragraph, items = [], [], []
+    list_tag = None
+
+    def flush():
+        nonlocal list_tag
+        if paragraph:
+            blocks.append(f"<p>{_join_lines(paragraph)}</p>")
+            paragraph.clear()
+        if items:
+            blocks.append(f"<{list_tag}>" + "".join(f"<li>{_join_lines(item)}</li>" for item in items)
+                          + f"</{list_tag}>")
+            items.clear()
+            list_tag = None
+
+    # Streamlit dedents and strips Markdown the same way
+    for line in textwrap.dedent(text).strip().splitlines():
+        stripped = line.strip()
+        heading = re.match(r"(#{1,6})\s+(.*)", stripped)
+        item = None if line.startswith(" ") else re.match(r"([-*]|\d+\.)\s+(.*)", line)
+        if not stripped:
+            # Blank lines end paragraphs; a list continues until the next unindented text
+            if paragraph:
+                flush()
+        elif heading:
+            flush()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif stripped in ("---", "***"):
+            flush()
+            blocks.append("<hr>")
+        elif item:
+            tag = "ol" if item.group(1)[0].isdigit() else "ul"
+            if paragraph or tag != list_tag:
+                flush()
+            list_tag = tag
+            items.append([item.group(2)])
+        elif items and line.startswith(" "):
+            # An indented line continues the current list item
+            items[-1].append(line)
+        else:
+            if items:
+                flush()
+            paragraph.append(line)
+    flush()
+    return "\n".join(blocks)
+
+
+def _join_lines(lines):
+    # Two trailing spaces are a line break, anything else joins with a space.
+    # Breaks are marked before inline formatting, which may span lines.
+    text = "".join(line.strip() + ("\0" if line.endswith("  ") else " ") for line in lines[:-1])
+    return _inline(text + lines[-1].strip()).replace("\0", "<br>")
+
+
+def _inline(text):
+    text = html.escape(text, quote=False)
+    # Link targets may contain one level of parentheses, e.g. .../cardiovascular-diseases-(cvds)
+    text = re.sub(r"\[([^\]]+)\]\(((?:[^()\s]|\([^()\s]*\))+)\)",
+                  lambda m: f'<a href="{html.escape(m.group(2))}" target="_blank">{m.group(1)}</a>', text)
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    return re.sub(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])", r"<em>\1</em>", text)
+
+
+class HtmlPage:
+    """The subset of the Streamlit API the pages use, collected into static HTML.
+
+    Like Streamlit, calls on the page go to the innermost container entered with
+    `with`, and calls on a container go to that container.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or self
+        self.parts = []
+        if root is None:
+            self.stack = [self]
+            # File name -> bytes for images, shared by every container of the page
+            self.assets = {}
+            self.ids = 0
+
+    def __enter__(self):
+        self.root.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.root.stack.pop()
+
+    def _target(self):
+        return self.stack[-1] if self is self.root else self
+
+    def _add(self, part):
+        self._target().parts.append(part)
+
+    def _container(self, start, end):
+        container = HtmlPage(self.root)
+        self._add((start, container, end))
+        return container
+
+    def html(self):
+        return "\n".join(part if isinstance(part, str) else part[0] + part[1].html() + part[2] for part in self.parts)
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self._add(f'<div class="markdown">{markdown_to_html(body)}</div>')
+
+    def subheader(self, body):
+        self._add(f"<h3>{_inline(body)}</h3>")
+
+    def caption(self, body):
+        self._add(f'<p class="caption">{_inline(body)}</p>')
+
+    def warning(self, body):
+        self._add(f'<div class="warning">{_inline(body)}</div>')
+
+    def divider(self):
+        self._add("<hr>")
+
+    def metric(self, label, value, help=None):
+        title = f' title="{html.escape(help)}"' if help else ""
+        self._add(f'<div class="metric"{title}><div class="metric-label">{html.escape(label)}</div>'
+                  f'<div class="metric-value">{html.escape(str(value))}</div></div>')
+
+    def image(self, image):
+        name = f"assets/{hashlib.sha1(image).hexdigest()[:16]}.png"
+        self.root.assets[name] = image
+        self._add(f'<img src="{name}" alt="">')
+
+    def pyplot(self, fig):
+        self.image(charts.figure_to_png(fig))
+
+    def plotly_chart(self, figure, use_container_width=True):
+        self._add(plotly.io.to_html(figure, full_html=False, include_plotlyjs=False, validate=False,
+                                    config={"displaylogo": False, "responsive": True}))
+
+    def dataframe(self, frame, hide_index=True, use_container_width=True):
+        self._add(frame.to_html(index=not hide_index, border=0,
+                                float_format=lambda value: f"{value:,.2f}"))
+
+    def columns(self, count):
+        row = self._container('<div class="columns">', "</div>")
+        return [row._container('<div class="column">', "</div>") for _ in range(count)]
+
+    def expander(self, label):
+        return self._container(f"<details><summary>{_inline(label)}</summary>", "</details>")
+
+    def tabs(self, labels):
+        # CSS-only tabs: one radio button per tab, the checked one shows its panel
+        self.root.ids += 1
+        group = f"tabs{self.root.ids}"
+        bar = self._container('<div class="tabs">', "</div>")
+        panels = []
+        for i, label in enumerate(labels):
+            checked = " checked" if i == 0 else ""
+            bar._add(f'<input type="radio" name="{group}" id="{group}-{i}"{checked}>'
+                     f'<label for="{group}-{i}">{html.escape(label)}</label>')
+        for _ in labels:
+            panels.append(bar._container('<div class="tab-panel">', "</div>"))
+        return panels
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<script src="plotly.min.js"></script>
+<style>
+body {{ margin: 0 auto; max-width: 46rem; padding: 1rem; background: #FAFAFA; color: #333333;
+       font-family: "Source Sans Pro", sans-serif; line-height: 1.6; }}
+a {{ color: #D72638; }}
+img {{ max-width: 100%; }}
+hr {{ border: none; border-top: 1px solid #CCCCCC; margin: 2rem 0; }}
+.columns {{ display: flex; gap: 1rem; flex-wrap: wrap; }}
+.column {{ flex: 1 1 0; min-width: 12rem; }}
+.caption {{ color: #808495; font-size: 0.875rem; }}
+.warning {{ background: #FFFCE7; color: #926C05; border-radius: 0.5rem; padding: 1rem; margin: 1rem 0; }}
+.metric-label {{ font-size: 0.875rem; }}
+.metric-value {{ font-size: 2.25rem; }}
+details {{ border: 1px solid #CCCCCC; border-radius: 0.5rem; padding: 0.5rem 1rem; margin: 1rem 0; }}
+summary {{ cursor: pointer; }}
+table.dataframe {{ border-collapse: collapse; width: 100%; }}
+table.dataframe th, table.dataframe td {{ border-bottom: 1px solid #E6E6E6; padding: 0.25rem 0.5rem; text-align: left; }}
+.tabs {{ display: flex; flex-wrap: wrap; }}
+.tabs > input {{ display: none; }}
+.tabs > label {{ order: 0; padding: 0.5rem 1rem 0.5rem 0; cursor: pointer; border-bottom: 2px solid #E6E6E6; }}
+.tabs > .tab-panel {{ order: 1; width: 100%; display: none; }}
+{panel_rules}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def page_html(title, page):
+    # Show the panel that follows the checked radio button, for tab groups of up to 8 panels
+    rules = "\n".join(
+        f".tabs > input:nth-of-type({i}):checked ~ .tab-panel:nth-of-type({i}) {{ display: block; }}\n"
+        f".tabs > input:nth-of-type({i}):checked + label {{ color: #D72638; border-bottom-color: #D72638; }}"
+        for i in range(1, 9))
+    return PAGE_TEMPLATE.format(title=html.escape(title), panel_rules=rules, body=page.html())
+
+
+def about_page(ui):
+    ui.markdown("### About the Model")
+
+    # Introduction to the model
+    ui.markdown("""
+    This application utilizes the QRISK3 risk prediction model, a clinically validated tool designed to estimate an individual’s 10-year risk of cardiovascular disease. Built using the Cox proportional hazards regression algorithm, QRISK3 was developed by researchers at the University of Nottingham and has been externally validated across multiple populations, ensuring its accuracy and reliability in assessing heart disease risk.
+    """)
+
+    # Add tabs within this tab for organized information
+    model_tabs = ui.tabs(["How It Works", "References", "What the Data Shows"])
+
+    with model_tabs[0]:
+        ui.markdown("""
+         ## The QRISK3 Model
+         The QRISK3 model uses the Cox proportional hazards regression algorithm to estimate your 10-year risk of developing cardiovascular disease, considering various health and lifestyle factors
+
+         ### 📊 Development & Validation
+         * 📑 Built using data from over 10.5 million patients in the UK
+         * 🏥 Includes 693,000 recorded cardiovascular events
+         * ✅ Clinically validated across diverse populations
+
+         ### How Your Risk is Calculated
+         **1️⃣ Collecting Personal Health Data**  
+         Includes key risk factors such as age, blood pressure, cholesterol levels, and medical history.
+
+         **2️⃣ Applying Statistical Weights**  
+         Uses population-based risk models to assess the impact of each factor.
+
+         **3️⃣ Calculating Your Risk**  
+         Provides a percentage estimate of your likelihood of experiencing a cardiovascular event within 10 years.
+         """)
+
+
+    # Display the content with the visualization
+    ui.markdown("#### Factors Considered in QRISK3")
+    ui.plotly_chart(warmup.get("risk_factors_tree"), use_container_width=True)
+
+    # Create two columns for factors
+    col1, col2 = ui.columns(2)
+
+    with col1:
+        ui.markdown("""
+            **Demographic Factors:**
+            - Age
+            - Sex
+
+            **Clinical Measurements:**
+            - Systolic blood pressure
+            - Total cholesterol to HDL ratio
+            - Body Mass Index (BMI)
+
+            **Pre-existing Conditions:**
+            - Diabetes
+            - Atrial fibrillation
+            - Chronic kidney disease
+            """)
+
+    with col2:
+        ui.markdown("""
+            **Other Medical Conditions:**
+            - Rheumatoid arthritis
+            - Severe mental illness
+            - Migraine 
+
+            **Medications:**
+            - Corticosteroid use
+
+            **Family History:**
+            - Angina or heart attack in a 1st degree relative < 60
+
+            **Lifestyle:**
+            - Smoking status
+            """)
+
+    ui.markdown("#### ⚠️ Limitations of the Model")
+    ui.markdown("""
+                While QRISK3 is a powerful predictive tool, it's important to understand its limitations:
+
+                - **Age Range**: Validated for adults aged 25-84
+                - **Prediction Window**: Focuses on 10-year risk, not lifetime risk
+                - **Limited Lifestyle Factors**: Does not include detailed information about diet, exercise, or stress levels
+                - **Individual Variations**: Cannot account for all unique genetic and environmental factors
+                - **Not a Diagnostic Tool**: Predicts risk but does not diagnose current heart disease
+
+                Always consult with healthcare professionals for personalized medical advice and interpretation of your results.
+                """)
+
+    with model_tabs[1]:
+        ui.markdown("#### References and Further Reading")
+
+        # Original QRISK3 Publication
+        ui.markdown("""
+        **Original QRISK3 Publication:**  
+        Hippisley-Cox J, Coupland C, Brindle P. Development and validation of QRISK3 risk prediction algorithms to estimate future risk of cardiovascular disease: prospective cohort study. *BMJ* 2017;357:j2099.
+        """)
+
+        # Additional Resources List
+        ui.markdown("""
+        **Additional Resources:**
+    
+        1. [Official QRISK3 Website](https://qrisk.org/three/)  
+        2. [British Cardiovascular Society Guidelines](https://www.britishcardiovascularsociety.org/)  
+        3. [American Heart Association Risk Assessment Guidelines](https://www.heart.org/en/health-topics/consumer-healthcare/what-is-cardiovascular-disease/coronary-artery-disease/coronary-artery-disease-risk-assessment)  
+        4. [European Society of Cardiology Risk Assessment Tools](https://www.escardio.org/Education/Practice-Tools/CVD-prevention-toolbox/SCORE-Risk-Charts)  
+        """)
+
+        # More Related References Section
+        ui.markdown("""
+        **Related Research and Guidelines:**
+    
+        - **NICE Cardiovascular Disease Prevention Guidelines**:  
+          Recommendations by the National Institute for Health and Care Excellence (NICE) for assessing and reducing cardiovascular risk.  
+          [Read the Guidelines](https://www.nice.org.uk/guidance/cg181)
+
+        - **World Health Organization (WHO) Global Health Estimates**:  
+          Provides global statistics and insights on cardiovascular disease prevalence and mortality rates.  
+          [WHO Website](https://www.who.int/news-room/fact-sheets/detail/cardiovascular-diseases-(cvds))
+
+        - **Framingham Heart Study**:  
+          A ground-breaking longitudinal study providing key insights into cardiovascular risk factors.  
+          [Explore the Study](https://www.framinghamheartstudy.org/)
+
+        - **CDC - Heart Disease Facts**:  
+          Statistics and detailed information on cardiovascular disease in the U.S. from the Centers for Disease Control and Prevention.  
+          [Visit CDC Website](https://www.cdc.gov/heartdisease/facts.htm)
+        """)
+
+        # Add a divider for separation before dataset details
+        ui.divider()
+
+        # Dataset Reference Section
+        ui.subheader("Dataset Reference")
+
+        # Dataset Description
+        ui.markdown("""
+        This heart disease risk assessment system is built on data from the **Behavioral Risk Factor 
+        Surveillance System (BRFSS) 2015**, a comprehensive health survey conducted by the CDC. 
+        This nationally representative dataset provides insights into various health indicators 
+        and heart disease status across diverse populations in the United States.
+        """)
+
+        # Dataset Metrics, when the dataset is available to this deployment
+        dataset_metadata = warmup.get_optional("dataset_metadata")
+        if dataset_metadata is None:
+            ui.caption("The BRFSS 2015 dataset is not installed with this deployment, so its size and "
+                       "feature list are not shown.")
+        else:
+            col1, col2, col3 = ui.columns(3)
+            with col1:
+                ui.metric(
+                    label="Sample Size",
+                    value=f"{dataset_metadata['rows']:,}",
+                    help="Number of individual health records analyzed"
+                )
+            with col2:
+                ui.metric(
+                    label="Features",
+                    value=f"{len(dataset_metadata['columns'])}",
+                    help="Health indicators and demographic factors assessed"
+                )
+            with col3:
+                ui.metric(
+                    label="Year",
+                    value="2015",
+                    help="Year the BRFSS survey data was collected"
+                )
+
+            # Expandable Sections for Dataset Details
+            with ui.expander("Dataset Features"):
+                features = dataset_metadata["columns"]
+                num_cols = 3
+                feature_cols = ui.columns(num_cols)
+                for i, feature in enumerate(features):
+                    formatted_feature = " ".join(word.capitalize() for word in feature.split('_'))
+                    feature_cols[i % num_cols].markdown(f"• {formatted_feature}")
+
+        with ui.expander("Data Quality Information"):
+            ui.markdown("""
+            - **Completeness**: The dataset underwent thorough cleaning to handle missing values
+            - **Validation**: Data quality checks were performed to ensure consistency
+            - **Preprocessing**: Features were normalized and encoded for optimal model performance
+            - **Balancing**: Class imbalance was addressed to ensure equitable predictions
+            """)
+
+            # Visual separator
+            ui.markdown("---")
+
+    with model_tabs[2]:
+        ui.markdown("#### Which Factors Matter in the Bundled Datasets")
+        study = warmup.get("feature_importance")
+        if study is None:
+            ui.caption("The feature-importance study has not been run for these datasets; "
+                       "run `python importance.py` to add it.")
+        else:
+            ui.markdown(f"""
+            Each bundled dataset was resampled {study['replicates']} times. On every sample a logistic
+            regression on all of the dataset's features predicts its own outcome label, and:
+
+            - **AUC drop when shuffled** is how much worse the model ranks held-out patients when one
+              feature's values are shuffled (permutation importance; 0 means no signal)
+            - **Odds ratio** compares the odds of the outcome with and without a flag, or per standard
+              deviation of a measurement, one feature at a time
+
+            Ranges are {study['level']:.0%} bootstrap intervals.
+            """)
+            dataset_tabs = ui.tabs([dataset["name"] for dataset in study["datasets"]])
+            for dataset_tab, dataset in zip(dataset_tabs, study["datasets"]):
+                auc, auc_low, auc_high = dataset["auc"]
+                dataset_tab.caption(f"{dataset['rows']:,} records from {dataset['file']}, "
+                                    f"{dataset['outcome_rate']:.0%} with the outcome. Model AUC on held-out "
+                                    f"records: {auc:.2f} ({auc_low:.2f} to {auc_high:.2f}).")
+                dataset_tab.dataframe(importance.importance_frame(dataset), hide_index=True,
+                                      use_container_width=True)
+
+
+def facts_section(ui):
+    ui.markdown("## Key Facts About Heart Disease")
+
+    # Statistics section
+    ui.markdown("### Global Statistics")
+    col1, col2, col3 = ui.columns(3)
+
+    with col1:
+        ui.markdown("#### 17.9 Million")
+        ui.markdown("Annual deaths worldwide from cardiovascular disease")
+
+    with col2:
+        ui.markdown("#### #1 Cause")
+        ui.markdown("Leading cause of death globally")
+
+    with col3:
+        ui.markdown("#### 80%")
+        ui.markdown("Of premature heart disease is preventable")
+
+    # Risk factors visualization
+    ui.markdown("### Major Risk Factors")
+
+    ui.image(warmup.get("major_risk_factors_chart"))
+
+    # Add the detailed explanation below the visualization
+    ui.markdown("## Key Risk Factors and Their Impact")
+
+    # Create two columns
+    col1, col2 = ui.columns(2)
+
+    # Content for the first column (Factors 1-3)
+    with col1:
+        ui.markdown("""
+        ### 1. Smoking 
+        Smoking is one of the most dangerous lifestyle habits, significantly increasing the risk of heart disease. It damages blood vessels, raises blood pressure, and contributes to plaque buildup in arteries, leading to conditions like heart attacks and strokes.
+
+        ### 2. High Blood Pressure 
+        Often referred to as the "silent killer," high blood pressure (hypertension) forces the heart to work harder, leading to artery damage and a greater risk of heart disease. Managing blood pressure through lifestyle changes and medication can drastically lower risk.
+
+        ### 3. Diabetes
+        Diabetes, especially when uncontrolled, damages blood vessels and nerves that control the heart. High blood sugar levels contribute to inflammation and atherosclerosis (artery narrowing), increasing the likelihood of heart complications.
+        """)
+
+    # Content for the second column (Factors 4-6)
+    with col2:
+        ui.markdown("""
+        ### 4. Obesity 
+        Excess weight puts additional strain on the heart, raises cholesterol levels, and increases the likelihood of hypertension and diabetes. A healthy diet and regular exercise can significantly lower the risks associated with obesity.
+
+        ### 5. Physical Inactivity 
+        A sedentary lifestyle weakens the cardiovascular system, leading to poor circulation, higher cholesterol levels, and weight gain. Regular exercise strengthens the heart, improves circulation, and helps maintain overall heart health.
+
+        ### 6. Poor Diet
+        Diets high in processed foods, sugar, and unhealthy fats contribute to obesity, high cholesterol, and inflammation—all of which are major contributors to heart disease. Opting for whole foods, lean proteins, and heart-healthy fats can significantly reduce risk.
+        """)
+
+    # Heart disease types
+    ui.markdown("### Types of Heart Disease")
+
+    ui.image(warmup.get("heart_disease_types_chart"))
+
+    # Symptoms and warning signs
+    ui.markdown("### Warning Signs")
+
+    col1, col2 = ui.columns(2)
+
+    with col1:
+        ui.markdown("#### Common Warning Signs")
+        ui.markdown("""
+        - Chest pain or discomfort
+        - Shortness of breath
+        - Pain or discomfort in arms, back, neck, jaw or stomach
+        - Breaking out in a cold sweat
+        - Nausea or lightheadedness
+        """)
+
+        ui.warning("**Know the signs of a heart attack and seek immediate medical attention if you experience these symptoms.**")
+
+    with col2:
+        ui.markdown("#### Signs in Women vs. Men")
+        ui.markdown("""
+        **Women may experience:**
+        - Back or jaw pain
+        - Nausea and vomiting
+        - Shortness of breath without chest pain
+        - Unusual fatigue
+        
+        **Men more commonly report:**
+        - Crushing chest pain
+        - Pain radiating to left arm
+        - Breaking out in cold sweat
+        """)
+
+
+# (chart spec, assessment count, factor table) and the monotonic time it was built
+_trends_view = (None, -float("inf"))
+_trends_view_lock = threading.Lock()
+
+
+def trends_view():
+    """The risk trends as last built, rebuilt once TRENDS_REFRESH_SECONDS old. Treat it as read-only."""
+    global _trends_view
+    view, built = _trends_view
+    if time.monotonic() - built >= TRENDS_REFRESH_SECONDS:
+        with _trends_view_lock:
+            view, built = _trends_view
+            if time.monotonic() - built >= TRENDS_REFRESH_SECONDS:
+                # Read from the running aggregates; the cost does not grow with the number of assessments
+                snapshot = warmup.get("trend_aggregator").snapshot()
+                view = (charts.risk_by_age_spec(snapshot), snapshot.total.count,
+                        snapshot.factor_summary().sort_values("Mean Risk", ascending=False))
+                _trends_view = (view, time.monotonic())
+    return view
+
+
+def trends_section(ui):
+    # Always rendered live: it reads the running aggregates, which change with every assessment
+    ui.markdown("## Risk Trends & Analysis")
+
+    # Age vs. Risk chart
+    ui.markdown("### Heart Disease Risk by Age")
+
+    spec, count, factor_table = trends_view()
+    ui.plotly_chart(spec, use_container_width=True)
+    ui.caption(
+        f"Mean risk per age band with the 25th-75th percentile range shaded, across "
+        f"{count:,} scored assessments (bundled cohort plus assessments made in this app)."
+    )
+
+    with ui.expander("Average Risk by Risk Factor"):
+        ui.dataframe(factor_table, hide_index=True, use_container_width=True)
+
+    # Add Key Observations and Analysis below the chart
+    ui.markdown("""
+        ## Key Observations
+        📌 **Heart disease risk increases with age** – Both men and women see a steady rise in heart disease risk as they grow older.
+
+        📌 **Men have a higher risk than women at every age** – The gap is evident, with men's risk being consistently higher than women's. This aligns with medical research, which suggests that estrogen provides some cardiovascular protection for women before menopause, but the risk catches up after menopause.
+
+        📌 **Exponential growth in risk after 50** – The risk increases gradually at younger ages but accelerates significantly after 50, especially for men. This suggests that age-related factors like high blood pressure, cholesterol buildup, and lifestyle habits play a major role.
+        """)
+
+    # Create two columns for the remaining information
+    col1, col2 = ui.columns(2)
+
+    with col1:
+        ui.markdown("""
+            ## Why is Male Risk Higher?
+            * **Hormonal differences** – Testosterone is linked to higher cholesterol and blood pressure levels.
+
+            * **Lifestyle factors** – Historically, men have higher smoking rates and more exposure to certain risk factors.
+
+            * **Genetic predisposition** – Some heart disease-related genes have been found to affect men more.
+            """)
+
+    with col2:
+        ui.markdown("""
+            ## What This Means for Prevention
+            Regardless of sex, heart disease prevention should start early:
+
+            ✔️ **Regular check-ups** – Monitor cholesterol, blood pressure, and blood sugar.
+
+            ✔️ **Healthy diet** – Prioritize whole foods, fiber, and healthy fats.
+
+            ✔️ **Exercise regularly** – At least 150 minutes of moderate activity weekly.
+
+            ✔️ **Manage stress & sleep** – Chronic stress and poor sleep are underestimated risk factors.
+
+            ✔️ **Quit smoking & limit alcohol** – Both significantly impact heart health.
+            """)
+
+
+# Page name -> (title, render function, iframe height in pixels)
+PAGES = {
+    "about": ("About the Model", about_page, 2400),
+    "facts": ("Heart Disease Facts", facts_section, 2200),
+}
+
+
+def show(name):
+    """Embed the pre-rendered page when LIFELINE_STATIC_PAGES_URL is set, otherwise render it live."""
+    _, render, height = PAGES[name]
+    if STATIC_PAGES_URL:
+        components.iframe(f"{STATIC_PAGES_URL}/{name}.html", height=height, scrolling=True)
+    else:
+        render(st)
+
+
+def show_insights():
+    """The Heart Health Insights tab: static facts, plus risk trends that are always rendered live."""
+    st.markdown("### Heart Health Insights")
+
+    # Create subtabs for different insights
+    insight_tabs = st.tabs(["Heart Disease Facts", "Risk Trends & Analysis"])
+
+    with insight_tabs[0]:
+        show("facts")
+
+    with insight_tabs[1]:
+        trends_section(st)
+
+
+def build(output_dir=STATIC_PAGES_DIR):
+    """Write every page, its images and plotly.js to output_dir; returns the written paths."""
+    written = []
+
+    def write(name, data):
+        path = os.path.join(output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        written.append(path)
+
+    for name, (title, render, _) in PAGES.items():
+        page = HtmlPage()
+        render(page)
+        write(f"{name}.html", page_html(title, page).encode())
+        for asset, data in page.assets.items():
+            write(asset, data)
+    write("plotly.min.js", plotly.offline.get_plotlyjs().encode())
+    return written
+
+
+if __name__ == "__main__":
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else STATIC_PAGES_DIR
+    warmup.start()
+    paths = build(output_dir)
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} files ({size / 2**20:.1f} MB) to {output_dir}; publish it on a static file "
+          f"server and set LIFELINE_STATIC_PAGES_URL to its URL")
+    # The pages leave these sections out; rebuild where the resources are available to include them
+    missing = sorted(name for name in warmup.OPTIONAL_TASKS if warmup.get_optional(name) is None)
+    if missing:
+        print(f"Built without {', '.join(missing)}, which could not be loaded here")
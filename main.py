@@ -1,203 +1,30 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
+from attribution import patient_attribution
+import audit
+import catalog
+import charts
+import cohorts
+import info_pages
+import reports
+from risk_model import INPUT_NAMES, calculate_qrisk3, recommendation_mask, recommendation_table
+import sessions
+from sweep import SWEEP_LABELS, sweep
+from uncertainty import risk_band
+import warmup
+
+# Start loading shared resources in the background (no-op once they are loading)
+warmup.start()
+
 # Set up the favicon and page title
 st.set_page_config(
     page_title="Heart Disease Risk Assessment",  # Title of the tab
     page_icon="C:/Users/johnr/Thesis System/Heart Disease Risk System/icon.jpg",  # Path to your favicon file
 )
 
-# Load the dataset (adjust path as needed)
-heart_disease_data = pd.read_csv("heart_disease_health_indicators_BRFSS2015.csv")
-
-
-# Function to calculate QRISK3-based heart disease risk
-def calculate_qrisk3(age, sex, smoking, diabetes, blood_pressure, cholesterol, bmi, atrial_fibrillation,
-                     rheumatoid_arthritis, physical_activity, diet_quality, alcohol_consumption, family_history,
-                     mental_health, sleep_duration, chronic_kidney_disease, migraine_history):
-    base_risk = age * 0.15
-    risk_factors = {
-        "Sex (Male)": 1.2 if sex == "Male" else 1.0,
-        "Smoking": 1.3 if smoking else 1.0,
-        "Diabetes": 1.4 if diabetes else 1.0,
-        # Modified only these three lines to handle empty values
-        "High Blood Pressure": 1.2 if blood_pressure is not None and blood_pressure > 140 else 1.0,
-        "High Cholesterol": 1.2 if cholesterol is not None and cholesterol > 5.0 else 1.0,
-        "High BMI": 1.2 if bmi is not None and bmi > 30 else 1.0,
-        # Rest remains unchanged as it already handles unspecified values correctly
-        "Atrial Fibrillation": 1.3 if atrial_fibrillation else 1.0,
-        "Rheumatoid Arthritis": 1.1 if rheumatoid_arthritis else 1.0,
-        "Sedentary Lifestyle": 1.3 if physical_activity == "Sedentary" else (
-            1.1 if physical_activity == "Moderate" else 1.0),
-        "Unhealthy Diet": 1.3 if diet_quality == "Unhealthy" else (1.1 if diet_quality == "Balanced" else 1.0),
-        "Frequent Alcohol Consumption": 1.2 if alcohol_consumption == "Frequent" else 1.0,
-        "Family History": 1.4 if family_history else 1.0,
-        "Mental Health Issues": 1.2 if mental_health else 1.0,
-        "Short Sleep Duration": 1.3 if sleep_duration == "Less than 6 hours" else 1.0,
-        "Chronic Kidney Disease": 1.3 if chronic_kidney_disease else 1.0,
-        "Migraine History": 1.1 if migraine_history else 1.0
-    }
-
-    for factor, multiplier in risk_factors.items():
-        base_risk *= multiplier
-
-    risk_percentage = min(base_risk, 100)
-    return round(risk_percentage, 2), risk_factors
-# Function to generate personalized recommendations
-def get_recommendations(risk_factors):
-    recommendations = {}
-
-    # Generate recommendations based on risk factors
-    if risk_factors["Smoking"] > 1.0:
-        recommendations["Smoking"] = {
-            "title": "🚬 Quit Smoking",
-            "tips": [
-                "Set a specific quit date within the next 2 weeks",
-                "Speak to your doctor about nicotine replacement therapies",
-                "Join a support group or seek counseling",
-                "Download a quit-smoking app to track progress",
-                "Avoid triggers and replace smoking with healthier habits"
-            ],
-            "impact": "Quitting smoking can reduce your risk by up to 30% within 1 year"
-        }
-
-    if risk_factors["High Blood Pressure"] > 1.0:
-        recommendations["Blood Pressure"] = {
-            "title": "📈  Blood Pressure",
-            "tips": [
-                "Reduce sodium intake to less than 2,300mg per day",
-                "Exercise regularly - aim for 150 minutes per week",
-                "Practice stress reduction techniques like meditation",
-                "Monitor your blood pressure at home regularly",
-                "Take prescribed medications as directed"
-            ],
-            "impact": "Reducing blood pressure to normal levels can decrease risk by up to 25%"
-        }
-
-    if risk_factors["High Cholesterol"] > 1.0:
-        recommendations["Cholesterol"] = {
-            "title": "🩸 Improve Cholesterol Levels",
-            "tips": [
-                "Increase soluble fiber intake (oats, beans, fruits)",
-                "Limit saturated fat and eliminate trans fat",
-                "Include omega-3 rich foods like fish twice weekly",
-                "Consider plant stanols/sterols in your diet",
-                "Maintain a consistent exercise regimen"
-            ],
-            "impact": "Optimal cholesterol management can reduce risk by 20-35%"
-        }
-
-    if risk_factors["High BMI"] > 1.0:
-        recommendations["Weight"] = {
-            "title": "⚖️ Achieve Healthy Weight",
-            "tips": [
-                "Aim for gradual weight loss of 1-2 pounds per week",
-                "Focus on portion control rather than strict dieting",
-                "Include strength training to maintain muscle mass",
-                "Track food intake with a journal or app",
-                "Set realistic goals based on BMI targets"
-            ],
-            "impact": "A 5-10% weight reduction can lower heart disease risk by up to 20%"
-        }
-
-    if risk_factors["Sedentary Lifestyle"] > 1.0:
-        recommendations["Exercise"] = {
-            "title": "🏃‍♂️ Increase Physical Activity",
-            "tips": [
-                "Start with 10-minute walks and gradually increase duration",
-                "Aim for 150 minutes of moderate or 75 minutes of vigorous activity weekly",
-                "Include strength training 2-3 times per week",
-                "Find activities you enjoy to maintain consistency",
-                "Break up sitting time with short movement breaks"
-            ],
-            "impact": "Regular exercise can reduce heart disease risk by 30-40%"
-        }
-
-    if risk_factors["Unhealthy Diet"] > 1.0:
-        recommendations["Diet"] = {
-            "title": "🥕 Improve Diet Quality",
-            "tips": [
-                "Follow a Mediterranean or DASH eating pattern",
-                "Increase fruits and vegetables to 5+ servings daily",
-                "Choose whole grains over refined carbohydrates",
-                "Limit processed foods and added sugars",
-                "Prepare more meals at home"
-            ],
-            "impact": "A heart-healthy diet can lower risk by 25-30%"
-        }
-
-    if risk_factors["Frequent Alcohol Consumption"] > 1.0:
-        recommendations["Alcohol"] = {
-            "title": "🍺 Moderate Alcohol Consumption",
-            "tips": [
-                "Limit to 1 drink daily for women, 2 for men",
-                "Have alcohol-free days each week",
-                "Choose beverages with lower alcohol content",
-                "Drink water between alcoholic beverages",
-                "Avoid binge drinking completely"
-            ],
-            "impact": "Proper alcohol moderation can reduce cardiovascular risk by 15-20%"
-        }
-
-    if risk_factors["Short Sleep Duration"] > 1.0:
-        recommendations["Sleep"] = {
-            "title": "💤 Improve Sleep Quality",
-            "tips": [
-                "Maintain consistent sleep and wake times",
-                "Create a relaxing bedtime routine",
-                "Keep bedroom cool, dark, and quiet",
-                "Limit screen time 1-2 hours before bed",
-                "Aim for 7-9 hours of quality sleep each night"
-            ],
-            "impact": "Proper sleep can reduce heart disease risk by 10-15%"
-        }
-
-    # Return at least 3 recommendations if possible
-    if len(recommendations) < 3:
-        # Add general recommendations to ensure at least 3
-        if "Diet" not in recommendations:
-            recommendations["Diet"] = {
-                "title": "🥦 Heart-Healthy Diet",
-                "tips": [
-                    "Increase consumption of fruits, vegetables, and whole grains",
-                    "Choose lean proteins and limit red meat",
-                    "Include fish rich in omega-3 fatty acids twice weekly",
-                    "Minimize sodium, sugar, and processed foods",
-                    "Consider the DASH or Mediterranean eating pattern"
-                ],
-                "impact": "A heart-healthy diet can improve overall cardiovascular health"
-            }
-
-        if "Exercise" not in recommendations:
-            recommendations["Exercise"] = {
-                "title": "🏃‍♂️ Regular Physical Activity",
-                "tips": [
-                    "Aim for at least 150 minutes of moderate activity weekly",
-                    "Include both aerobic exercise and strength training",
-                    "Find physical activities you enjoy to maintain consistency",
-                    "Start slowly and gradually increase intensity",
-                    "Break up sitting time with short movement breaks"
-                ],
-                "impact": "Regular exercise improves heart function and overall health"
-            }
-
-        if "Preventive Care" not in recommendations:
-            recommendations["Preventive Care"] = {
-                "title": "👨‍⚕️ Regular Medical Check-ups",
-                "tips": [
-                    "Schedule annual physical examinations",
-                    "Monitor blood pressure, cholesterol, and blood sugar regularly",
-                    "Discuss appropriate screening tests with your doctor",
-                    "Follow through with recommended vaccinations",
-                    "Maintain open communication with your healthcare provider"
-                ],
-                "impact": "Regular preventive care enables early intervention"
-            }
-
-    return recommendations
 
 # Streamlit UI
 st.title("❤️ LIFELINE")
@@ -211,6 +38,10 @@ st.sidebar.image(
     caption="**Assess. Act. Achieve a healthier future.**"  # Optional caption
 )
 
+# Language of the recommendations; the session keeps only the locale code
+locale = st.sidebar.selectbox(catalog.text("language.label"), list(catalog.LOCALES),
+                              format_func=catalog.LOCALES.get, key="locale")
+
 # Mission Statement
 st.sidebar.markdown("""
     <h3 style="color:#ff4b4b; text-align:center;">Our Mission</h3>
@@ -259,6 +90,7 @@ tabs = st.tabs(
         "Prevention & Recommendations",
         "About the Model",
         "Heart Health Insights",
+        "Cohort Explorer",
     ]
 )
 
@@ -392,34 +224,40 @@ with tabs[0]:
     )
 
     if calculate_button:
-        risk, risk_factors = calculate_qrisk3(age, sex, smoking, diabetes, blood_pressure, cholesterol, bmi,
-                                              atrial_fibrillation, rheumatoid_arthritis, physical_activity,
-                                              diet_quality,
-                                              alcohol_consumption, family_history, mental_health,
-                                              sleep_duration, chronic_kidney_disease, migraine_history)
+        inputs = [age, sex, smoking, diabetes, blood_pressure, cholesterol, bmi,
+                  atrial_fibrillation, rheumatoid_arthritis, physical_activity,
+                  diet_quality,
+                  alcohol_consumption, family_history, mental_health,
+                  sleep_duration, chronic_kidney_disease, migraine_history]
+        risk, risk_factors = calculate_qrisk3(*inputs)
         st.markdown(f"## Your estimated 10-year risk: **{risk}%**")
 
-        # Save the results to session state for use in other tabs
-        st.session_state.risk = risk
-        st.session_state.risk_factors = risk_factors
-        st.session_state.has_results = True
-
-        # Gauge Chart
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=risk,
-            title={"text": "Heart Disease Risk"},
-            gauge={"axis": {"range": [0, 100]},
-                   "bar": {"color": "pink"},
-                   "steps": [
-                       {"range": [0, 20], "color": "green"},
-                       {"range": [20, 40], "color": "yellow"},
-                       {"range": [40, 60], "color": "orange"},
-                       {"range": [60, 80], "color": "red"},
-                       {"range": [80, 100], "color": "blue"}
-                   ]}
-        ))
-        st.plotly_chart(fig)
+        # Left-empty measurements count as normal above; estimate them from people of the same age and sex
+        base_profile = dict(zip(INPUT_NAMES, inputs))
+        if None in (blood_pressure, cholesterol, bmi):
+            imputed = warmup.get("imputation_model").impute(base_profile)
+            missing = ", ".join(SWEEP_LABELS[name] for name in imputed.missing)
+            st.info(f"Not entered: {missing}. Estimating these from people of your age and sex, your expected "
+                    f"risk is **{imputed.expected}%** (90% range {imputed.low}%–{imputed.high}%).")
+
+        # Keep a compact copy of the result for the other tabs; the session itself only holds a token
+        if "result_token" not in st.session_state:
+            st.session_state.result_token = sessions.new_token()
+        sessions.get_store().put(st.session_state.result_token, risk, risk_factors, age)
+
+        # Compliance record of the assessment; queued for the background writer
+        audit.record_assessment(st.session_state.result_token, inputs, risk, risk_factors)
+
+        # Feed the new result into the population trends
+        warmup.get("trend_aggregator").add(age, sex, risk, risk_factors)
+
+        # Gauge Chart, with the range the risk could plausibly take given measurement noise
+        # and model uncertainty. The fixed seed keeps the band stable across reruns.
+        band = risk_band(base_profile, seed=0)
+        st.plotly_chart(charts.gauge_spec(risk, (float(band.low), float(band.high))))
+        st.caption(f"The grey band shows where {band.level:.0%} of estimates fall when allowing for "
+                   "day-to-day variation in blood pressure, cholesterol and BMI readings and uncertainty "
+                   "in how strongly each factor affects risk.")
 
         st.markdown("""
                 ### Understanding Your Risk Score
@@ -437,36 +275,44 @@ with tabs[0]:
 
         # Risk breakdown chart
         st.markdown("### Risk Contribution Breakdown")
-        factor_names = list(risk_factors.keys())
-        factor_values = list(risk_factors.values())
-
-        # Sort factors by their values in descending order
-        sorted_indices = np.argsort(factor_values)[::-1]
-        sorted_names = [factor_names[i] for i in sorted_indices]
-        sorted_values = [factor_values[i] for i in sorted_indices]
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        bars = ax.barh(sorted_names, sorted_values, color='skyblue')
-
-        # Add values at the end of each bar
-        for i, bar in enumerate(bars):
-            ax.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2,
-                    f'{sorted_values[i]:.1f}x',
-                    va='center', fontsize=8)
-
-        ax.set_xlabel("Risk Multiplier")
-        ax.set_title("How Each Factor Contributes to Your Risk Score")
-        plt.tight_layout()
-        st.pyplot(fig)
+        baseline, contributions = patient_attribution(age, risk, risk_factors)
+        if charts.CHART_MODE == "server":
+            st.pyplot(charts.factor_bars_figure(baseline, contributions, risk_factors))
+        else:
+            st.plotly_chart(charts.factor_bars_spec(baseline, contributions, risk_factors), use_container_width=True)
+        st.caption(f"Your {baseline:.1f}% baseline comes from age alone; each factor adds the percentage points "
+                   f"shown (its multiplier in brackets), and together they make up your {risk}% risk.")
+
+        # Sensitivity of the risk to age and blood pressure, holding the other answers fixed
+        st.markdown("### How Your Risk Changes")
+
+        age_sweep = sweep(base_profile, "age")
+        fig = go.Figure(go.Scatter(x=age_sweep.x_values, y=age_sweep.risk, mode="lines", name="Your profile"))
+        fig.add_trace(go.Scatter(x=[age], y=[risk], mode="markers", marker=dict(size=12, color="#ff4b4b"),
+                                 name="You today"))
+        fig.update_layout(title="Your Risk Across Ages", xaxis_title=SWEEP_LABELS["age"],
+                          yaxis_title="10-Year Risk (%)", height=400)
+        st.plotly_chart(fig, use_container_width=True)
+
+        grid = sweep(base_profile, "age", y_name="blood_pressure")
+        fig = go.Figure(go.Heatmap(x=grid.y_values, y=grid.x_values, z=grid.risk, colorscale="Reds",
+                                   colorbar=dict(title="Risk (%)")))
+        fig.add_vline(x=140, line_dash="dash", line_color="black", annotation_text="BP 140")
+        if blood_pressure is not None:
+            fig.add_trace(go.Scatter(x=[blood_pressure], y=[age], mode="markers", showlegend=False,
+                                     marker=dict(size=12, color="#2E86C1", symbol="x")))
+        fig.update_layout(title="Your Risk by Age and Blood Pressure", xaxis_title=SWEEP_LABELS["blood_pressure"],
+                          yaxis_title=SWEEP_LABELS["age"], height=450)
+        st.plotly_chart(fig, use_container_width=True)
 
         # Add risk factors explanation here
         st.markdown("""
                 ### Understanding Your Risk Factors
 
-                The chart above shows how different factors contribute to your overall cardiovascular risk. Each bar represents a risk multiplier, where:
-                - 1.0x = Neutral impact
-                - ->1.0x = Increases risk
-                - The longer the bar, the stronger the impact
+                The Risk Contribution Breakdown chart splits your overall cardiovascular risk into percentage points:
+                - **Age (baseline)** is the risk someone of your age would have with no other risk factors
+                - Each other bar is the percentage points a factor adds on top of that baseline, with its risk multiplier in brackets (1.0x means it adds nothing)
+                - The bars add up exactly to your total risk, so the longer the bar, the more that factor adds
 
                 #### Key Points About Cardiovascular Risk:
 
@@ -500,138 +346,74 @@ with tabs[0]:
                 """)
 
 with tabs[1]:
-    st.markdown("### Prevention & Personalized Recommendations")
-
-    if 'has_results' not in st.session_state or not st.session_state.has_results:
-        st.info("Please complete the Risk Assessment tab first to get personalized recommendations.")
+    ui_text = catalog.get_catalog(locale).get
+    st.markdown(ui_text("prevention.heading"))
+
+    result = sessions.get_store().get(st.session_state.get("result_token"))
+    if result is None and "result_token" in st.session_state:
+        st.info(ui_text("prevention.expired"))
+    elif result is None:
+        st.info(ui_text("prevention.missing"))
     else:
-        risk = st.session_state.risk
-        risk_factors = st.session_state.risk_factors
+        risk, risk_factors = result
+        _, contributions = result.attribution()
 
         # Risk category
-        if risk < 20:
-            risk_category = "Very Low"
-            category_color = "green"
-            category_description = "Your cardiovascular health appears to be in excellent condition. Your current lifestyle and health factors indicate a very low risk of developing cardiovascular disease in the next 10 years."
-        elif risk < 40:
-            risk_category = "Low-Moderate"
-            category_color = "yellow"
-            category_description = "While your risk is still relatively low, there may be some areas for improvement. Consider making minor lifestyle adjustments to further reduce your risk of cardiovascular disease."
-        elif risk < 60:
-            risk_category = "Moderate"
-            category_color = "orange"
-            category_description = "You have a moderate risk of developing cardiovascular disease. It's recommended to review your lifestyle habits and consult with a healthcare provider about potential preventive measures."
-        elif risk < 80:
-            risk_category = "High"
-            category_color = "red"
-            category_description = "Your risk factors indicate a high likelihood of cardiovascular disease. It's strongly advised to consult with a healthcare provider and make significant lifestyle changes to reduce your risk."
-        else:
-            risk_category = "Very High"
-            category_color = "blue"
-            category_description = "You are in the highest risk category for cardiovascular disease. Immediate consultation with a healthcare provider is essential. A comprehensive health management plan should be developed to address your risk factors."
+        risk_category, category_color, category_description = reports.risk_category(risk, locale)
+        top_factors = reports.top_risk_factors(risk_factors)
 
         # Display risk category (note this should NOT be inside the else block)
+        category_value = ui_text("prevention.risk_category_value").format(category=risk_category, risk=risk)
         st.markdown(
-            f"### Your Risk Category: <span style='color:{category_color};font-weight:bold'>{risk_category} Risk ({risk}%)</span>",
+            f"### {ui_text('prevention.risk_category')}: "
+            f"<span style='color:{category_color};font-weight:bold'>{category_value}</span>",
             unsafe_allow_html=True)
         st.markdown(category_description)
 
         # Get personalized recommendations
-        recommendations = get_recommendations(risk_factors)
+        mask = recommendation_mask(risk_factors)
+        recommendations = recommendation_table(locale)[mask]
 
         # Display recommendations
-        st.markdown("## Your Personalized Action Plan")
-        st.markdown("Based on your risk factors, here are specific recommendations to improve your heart health:")
+        st.markdown(ui_text("prevention.action_plan"))
+        st.markdown(ui_text("prevention.action_plan_intro"))
 
         # Create tabs for each recommendation
-        rec_tabs = st.tabs(list(recommendations.keys()))
+        rec_tabs = st.tabs([ui_text(f"labels.{key}") for key in recommendations])
 
         for i, (key, rec) in enumerate(recommendations.items()):
             with rec_tabs[i]:
                 st.markdown(f"### {rec['title']}")
-                st.markdown(f"**Potential Impact**: {rec['impact']}")
-                st.markdown("#### 🎯 Action Steps:")
+                st.markdown(f"**{ui_text('prevention.potential_impact')}**: {rec['impact']}")
+                st.markdown(ui_text("prevention.action_steps"))
                 for j, tip in enumerate(rec['tips'], 1):
                     st.markdown(f"{j}. {tip}")
 
         # Overall recommendations
         st.markdown("---")
-        st.markdown("### General Recommendations for Heart Health")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("#### 📋 Regular Monitoring")
-            st.markdown("""
-            - Check blood pressure at least once a year
-            - Have cholesterol tested every 4-6 years
-            - Regular diabetes screening
-            - Annual physical examination
-            """)
-
-            st.markdown("#### 🧠 Mental Well-being")
-            st.markdown("""
-            - Practice stress management techniques
-            - Seek support for mental health concerns
-            - Maintain social connections
-            - Get adequate sleep
-            """)
-
-        with col2:
-            st.markdown("#### 🥗 Heart-Healthy Lifestyle")
-            st.markdown("""
-            - Balanced diet rich in fruits, vegetables, and whole grains
-            - Regular physical activity (150+ minutes per week)
-            - Maintain healthy weight
-            - Avoid tobacco and excessive alcohol
-            """)
-
-            st.markdown("#### ⚕️ Medical Considerations")
-            st.markdown("""
-            - Take medications as prescribed
-            - Discuss aspirin therapy with your doctor if appropriate
-            - Know your family history
-            - Understand symptoms of heart disease and when to seek help
-            """)
+        st.markdown(ui_text("prevention.general.heading"))
+
+        # Two columns of two sections, each a heading and a bullet list
+        for column, sections in zip(st.columns(2), [("monitoring", "wellbeing"), ("lifestyle", "medical")]):
+            with column:
+                for section in sections:
+                    st.markdown(ui_text(f"prevention.general.{section}.title"))
+                    st.markdown("\n".join(f"- {item}" for item in ui_text(f"prevention.general.{section}.items")))
 
         # Doctor discussion guide
         st.markdown("---")
-        st.markdown("### 🏥 Discussion Guide for Your Next Doctor Visit")
-        st.markdown("""
-        Print this section or take notes to help guide your conversation with your healthcare provider:
-        
-        1. My calculated 10-year cardiovascular risk is **{}%** ({}risk)
-        2. My most significant risk factors are:
-            {}
-        3. Questions to ask my doctor:
-            - Would I benefit from medication to lower my risk?
-            - How often should I have my blood pressure/cholesterol checked?
-            - What lifestyle changes would be most beneficial for my specific situation?
-            - Are there any specialized tests I should consider?
-            - How does my family history affect my risk?
-        """.format(
-            risk,
-            risk_category.lower() + " ",
-            "\n            ".join([f"- {factor}" for factor, value in sorted(risk_factors.items(), key=lambda x: x[1], reverse=True)[:3] if value > 1.0])
-        ))
+        st.markdown(ui_text("discussion_guide.heading"))
+        st.markdown(reports.discussion_guide(risk, risk_category, reports.top_factor_labels(top_factors, contributions, locale),
+                                             locale))
 
         # Download options
         st.markdown("---")
 
         # Create a downloadable PDF (simulated with markdown)
-        recommendations_text = "\n".join([f"- {rec['title']}: {rec['impact']}" for rec in recommendations.values()])
-        report_md = f"""
-        # Heart Health Report
-        
-        ## Risk Assessment
-        - 10-Year Risk: {risk}% ({risk_category})
-        - Top Risk Factors: {', '.join([factor for factor, value in sorted(risk_factors.items(), key=lambda x: x[1], reverse=True)[:3] if value > 1.0])}
-        
-        ## Recommendations
-        {recommendations_text}
-        
-        Generated on {pd.Timestamp.now().strftime('%Y-%m-%d')}
-        """
+        # The report template is English, so it always lists the English category, factors and recommendations
+        report_md = reports.heart_health_report(risk, reports.risk_category(risk)[0],
+                                                reports.top_factor_labels(top_factors, contributions),
+                                                recommendation_table()[mask], pd.Timestamp.now().strftime('%Y-%m-%d'))
 
         st.download_button(
             label="Download Your Heart Health Report",
@@ -641,462 +423,88 @@ with tabs[1]:
         )
 
 with tabs[2]:
-    st.markdown("### About the Model")
-
-    # Introduction to the model
-    st.markdown("""
-    This application utilizes the QRISK3 risk prediction model, a clinically validated tool designed to estimate an individual’s 10-year risk of cardiovascular disease. Built using the Cox proportional hazards regression algorithm, QRISK3 was developed by researchers at the University of Nottingham and has been externally validated across multiple populations, ensuring its accuracy and reliability in assessing heart disease risk.
-    """)
-
-    # Add tabs within this tab for organized information
-    model_tabs = st.tabs(["How It Works", "References"])
-
-    with model_tabs[0]:
-        st.markdown("""
-         ## The QRISK3 Model
-         The QRISK3 model uses the Cox proportional hazards regression algorithm to estimate your 10-year risk of developing cardiovascular disease, considering various health and lifestyle factors
-
-         ### 📊 Development & Validation
-         * 📑 Built using data from over 10.5 million patients in the UK
-         * 🏥 Includes 693,000 recorded cardiovascular events
-         * ✅ Clinically validated across diverse populations
-
-         ### How Your Risk is Calculated
-         **1️⃣ Collecting Personal Health Data**  
-         Includes key risk factors such as age, blood pressure, cholesterol levels, and medical history.
-
-         **2️⃣ Applying Statistical Weights**  
-         Uses population-based risk models to assess the impact of each factor.
-
-         **3️⃣ Calculating Your Risk**  
-         Provides a percentage estimate of your likelihood of experiencing a cardiovascular event within 10 years.
-         """)
-
-        # Add the visualization here, inside the "How It Works" tab
-        def create_risk_factors_tree():
-            fig = go.Figure()
-
-            # Define the center point and radius
-            center_x, center_y = 0.5, 0.5
-            radius = 0.35
-
-            # Define main categories and their factors
-            categories = {
-                'Demographic\nFactors': ['Age', 'Sex'],
-                'Clinical\nMeasurements': ['Blood Pressure', 'Cholesterol Ratio', 'BMI'],
-                'Pre-existing\nConditions': ['Diabetes', 'Atrial Fibrillation', 'Kidney Disease'],
-                'Other Medical\nConditions': ['Rheumatoid Arthritis', 'Mental Illness', 'Migraine'],
-                'Lifestyle &\nHistory': ['Smoking', 'Family History', 'Medications']
-            }
-
-            # Calculate positions for main categories
-            import math
-            n_categories = len(categories)
-            angles = [2 * math.pi * i / n_categories - math.pi / 2 for i in range(n_categories)]
-
-            # Add central node
-            fig.add_trace(go.Scatter(
-                x=[center_x],
-                y=[center_y],
-                mode='markers+text',
-                text=['QRISK3\nFactors'],
-                textposition='middle center',
-                textfont=dict(color='#000000'),
-                marker=dict(size=60, color='#2E86C1'),  # Original size
-                name='Central'
-            ))
-
-            # Add categories and their factors
-            colors = ['#3498DB', '#E74C3C', '#2ECC71', '#F1C40F', '#9B59B6']
-
-            for i, (category, factors) in enumerate(categories.items()):
-                # Calculate category position
-                cat_x = center_x + radius * math.cos(angles[i])
-                cat_y = center_y + radius * math.sin(angles[i])
-
-                # Add category node
-                fig.add_trace(go.Scatter(
-                    x=[cat_x],
-                    y=[cat_y],
-                    mode='markers+text',
-                    text=[category],
-                    textposition='middle center',
-                    textfont=dict(color='#000000'),
-                    marker=dict(size=45, color=colors[i]),  # Original size
-                    name=category
-                ))
-
-                # Add line from center to category
-                fig.add_trace(go.Scatter(
-                    x=[center_x, cat_x],
-                    y=[center_y, cat_y],
-                    mode='lines',
-                    line=dict(color=colors[i], width=2),
-                    showlegend=False
-                ))
-
-            # Update layout
-            fig.update_layout(
-                showlegend=False,
-                xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[0, 1]),
-                yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[0, 1]),
-                plot_bgcolor='white',
-                title=dict(
-                    text='QRISK3 Risk Factor Categories',
-                    x=0.5,
-                    y=0.95,
-                    xanchor='center',
-                    yanchor='top',
-                    font=dict(size=24, color='#000000')  # Original size
-                ),
-                height=450,  # Only changed the overall height
-                margin=dict(l=20, r=20, t=80, b=20)
-            )
-
-            return fig
-
-    # Display the content with the visualization
-    st.markdown("#### Factors Considered in QRISK3")
-    st.plotly_chart(create_risk_factors_tree(), use_container_width=True)
-
-    # Create two columns for factors
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("""
-            **Demographic Factors:**
-            - Age
-            - Sex
-
-            **Clinical Measurements:**
-            - Systolic blood pressure
-            - Total cholesterol to HDL ratio
-            - Body Mass Index (BMI)
-
-            **Pre-existing Conditions:**
-            - Diabetes
-            - Atrial fibrillation
-            - Chronic kidney disease
-            """)
-
-    with col2:
-        st.markdown("""
-            **Other Medical Conditions:**
-            - Rheumatoid arthritis
-            - Severe mental illness
-            - Migraine 
-
-            **Medications:**
-            - Corticosteroid use
-
-            **Family History:**
-            - Angina or heart attack in a 1st degree relative < 60
+    info_pages.show("about")
 
-            **Lifestyle:**
-            - Smoking status
-            """)
+with tabs[3]:
+    info_pages.show_insights()
 
-    st.markdown("#### ⚠️ Limitations of the Model")
-    st.markdown("""
-                While QRISK3 is a powerful predictive tool, it's important to understand its limitations:
 
-                - **Age Range**: Validated for adults aged 25-84
-                - **Prediction Window**: Focuses on 10-year risk, not lifetime risk
-                - **Limited Lifestyle Factors**: Does not include detailed information about diet, exercise, or stress levels
-                - **Individual Variations**: Cannot account for all unique genetic and environmental factors
-                - **Not a Diagnostic Tool**: Predicts risk but does not diagnose current heart disease
+# Tab 5: Cohort Explorer
+@st.fragment
+def cohort_explorer():
+    # Filter changes rerun only this fragment, and every query reads the prebuilt
+    # cube and bitmap indexes instead of filtering the raw cohorts
+    index = warmup.get("cohort_index")
 
-                Always consult with healthcare professionals for personalized medical advice and interpretation of your results.
-                """)
+    st.markdown("## Cohort Explorer")
+    st.markdown("Explore the research cohorts bundled with Lifeline. Scores are this tool's 10-year risk "
+                "estimate computed from the information each cohort records; outcomes are the cohort's own labels.")
 
-with model_tabs[1]:
-    st.markdown("#### References and Further Reading")
-
-    # Original QRISK3 Publication
-    st.markdown("""
-    **Original QRISK3 Publication:**  
-    Hippisley-Cox J, Coupland C, Brindle P. Development and validation of QRISK3 risk prediction algorithms to estimate future risk of cardiovascular disease: prospective cohort study. *BMJ* 2017;357:j2099.
-    """)
-
-    # Additional Resources List
-    st.markdown("""
-    **Additional Resources:**
-    
-    1. [Official QRISK3 Website](https://qrisk.org/three/)  
-    2. [British Cardiovascular Society Guidelines](https://www.britishcardiovascularsociety.org/)  
-    3. [American Heart Association Risk Assessment Guidelines](https://www.heart.org/en/health-topics/consumer-healthcare/what-is-cardiovascular-disease/coronary-artery-disease/coronary-artery-disease-risk-assessment)  
-    4. [European Society of Cardiology Risk Assessment Tools](https://www.escardio.org/Education/Practice-Tools/CVD-prevention-toolbox/SCORE-Risk-Charts)  
-    """)
-
-    # More Related References Section
-    st.markdown("""
-    **Related Research and Guidelines:**
-    
-    - **NICE Cardiovascular Disease Prevention Guidelines**:  
-      Recommendations by the National Institute for Health and Care Excellence (NICE) for assessing and reducing cardiovascular risk.  
-      [Read the Guidelines](https://www.nice.org.uk/guidance/cg181)
-
-    - **World Health Organization (WHO) Global Health Estimates**:  
-      Provides global statistics and insights on cardiovascular disease prevalence and mortality rates.  
-      [WHO Website](https://www.who.int/news-room/fact-sheets/detail/cardiovascular-diseases-(cvds))
-
-    - **Framingham Heart Study**:  
-      A ground-breaking longitudinal study providing key insights into cardiovascular risk factors.  
-      [Explore the Study](https://www.framinghamheartstudy.org/)
-
-    - **CDC - Heart Disease Facts**:  
-      Statistics and detailed information on cardiovascular disease in the U.S. from the Centers for Disease Control and Prevention.  
-      [Visit CDC Website](https://www.cdc.gov/heartdisease/facts.htm)
-    """)
-
-    # Add a divider for separation before dataset details
-    st.divider()
-
-    # Dataset Reference Section
-    st.subheader("Dataset Reference")
-
-    # Dataset Description
-    st.markdown("""
-    This heart disease risk assessment system is built on data from the **Behavioral Risk Factor 
-    Surveillance System (BRFSS) 2015**, a comprehensive health survey conducted by the CDC. 
-    This nationally representative dataset provides insights into various health indicators 
-    and heart disease status across diverse populations in the United States.
-    """)
-
-    # Dataset Metrics
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2, gap="large")
     with col1:
-        st.metric(
-            label="Sample Size",
-            value=f"{heart_disease_data.shape[0]:,}",
-            help="Number of individual health records analyzed"
-        )
+        selected = st.multiselect("Cohorts", index.names, default=index.names, key="cohort_names")
+        youngest, oldest = index.age_range
+        ages = st.slider("Age range", youngest, oldest, (youngest, oldest), key="cohort_ages")
     with col2:
-        st.metric(
-            label="Features",
-            value=f"{heart_disease_data.shape[1]}",
-            help="Health indicators and demographic factors assessed"
-        )
-    with col3:
-        st.metric(
-            label="Year",
-            value="2015",
-            help="Year the BRFSS survey data was collected"
-        )
-
-    # Expandable Sections for Dataset Details
-    with st.expander("Dataset Features"):
-        features = list(heart_disease_data.columns)
-        num_cols = 3
-        feature_cols = st.columns(num_cols)
-        for i, feature in enumerate(features):
-            formatted_feature = " ".join(word.capitalize() for word in feature.split('_'))
-            feature_cols[i % num_cols].markdown(f"• {formatted_feature}")
-
-    with st.expander("Data Quality Information"):
-        st.markdown("""
-        - **Completeness**: The dataset underwent thorough cleaning to handle missing values
-        - **Validation**: Data quality checks were performed to ensure consistency
-        - **Preprocessing**: Features were normalized and encoded for optimal model performance
-        - **Balancing**: Class imbalance was addressed to ensure equitable predictions
-        """)
-
-        # Visual separator
-        st.markdown("---")
-
-with tabs[3]:
-    st.markdown("### Heart Health Insights")
-
-    # Create subtabs for different insights
-    insight_tabs = st.tabs(["Heart Disease Facts", "Risk Trends & Analysis"])
-
-    with insight_tabs[0]:
-        st.markdown("## Key Facts About Heart Disease")
-
-        # Statistics section
-        st.markdown("### Global Statistics")
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            st.markdown("#### 17.9 Million")
-            st.markdown("Annual deaths worldwide from cardiovascular disease")
-
-        with col2:
-            st.markdown("#### #1 Cause")
-            st.markdown("Leading cause of death globally")
-
-        with col3:
-            st.markdown("#### 80%")
-            st.markdown("Of premature heart disease is preventable")
-
-        # Risk factors visualization
-        st.markdown("### Major Risk Factors")
-
-        risk_data = {
-            'Factor': ['Smoking', 'High Blood Pressure', 'Diabetes', 'Obesity', 'Physical Inactivity', 'Poor Diet'],
-            'Relative Risk': [2.5, 2.0, 1.8, 1.6, 1.5, 1.7]
-
-        }
-
-        df_risk = pd.DataFrame(risk_data)
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-        bars = ax.bar(df_risk['Factor'], df_risk['Relative Risk'], color='#ff9999')
-
-        for i, bar in enumerate(bars):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
-                    f'{df_risk["Relative Risk"][i]}x',
-                    ha='center', fontsize=9)
-
-        ax.set_ylabel('Relative Risk Increase')
-        ax.set_title('Impact of Major Risk Factors on Heart Disease')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        st.pyplot(fig)
-
-        # Add the detailed explanation below the visualization
-        st.markdown("## Key Risk Factors and Their Impact")
-
-        # Create two columns
-        col1, col2 = st.columns(2)
-
-        # Content for the first column (Factors 1-3)
-        with col1:
-            st.markdown("""
-            ### 1. Smoking 
-            Smoking is one of the most dangerous lifestyle habits, significantly increasing the risk of heart disease. It damages blood vessels, raises blood pressure, and contributes to plaque buildup in arteries, leading to conditions like heart attacks and strokes.
-
-            ### 2. High Blood Pressure 
-            Often referred to as the "silent killer," high blood pressure (hypertension) forces the heart to work harder, leading to artery damage and a greater risk of heart disease. Managing blood pressure through lifestyle changes and medication can drastically lower risk.
-
-            ### 3. Diabetes
-            Diabetes, especially when uncontrolled, damages blood vessels and nerves that control the heart. High blood sugar levels contribute to inflammation and atherosclerosis (artery narrowing), increasing the likelihood of heart complications.
-            """)
-
-        # Content for the second column (Factors 4-6)
-        with col2:
-            st.markdown("""
-            ### 4. Obesity 
-            Excess weight puts additional strain on the heart, raises cholesterol levels, and increases the likelihood of hypertension and diabetes. A healthy diet and regular exercise can significantly lower the risks associated with obesity.
-
-            ### 5. Physical Inactivity 
-            A sedentary lifestyle weakens the cardiovascular system, leading to poor circulation, higher cholesterol levels, and weight gain. Regular exercise strengthens the heart, improves circulation, and helps maintain overall heart health.
-
-            ### 6. Poor Diet
-            Diets high in processed foods, sugar, and unhealthy fats contribute to obesity, high cholesterol, and inflammation—all of which are major contributors to heart disease. Opting for whole foods, lean proteins, and heart-healthy fats can significantly reduce risk.
-            """)
-
-        # Heart disease types
-        st.markdown("### Types of Heart Disease")
-
-        types_data = {
-            'Type': ['Coronary Artery Disease', 'Heart Failure', 'Arrhythmias', 'Valve Disease', 'Congenital Heart Disease'],
-            'Prevalence': [42, 23, 15, 12, 8]
-        }
-
-        df_types = pd.DataFrame(types_data)
-
-        fig = plt.figure(figsize=(10, 6))
-        plt.pie(df_types['Prevalence'], labels=df_types['Type'], autopct='%1.1f%%',
-                startangle=90, shadow=True, explode=[0.1, 0, 0, 0, 0],
-                colors=['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0'])
-        plt.axis('equal')
-        plt.title('Distribution of Heart Disease Types')
-        plt.tight_layout()
-        st.pyplot(fig)
-
-        # Symptoms and warning signs
-        st.markdown("### Warning Signs")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("#### Common Warning Signs")
-            st.markdown("""
-            - Chest pain or discomfort
-            - Shortness of breath
-            - Pain or discomfort in arms, back, neck, jaw or stomach
-            - Breaking out in a cold sweat
-            - Nausea or lightheadedness
-            """)
-
-            st.warning("**Know the signs of a heart attack and seek immediate medical attention if you experience these symptoms.**")
-
-        with col2:
-            st.markdown("#### Signs in Women vs. Men")
-            st.markdown("""
-            **Women may experience:**
-            - Back or jaw pain
-            - Nausea and vomiting
-            - Shortness of breath without chest pain
-            - Unusual fatigue
-            
-            **Men more commonly report:**
-            - Crushing chest pain
-            - Pain radiating to left arm
-            - Breaking out in cold sweat
-            """)
-
-    with insight_tabs[1]:
-        st.markdown("## Risk Trends & Analysis")
-
-        # Age vs. Risk chart
-        st.markdown("### Heart Disease Risk by Age")
-
-        age_data = {
-            'Age': [30, 40, 50, 60, 70, 80],
-            'Men': [3, 8, 15, 25, 35, 42],
-            'Women': [1.5, 4, 8, 15, 25, 35]
-        }
-
-        df_age = pd.DataFrame(age_data)
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(df_age['Age'], df_age['Men'], marker='o', linewidth=2, label='Men')
-        ax.plot(df_age['Age'], df_age['Women'], marker='o', linewidth=2, label='Women')
-        ax.set_xlabel('Age')
-        ax.set_ylabel('Risk Percentage (%)')
-        ax.set_title('10-Year Heart Disease Risk by Age and Sex')
-        ax.legend()
-        ax.grid(True, linestyle='--', alpha=0.7)
-        st.pyplot(fig)
-
-        # Add Key Observations and Analysis below the chart
-        st.markdown("""
-            ## Key Observations
-            📌 **Heart disease risk increases with age** – Both men and women see a steady rise in heart disease risk as they grow older.
-
-            📌 **Men have a higher risk than women at every age** – The gap is evident, with men's risk being consistently higher than women's. This aligns with medical research, which suggests that estrogen provides some cardiovascular protection for women before menopause, but the risk catches up after menopause.
-
-            📌 **Exponential growth in risk after 50** – The risk increases gradually at younger ages but accelerates significantly after 50, especially for men. This suggests that age-related factors like high blood pressure, cholesterol buildup, and lifestyle habits play a major role.
-            """)
-
-        # Create two columns for the remaining information
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("""
-                ## Why is Male Risk Higher?
-                * **Hormonal differences** – Testosterone is linked to higher cholesterol and blood pressure levels.
-
-                * **Lifestyle factors** – Historically, men have higher smoking rates and more exposure to certain risk factors.
-
-                * **Genetic predisposition** – Some heart disease-related genes have been found to affect men more.
-                """)
-
-        with col2:
-            st.markdown("""
-                ## What This Means for Prevention
-                Regardless of sex, heart disease prevention should start early:
-
-                ✔️ **Regular check-ups** – Monitor cholesterol, blood pressure, and blood sugar.
-
-                ✔️ **Healthy diet** – Prioritize whole foods, fiber, and healthy fats.
-
-                ✔️ **Exercise regularly** – At least 150 minutes of moderate activity weekly.
-
-                ✔️ **Manage stress & sleep** – Chronic stress and poor sleep are underestimated risk factors.
-
-                ✔️ **Quit smoking & limit alcohol** – Both significantly impact heart health.
-                """)
-
+        sex = st.radio("Sex", ["All", "Male", "Female"], horizontal=True, key="cohort_sex")
+        smoking = st.radio("Smoking", ["All", "Yes", "No"], horizontal=True, key="cohort_smoking")
+        diabetes = st.radio("Diabetes", ["All", "Yes", "No"], horizontal=True, key="cohort_diabetes")
+
+    if not selected:
+        st.info("Select at least one cohort to explore.")
+        return
+
+    # "All" includes records where the cohort does not record the attribute
+    flag = {"All": None, "Yes": cohorts.YES, "No": cohorts.NO}
+    filters = {
+        "cohorts": selected,
+        "ages": ages,
+        "sex": None if sex == "All" else cohorts.SEX_LABELS.index(sex),
+        "smoking": flag[smoking],
+        "diabetes": flag[diabetes],
+    }
+    summary = index.summary(**filters)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Matching Records", f"{summary.count:,}")
+    col2.metric("Mean Risk Score", f"{summary.mean_score:.1f}%" if summary.count else "–")
+    col3.metric("Median Risk Score", f"{summary.score_quantile(0.5):.1f}%" if summary.count else "–")
+    col4.metric("Outcome Rate", f"{summary.outcome_rate:.1%}" if summary.count else "–")
+
+    if not summary.count:
+        st.info("No records match these filters.")
+        return
+
+    bins = np.arange(cohorts.SCORE_BINS) * cohorts.SCORE_BIN_WIDTH
+    distribution = go.Figure()
+    for name, histogram in zip(selected, summary.histogram):
+        distribution.add_trace(go.Bar(x=bins + cohorts.SCORE_BIN_WIDTH / 2, y=histogram, name=name,
+                                      width=cohorts.SCORE_BIN_WIDTH))
+    distribution.update_layout(barmode="stack", title="Risk Score Distribution",
+                               xaxis_title="10-Year Risk Score (%)", yaxis_title="Records")
+    st.plotly_chart(distribution, use_container_width=True)
+
+    by_cohort = pd.DataFrame({
+        "Cohort": selected,
+        "Records": summary.counts,
+        "Mean Risk Score (%)": np.round(summary.score_sum / np.maximum(summary.counts, 1), 1),
+        "Outcome Rate (%)": np.round(100 * summary.outcome_sum / np.maximum(summary.counts, 1), 1),
+        "Outcome": [cohorts.COHORTS[name][2] for name in selected],
+    })
+    st.dataframe(by_cohort, hide_index=True, use_container_width=True)
+
+    with st.expander("What Drives Risk in This Group"):
+        drivers = summary.attribution()
+        drivers = drivers[drivers["Mean Contribution (points)"] > 0]
+        st.caption("Average percentage points each factor adds to the risk score above the age baseline, "
+                   "from the same exact breakdown shown for individual assessments.")
+        st.dataframe(drivers.round(2), hide_index=True, use_container_width=True)
+
+    with st.expander("Matching Records"):
+        rows = index.matching_rows(**filters, limit=200)
+        st.caption(f"Showing the first {len(rows):,} of {summary.count:,} matching records.")
+        st.dataframe(index.records(rows), hide_index=True, use_container_width=True)
+
+
+with tabs[4]:
+    cohort_explorer()
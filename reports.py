@@ -0,0 +1,236 @@
+import argparse
+import os
+import tarfile
+import time
+import zipfile
+from bisect import bisect_right
+from collections import deque
+from io import BytesIO
+from multiprocessing import Pool
+
+import numpy as np
+
+from attribution import attribute
+from catalog import DEFAULT_LOCALE, get_catalog, text
+from risk_model import FACTOR_NAMES, RECOMMENDATION_FACTORS, build_recommendation_table, round_risk
+from scored_cohort import MULTIPLIER_LEVELS, risk_value, score_validated
+
+# Personalized report text shared by the Prevention & Recommendations tab and the
+# bulk generator, so a report looks the same whether it is downloaded one at a
+# time or produced for a whole panel. The category and discussion guide text
+# comes from the catalog; downloads and bulk documents are always in English.
+
+# Category ids in the catalog (risk_categories.<id>.label/description) and their colors
+RISK_CATEGORY_IDS = ["very_low", "low_moderate", "moderate", "high", "very_high"]
+RISK_CATEGORY_COLORS = ["green", "yellow", "orange", "red", "blue"]
+# Upper bounds (exclusive) of every category but the last
+RISK_CATEGORY_BOUNDS = [20, 40, 60, 80]
+
+REPORT_TEMPLATE = """
+        # Heart Health Report
+        
+        ## Risk Assessment
+        - 10-Year Risk: {risk}% ({risk_category})
+        - Top Risk Factors: {top_factors}
+        
+        ## Recommendations
+        {recommendations_text}
+        
+        Generated on {date}
+        """
+
+
+def risk_category(risk, locale=DEFAULT_LOCALE):
+    """Return (category, color, description) for a risk percentage."""
+    index = bisect_right(RISK_CATEGORY_BOUNDS, risk)
+    catalog = get_catalog(locale)
+    key = f"risk_categories.{RISK_CATEGORY_IDS[index]}"
+    return catalog.get(f"{key}.label"), RISK_CATEGORY_COLORS[index], catalog.get(f"{key}.description")
+
+
+def top_risk_factors(risk_factors):
+    # Up to three factors with the largest multipliers, ignoring neutral ones. Attributions
+    # are proportional to log(multiplier), so this is also the order of their contributions.
+    return [factor for factor, value in sorted(risk_factors.items(), key=lambda x: x[1], reverse=True)[:3] if value > 1.0]
+
+
+def factor_label(factor, points, locale=DEFAULT_LOCALE):
+    catalog = get_catalog(locale)
+    return catalog.get("discussion_guide.factor_label").format(factor=catalog.get(f"factors.{factor}"), points=points)
+
+
+def top_factor_labels(top_factors, contributions, locale=DEFAULT_LOCALE):
+    """Top factors annotated with their contribution to the risk (see attribution.attribute)."""
+    return [factor_label(factor, contributions[factor], locale) for factor in top_factors]
+
+
+def discussion_guide(risk, category, top_factors, locale=DEFAULT_LOCALE):
+    return get_catalog(locale).get("discussion_guide.template").format(
+        risk,
+        category.lower(),
+        "\n    ".join([f"- {factor}" for factor in top_factors])
+    )
+
+
+def recommendations_text(recommendations):
+    return "\n".join([f"- {rec['title']}: {rec['impact']}" for rec in recommendations.values()])
+
+
+def heart_health_report(risk, category, top_factors, recommendations, date):
+    return REPORT_TEMPLATE.format(risk=risk, risk_category=category, top_factors=", ".join(top_factors),
+                                  recommendations_text=recommendations_text(recommendations), date=date)
+
+
+def patient_document(report, guide):
+    # One document per patient: the downloadable report followed by the discussion guide
+    return f"{report}\n{text('discussion_guide.heading')}\n{guide}"
+
+
+# Bulk generation. Everything that depends only on the recommendation set (256
+# possibilities) or the top-factor combination is built once per worker process.
+
+_RECOMMENDATION_BITS = [FACTOR_NAMES.index(factor) for factor in RECOMMENDATION_FACTORS]
+_recommendation_fragments = None
+_report_template = None
+_guide_template = None
+_category_labels = None
+_factor_label = None
+_factor_names = None
+
+
+def _init_worker(date):
+    global _recommendation_fragments, _report_template, _guide_template, _category_labels, _factor_label, _factor_names
+    _recommendation_fragments = [recommendations_text(recommendations) for recommendations in build_recommendation_table()]
+    # Bind the constant parts once; per patient only positional fields are filled in
+    _report_template = REPORT_TEMPLATE.format(risk="{0}", risk_category="{1}", top_factors="{2}",
+                                              recommendations_text="{3}", date=date)
+    _guide_template = patient_document("{0}", text("discussion_guide.template").format("{1}", "{2}", "{3}"))
+    # Bulk documents are in English, like the downloadable report
+    _category_labels = [text(f"risk_categories.{category_id}.label") for category_id in RISK_CATEGORY_IDS]
+    _factor_label = text("discussion_guide.factor_label").format
+    _factor_names = [text(f"factors.{factor}") for factor in FACTOR_NAMES]
+
+
+def _top_factor_fragments(labels):
+    return ", ".join(labels), "\n    ".join([f"- {label}" for label in labels])
+
+
+def render_chunk(risk, active, codes, age):
+    """Render the documents for one slice of a ScoredCohort."""
+    multipliers = MULTIPLIER_LEVELS[codes]
+    _, contributions = attribute(age, multipliers, np.minimum(round_risk(risk.astype(np.float64)), 100))
+    # Stable sort keeps dict order among equal multipliers, like sorted() in top_risk_factors
+    order = np.argsort(-multipliers, axis=1, kind="stable")[:, :3]
+    top_active = np.take_along_axis(multipliers, order, axis=1) > 1.0
+    recommendation_masks = np.zeros(len(risk), dtype=np.int64)
+    for bit, factor_index in enumerate(_RECOMMENDATION_BITS):
+        recommendation_masks |= ((active >> factor_index) & 1).astype(np.int64) << bit
+    categories = np.searchsorted(RISK_CATEGORY_BOUNDS, risk, side="right")
+
+    documents = []
+    for i in range(len(risk)):
+        value = risk_value(risk[i])
+        category = _category_labels[categories[i]]
+        top_joined, top_listed = _top_factor_fragments(
+            [_factor_label(factor=_factor_names[j], points=contributions[i, j]) for j in order[i][top_active[i]].tolist()])
+        report = _report_template.format(value, category, top_joined,
+                                         _recommendation_fragments[recommendation_masks[i]])
+        documents.append(_guide_template.format(report, value, category.lower(), top_listed).encode())
+    return documents
+
+
+class _ArchiveWriter:
+    def __init__(self, path):
+        self.path = path
+        if path.endswith(".zip"):
+            self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        elif path.endswith((".tar", ".tar.gz", ".tgz")):
+            self.archive = tarfile.open(path, "w:gz" if path.endswith("gz") else "w")
+        else:
+            # Any other extension: a single multi-document markdown file
+            self.archive = open(path, "wb")
+
+    def write(self, name, data):
+        if isinstance(self.archive, zipfile.ZipFile):
+            self.archive.writestr(name, data)
+        elif isinstance(self.archive, tarfile.TarFile):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, BytesIO(data))
+        else:
+            self.archive.write(data)
+            self.archive.write(b"\n\n---\n\n")
+
+    def close(self):
+        self.archive.close()
+
+
+def write_reports(cohort, path, ids=None, processes=None, chunk_size=5000, date=None):
+    """Write a report document for every patient of a ScoredCohort.
+
+    The output format follows the extension of `path`: .zip, .tar/.tar.gz, or a
+    single multi-document markdown file. Chunks are rendered in a process pool
+    with a bounded number in flight, so memory stays flat for any cohort size.
+    Returns the number of documents written.
+    """
+    date = date or time.strftime("%Y-%m-%d")
+    processes = processes or os.cpu_count() or 1
+    writer = _ArchiveWriter(path)
+
+    def name(index):
+        return f"{ids[index]}.md" if ids is not None else f"patient_{index:07d}.md"
+
+    def write_chunk(start, documents):
+        for offset, document in enumerate(documents):
+            writer.write(name(start + offset), document)
+
+    chunks = ((start, cohort[start:start + chunk_size]) for start in range(0, len(cohort), chunk_size))
+    try:
+        if processes == 1:
+            _init_worker(date)
+            for start, chunk in chunks:
+                write_chunk(start, render_chunk(chunk.risk, chunk.active, chunk.codes, chunk.age))
+        else:
+            with Pool(processes, initializer=_init_worker, initargs=(date,)) as pool:
+                pending = deque()
+                for start, chunk in chunks:
+                    pending.append((start, pool.apply_async(render_chunk,
+                                                                    (chunk.risk, chunk.active, chunk.codes, chunk.age))))
+                    if len(pending) >= processes * 2:
+                        start, result = pending.popleft()
+                        write_chunk(start, result.get())
+                while pending:
+                    start, result = pending.popleft()
+                    write_chunk(start, result.get())
+    finally:
+        writer.close()
+    return len(cohort)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from validation import validate_records
+
+    parser = argparse.ArgumentParser(description="Generate Heart Health Reports for every patient in a CSV.")
+    parser.add_argument("patients", help="CSV with one column per risk input (and an optional id column)")
+    parser.add_argument("output", help="Output .zip, .tar, .tar.gz, or .md (multi-document) file")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    patients = pd.read_csv(args.patients)
+    batch = validate_records(patients)
+    cohort, valid = score_validated(batch)
+    if not valid.all():
+        print(f"Skipping {int((~valid).sum()):,} invalid rows; errors per field: {batch.error_summary()}")
+    # Name files by id, or by the row number in the input so skipped rows leave gaps
+    if "id" in patients.columns:
+        ids = patients["id"].astype(str).to_numpy()[valid]
+    else:
+        ids = [f"patient_{row:07d}" for row in np.flatnonzero(valid)]
+    count = write_reports(cohort, args.output, ids=ids, processes=args.processes, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {count:,} reports to {args.output} in {elapsed:.1f}s ({count / elapsed * 60:,.0f} per minute)")
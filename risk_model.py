@@ -0,0 +1,259 @@
+import numpy as np
+
+from catalog import DEFAULT_LOCALE, get_catalog
+
+# Recorded with every audited assessment; bump whenever calculate_qrisk3 scores differently
+MODEL_VERSION = "lifeline-qrisk3-1"
+
+
+# Function to calculate QRISK3-based heart disease risk
+def calculate_qrisk3(age, sex, smoking, diabetes, blood_pressure, cholesterol, bmi, atrial_fibrillation,
+                     rheumatoid_arthritis, physical_activity, diet_quality, alcohol_consumption, family_history,
+                     mental_health, sleep_duration, chronic_kidney_disease, migraine_history):
+    base_risk = age * 0.15
+    risk_factors = {
+        "Sex (Male)": 1.2 if sex == "Male" else 1.0,
+        "Smoking": 1.3 if smoking else 1.0,
+        "Diabetes": 1.4 if diabetes else 1.0,
+        # Modified only these three lines to handle empty values
+        "High Blood Pressure": 1.2 if blood_pressure is not None and blood_pressure > 140 else 1.0,
+        "High Cholesterol": 1.2 if cholesterol is not None and cholesterol > 5.0 else 1.0,
+        "High BMI": 1.2 if bmi is not None and bmi > 30 else 1.0,
+        # Rest remains unchanged as it already handles unspecified values correctly
+        "Atrial Fibrillation": 1.3 if atrial_fibrillation else 1.0,
+        "Rheumatoid Arthritis": 1.1 if rheumatoid_arthritis else 1.0,
+        "Sedentary Lifestyle": 1.3 if physical_activity == "Sedentary" else (
+            1.1 if physical_activity == "Moderate" else 1.0),
+        "Unhealthy Diet": 1.3 if diet_quality == "Unhealthy" else (1.1 if diet_quality == "Balanced" else 1.0),
+        "Frequent Alcohol Consumption": 1.2 if alcohol_consumption == "Frequent" else 1.0,
+        "Family History": 1.4 if family_history else 1.0,
+        "Mental Health Issues": 1.2 if mental_health else 1.0,
+        "Short Sleep Duration": 1.3 if sleep_duration == "Less than 6 hours" else 1.0,
+        "Chronic Kidney Disease": 1.3 if chronic_kidney_disease else 1.0,
+        "Migraine History": 1.1 if migraine_history else 1.0
+    }
+
+    for factor, multiplier in risk_factors.items():
+        base_risk *= multiplier
+
+    risk_percentage = min(base_risk, 100)
+    return round(risk_percentage, 2), risk_factors
+# Function to generate personalized recommendations; the text comes from the
+# locale's catalog and the returned dicts are shared, so treat them as read-only
+def get_recommendations(risk_factors, locale=DEFAULT_LOCALE):
+    catalog = get_catalog(locale)
+    recommendations = {}
+
+    # Generate recommendations based on risk factors
+    if risk_factors["Smoking"] > 1.0:
+        recommendations["Smoking"] = catalog.recommendation("smoking")
+
+    if risk_factors["High Blood Pressure"] > 1.0:
+        recommendations["Blood Pressure"] = catalog.recommendation("blood_pressure")
+
+    if risk_factors["High Cholesterol"] > 1.0:
+        recommendations["Cholesterol"] = catalog.recommendation("cholesterol")
+
+    if risk_factors["High BMI"] > 1.0:
+        recommendations["Weight"] = catalog.recommendation("weight")
+
+    if risk_factors["Sedentary Lifestyle"] > 1.0:
+        recommendations["Exercise"] = catalog.recommendation("exercise")
+
+    if risk_factors["Unhealthy Diet"] > 1.0:
+        recommendations["Diet"] = catalog.recommendation("diet")
+
+    if risk_factors["Frequent Alcohol Consumption"] > 1.0:
+        recommendations["Alcohol"] = catalog.recommendation("alcohol")
+
+    if risk_factors["Short Sleep Duration"] > 1.0:
+        recommendations["Sleep"] = catalog.recommendation("sleep")
+
+    # Return at least 3 recommendations if possible
+    if len(recommendations) < 3:
+        # Add general recommendations to ensure at least 3
+        if "Diet" not in recommendations:
+            recommendations["Diet"] = catalog.recommendation("general_diet")
+
+        if "Exercise" not in recommendations:
+            recommendations["Exercise"] = catalog.recommendation("general_exercise")
+
+        if "Preventive Care" not in recommendations:
+            recommendations["Preventive Care"] = catalog.recommendation("preventive_care")
+
+    return recommendations
+
+
+# The only factors get_recommendations looks at; their on/off pattern selects one of 256 sets
+RECOMMENDATION_FACTORS = [
+    "Smoking",
+    "High Blood Pressure",
+    "High Cholesterol",
+    "High BMI",
+    "Sedentary Lifestyle",
+    "Unhealthy Diet",
+    "Frequent Alcohol Consumption",
+    "Short Sleep Duration",
+]
+
+
+def recommendation_mask(risk_factors):
+    mask = 0
+    for bit, factor in enumerate(RECOMMENDATION_FACTORS):
+        if risk_factors[factor] > 1.0:
+            mask |= 1 << bit
+    return mask
+
+
+def build_recommendation_table(locale=DEFAULT_LOCALE):
+    # Precompute every possible recommendation set, indexed by recommendation_mask
+    table = []
+    for mask in range(1 << len(RECOMMENDATION_FACTORS)):
+        risk_factors = {factor: 1.1 if mask >> bit & 1 else 1.0 for bit, factor in enumerate(RECOMMENDATION_FACTORS)}
+        table.append(get_recommendations(risk_factors, locale))
+    return table
+
+
+_recommendation_tables = {}
+
+
+def recommendation_table(locale=DEFAULT_LOCALE):
+    # Built on first use per locale and shared by every session; the sets hold the catalog's dicts
+    table = _recommendation_tables.get(locale)
+    if table is None:
+        table = _recommendation_tables.setdefault(locale, build_recommendation_table(locale))
+    return table
+
+
+# Argument order of calculate_qrisk3 and score_arrays
+INPUT_NAMES = [
+    "age", "sex", "smoking", "diabetes", "blood_pressure", "cholesterol", "bmi", "atrial_fibrillation",
+    "rheumatoid_arthritis", "physical_activity", "diet_quality", "alcohol_consumption", "family_history",
+    "mental_health", "sleep_duration", "chronic_kidney_disease", "migraine_history",
+]
+
+# Factor order matches the risk_factors dict built by calculate_qrisk3
+FACTOR_NAMES = [
+    "Sex (Male)",
+    "Smoking",
+    "Diabetes",
+    "High Blood Pressure",
+    "High Cholesterol",
+    "High BMI",
+    "Atrial Fibrillation",
+    "Rheumatoid Arthritis",
+    "Sedentary Lifestyle",
+    "Unhealthy Diet",
+    "Frequent Alcohol Consumption",
+    "Family History",
+    "Mental Health Issues",
+    "Short Sleep Duration",
+    "Chronic Kidney Disease",
+    "Migraine History",
+]
+
+
+def _measurement(value):
+    # None (not entered) becomes NaN, which never exceeds a threshold
+    if value is None:
+        return np.nan
+    return np.asarray(value, dtype=float)
+
+
+def round_risk(values):
+    """Vectorized equivalent of Python's round(x, 2).
+
+    rint(x * 100) / 100 is the same double as round() unless x * 100 lies within
+    rounding error of a half-way point, where the rounded product can land on
+    the wrong side; those few values are rounded by round() itself. Only double
+    arithmetic is used, so the result does not depend on the platform's long double.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    # The product is within half an ulp of the exact x * 100; allow a few ulps
+    near_half = np.abs(np.abs(np.modf(scaled)[0]) - 0.5) <= 4 * np.abs(np.spacing(scaled))
+    if near_half.any():
+        rounded = np.array(rounded)
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+
+def score_arrays(age, sex, smoking, diabetes, blood_pressure, cholesterol, bmi, atrial_fibrillation,
+                 rheumatoid_arthritis, physical_activity, diet_quality, alcohol_consumption, family_history,
+                 mental_health, sleep_duration, chronic_kidney_disease, migraine_history):
+    """Vectorized calculate_qrisk3.
+
+    Takes the same arguments as scalars or NumPy-broadcastable arrays and returns
+    (risk, multipliers), where multipliers has a trailing axis ordered like
+    FACTOR_NAMES. Results match calculate_qrisk3 exactly.
+    """
+    multipliers = [
+        np.where(np.asarray(sex) == "Male", 1.2, 1.0),
+        np.where(np.asarray(smoking, dtype=bool), 1.3, 1.0),
+        np.where(np.asarray(diabetes, dtype=bool), 1.4, 1.0),
+        np.where(_measurement(blood_pressure) > 140, 1.2, 1.0),
+        np.where(_measurement(cholesterol) > 5.0, 1.2, 1.0),
+        np.where(_measurement(bmi) > 30, 1.2, 1.0),
+        np.where(np.asarray(atrial_fibrillation, dtype=bool), 1.3, 1.0),
+        np.where(np.asarray(rheumatoid_arthritis, dtype=bool), 1.1, 1.0),
+        np.where(np.asarray(physical_activity) == "Sedentary", 1.3,
+                 np.where(np.asarray(physical_activity) == "Moderate", 1.1, 1.0)),
+        np.where(np.asarray(diet_quality) == "Unhealthy", 1.3,
+                 np.where(np.asarray(diet_quality) == "Balanced", 1.1, 1.0)),
+        np.where(np.asarray(alcohol_consumption) == "Frequent", 1.2, 1.0),
+        np.where(np.asarray(family_history, dtype=bool), 1.4, 1.0),
+        np.where(np.asarray(mental_health, dtype=bool), 1.2, 1.0),
+        np.where(np.asarray(sleep_duration) == "Less than 6 hours", 1.3, 1.0),
+        np.where(np.asarray(chronic_kidney_disease, dtype=bool), 1.3, 1.0),
+        np.where(np.asarray(migraine_history, dtype=bool), 1.1, 1.0),
+    ]
+    return _combine(age, multipliers)
+
+
+def _combine(age, multipliers):
+    age = np.asarray(age, dtype=float)
+    *multipliers, age = np.broadcast_arrays(*multipliers, age)
+
+    # Multiply in the same order as calculate_qrisk3 so floating-point results are identical
+    base_risk = age * 0.15
+    for multiplier in multipliers:
+        base_risk = base_risk * multiplier
+
+    risk = round_risk(np.minimum(base_risk, 100))
+    return risk, np.stack(multipliers, axis=-1)
+
+
+# Multipliers indexed by the validation enums (see validation.CATEGORICAL_FIELDS)
+SEX_MULTIPLIERS = np.array([1.2, 1.0])
+PHYSICAL_ACTIVITY_MULTIPLIERS = np.array([1.0, 1.3, 1.1, 1.0])
+DIET_QUALITY_MULTIPLIERS = np.array([1.0, 1.3, 1.1, 1.0])
+ALCOHOL_CONSUMPTION_MULTIPLIERS = np.array([1.0, 1.0, 1.0, 1.2])
+SLEEP_DURATION_MULTIPLIERS = np.array([1.0, 1.3, 1.0, 1.0])
+
+
+def score_encoded(columns):
+    """score_arrays for the encoded columns of a validation.ValidatedBatch.
+
+    Categorical answers arrive as enum codes, so scoring is table lookups with no
+    string comparisons. Results match calculate_qrisk3 exactly.
+    """
+    multipliers = [
+        SEX_MULTIPLIERS[columns["sex"]],
+        np.where(columns["smoking"], 1.3, 1.0),
+        np.where(columns["diabetes"], 1.4, 1.0),
+        np.where(columns["blood_pressure"] > 140, 1.2, 1.0),
+        np.where(columns["cholesterol"] > 5.0, 1.2, 1.0),
+        np.where(columns["bmi"] > 30, 1.2, 1.0),
+        np.where(columns["atrial_fibrillation"], 1.3, 1.0),
+        np.where(columns["rheumatoid_arthritis"], 1.1, 1.0),
+        PHYSICAL_ACTIVITY_MULTIPLIERS[columns["physical_activity"]],
+        DIET_QUALITY_MULTIPLIERS[columns["diet_quality"]],
+        ALCOHOL_CONSUMPTION_MULTIPLIERS[columns["alcohol_consumption"]],
+        np.where(columns["family_history"], 1.4, 1.0),
+        np.where(columns["mental_health"], 1.2, 1.0),
+        SLEEP_DURATION_MULTIPLIERS[columns["sleep_duration"]],
+        np.where(columns["chronic_kidney_disease"], 1.3, 1.0),
+        np.where(columns["migraine_history"], 1.1, 1.0),
+    ]
+    return _combine(columns["age"], multipliers)
@@ -0,0 +1,165 @@
+import importlib
+from collections.abc import Mapping
+
+import numpy as np
+
+from attribution import attribute, summarize
+from risk_model import FACTOR_NAMES, round_risk, score_arrays, score_encoded
+
+# Every multiplier calculate_qrisk3 can assign; per-factor multipliers are stored as indexes into this table
+MULTIPLIER_LEVELS = np.array([1.0, 1.1, 1.2, 1.3, 1.4])
+FACTOR_INDEX = {factor: i for i, factor in enumerate(FACTOR_NAMES)}
+MULTIPLIER_CODES = {float(level): code for code, level in enumerate(MULTIPLIER_LEVELS)}
+
+
+class FactorView(Mapping):
+    """Read-only risk_factors dict for one patient, decoded on access."""
+
+    __slots__ = ("codes",)
+
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __getitem__(self, factor):
+        return float(MULTIPLIER_LEVELS[self.codes[FACTOR_INDEX[factor]]])
+
+    def __iter__(self):
+        return iter(FACTOR_NAMES)
+
+    def __len__(self):
+        return len(FACTOR_NAMES)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def risk_value(risk):
+    # float32 keeps 7 significant digits, enough to restore the 2-decimal risk exactly.
+    # calculate_qrisk3 returns the integer 100 when the risk is capped.
+    value = round(float(risk), 2)
+    return 100 if value >= 100 else value
+
+
+class PatientResult:
+    __slots__ = ("risk", "active", "risk_factors", "age")
+
+    def __init__(self, risk, active, codes, age):
+        self.risk = risk_value(risk)
+        self.active = int(active)
+        self.risk_factors = FactorView(codes)
+        self.age = int(age)
+
+    @classmethod
+    def from_factors(cls, risk, risk_factors, age):
+        """Compact copy of a calculate_qrisk3 result, with one byte per factor instead of a dict."""
+        try:
+            codes = bytes(MULTIPLIER_CODES[risk_factors[factor]] for factor in FACTOR_NAMES)
+        except KeyError as e:
+            raise ValueError(f"multiplier outside MULTIPLIER_LEVELS: {e}") from e
+        active = sum(1 << i for i, code in enumerate(codes) if code)
+        return cls(risk, active, codes, age)
+
+    def attribution(self):
+        """(baseline, {factor: points}); see attribution.attribute."""
+        baseline, contributions = attribute(self.age, MULTIPLIER_LEVELS[list(self.risk_factors.codes)], self.risk)
+        return float(baseline), dict(zip(FACTOR_NAMES, contributions.tolist()))
+
+    def __iter__(self):
+        # Unpacks like the (risk, risk_factors) tuple returned by calculate_qrisk3
+        return iter((self.risk, self.risk_factors))
+
+
+class ScoredCohort:
+    """Array-backed results for a bulk-scored cohort.
+
+    Per patient it holds a float32 risk, a uint16 bitmask of active factors (bit i
+    is FACTOR_NAMES[i]), one uint8 multiplier level per factor and a uint8 age
+    (for attributions): 23 bytes in total. Slicing returns views of the same buffers.
+    """
+
+    def __init__(self, risk, active, codes, age):
+        self.risk = risk
+        self.active = active
+        self.codes = codes
+        self.age = age
+
+    @classmethod
+    def from_scores(cls, risk, multipliers, age):
+        multipliers = np.asarray(multipliers).reshape(-1, len(FACTOR_NAMES))
+        codes = np.searchsorted(MULTIPLIER_LEVELS, multipliers).astype(np.uint8)
+        if not np.array_equal(MULTIPLIER_LEVELS[codes], multipliers):
+            raise ValueError("multipliers outside MULTIPLIER_LEVELS")
+        bits = np.left_shift(np.uint16(1), np.arange(len(FACTOR_NAMES), dtype=np.uint16))
+        active = np.bitwise_or.reduce(np.where(codes > 0, bits, np.uint16(0)), axis=1).astype(np.uint16)
+        age = np.broadcast_to(np.asarray(age), np.shape(risk)).reshape(-1).astype(np.uint8)
+        return cls(np.asarray(risk, dtype=np.float32).reshape(-1), active, codes, age)
+
+    def __len__(self):
+        return len(self.risk)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return PatientResult(self.risk[index], self.active[index], self.codes[index], self.age[index])
+        # Slices are zero-copy views; index arrays and boolean masks copy, as in NumPy
+        return ScoredCohort(self.risk[index], self.active[index], self.codes[index], self.age[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        return self.risk.nbytes + self.active.nbytes + self.codes.nbytes + self.age.nbytes
+
+    def multipliers(self):
+        return MULTIPLIER_LEVELS[self.codes]
+
+    def risk_values(self):
+        # float64 risk as calculate_qrisk3 reports it (2 decimals, capped at 100)
+        return np.minimum(round_risk(self.risk.astype(np.float64)), 100)
+
+    def attributions(self):
+        """(baseline, contributions[n, factors]) in percentage points; see attribution.attribute."""
+        return attribute(self.age, self.multipliers(), self.risk_values())
+
+    def attribution_summary(self, chunk_size=1_000_000):
+        return summarize(self.age, self.multipliers(), self.risk_values(), chunk_size)
+
+    def has_factor(self, factor):
+        return (self.active & np.uint16(1 << FACTOR_INDEX[factor])) != 0
+
+    def to_arrow(self):
+        pa = _import_pyarrow("pyarrow")
+
+        levels = pa.array(MULTIPLIER_LEVELS)
+        columns = {"risk": pa.array(self.risk), "age": pa.array(self.age), "active_factors": pa.array(self.active)}
+        for i, factor in enumerate(FACTOR_NAMES):
+            # Dictionary-encoded so each multiplier column stays one byte per patient
+            columns[factor] = pa.DictionaryArray.from_arrays(pa.array(self.codes[:, i]), levels)
+        return pa.table(columns, metadata={"factor_bits": ",".join(FACTOR_NAMES)})
+
+    def to_parquet(self, path, **kwargs):
+        _import_pyarrow("pyarrow.parquet").write_table(self.to_arrow(), path, **kwargs)
+
+
+def _import_pyarrow(name):
+    # Only the Arrow/Parquet export needs pyarrow; it is in requirements.txt but imported on demand
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(f"Arrow/Parquet export requires {name}, which is missing; install pyarrow from "
+                          f"requirements.txt (pip install -r requirements.txt)") from e
+
+
+def score_validated(batch):
+    """Score the valid rows of a validation.ValidatedBatch; returns (cohort, valid mask)."""
+    valid = batch.valid
+    columns = batch.select(valid).columns
+    risk, multipliers = score_encoded(columns)
+    return ScoredCohort.from_scores(risk, multipliers, columns["age"]), valid
+
+
+def score_cohort(columns):
+    """Score a cohort given a mapping (dict or DataFrame) of calculate_qrisk3 argument columns."""
+    risk, multipliers = score_arrays(**{name: np.asarray(values) for name, values in columns.items()})
+    return ScoredCohort.from_scores(risk, multipliers, columns["age"])
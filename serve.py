@@ -0,0 +1,13 @@
+import sys
+
+from streamlit.web import cli as stcli
+
+import warmup
+
+# Launch the app with shared resources already loading before the first session
+# connects. Extra arguments are passed to `streamlit run`, e.g.
+#     python serve.py --server.port 8501
+if __name__ == "__main__":
+    warmup.start()
+    sys.argv = ["streamlit", "run", "main.py"] + sys.argv[1:]
+    sys.exit(stcli.main())
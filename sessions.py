@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from scored_cohort import PatientResult
+
+# Per-session assessment results, kept outside st.session_state so they can be
+# evicted from any thread. Each session only holds a short token; its result is
+# a slotted PatientResult (score plus one byte per factor) from which the
+# recommendations, report and charts are derived on each run. Results idle for
+# longer than LIFELINE_SESSION_IDLE_SECONDS are dropped, and at most
+# LIFELINE_MAX_SESSIONS are kept (least recently used first out), so memory
+# follows active users rather than every session the server has seen.
+
+IDLE_SECONDS = float(os.environ.get("LIFELINE_SESSION_IDLE_SECONDS", 30 * 60))
+MAX_SESSIONS = int(os.environ.get("LIFELINE_MAX_SESSIONS", 10000))
+
+
+def result_nbytes(token, result):
+    # The token, the stored entry and the result object graph
+    return (sys.getsizeof(token) + sys.getsizeof((result, 0.0)) + sys.getsizeof(result)
+            + sys.getsizeof(result.risk_factors) + sys.getsizeof(result.risk_factors.codes))
+
+
+class SessionStore:
+    def __init__(self, idle_seconds=IDLE_SECONDS, max_sessions=MAX_SESSIONS):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        # token -> (result, last access), least recently used first
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def put(self, token, risk, risk_factors, age, now=None):
+        now = time.monotonic() if now is None else now
+        result = PatientResult.from_factors(risk, risk_factors, age)
+        with self.lock:
+            self._discard(token)
+            self.entries[token] = (result, now)
+            self.nbytes += result_nbytes(token, result)
+            self._evict(now)
+        return result
+
+    def get(self, token, now=None):
+        """The session's result, or None if it never calculated or was evicted."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._evict(now)
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            self.entries[token] = (entry[0], now)
+            self.entries.move_to_end(token)
+            return entry[0]
+
+    def evict_idle(self, now=None):
+        with self.lock:
+            self._evict(time.monotonic() if now is None else now)
+
+    def _discard(self, token):
+        entry = self.entries.pop(token, None)
+        if entry is not None:
+            self.nbytes -= result_nbytes(token, entry[0])
+
+    def _evict(self, now):
+        # Entries are ordered by last access, so idle ones are always at the front
+        while self.entries:
+            token, (_, last_access) = next(iter(self.entries.items()))
+            if now - last_access > self.idle_seconds:
+                self.evicted_idle += 1
+            elif len(self.entries) > self.max_sessions:
+                self.evicted_lru += 1
+            else:
+                break
+            self._discard(token)
+
+    def stats(self):
+        with self.lock:
+            count = len(self.entries)
+            return {
+                "sessions": count,
+                "bytes": self.nbytes,
+                "bytes_per_session": self.nbytes / count if count else 0,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store shared by every session of this server."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+def new_token():
+    return uuid.uuid4().hex
@@ -0,0 +1,385 @@
+import asyncio
+import json
+import mmap
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import quote, unquote, urlparse
+
+# Pluggable cache for artifacts shared between app replicas (chart bytes, dataset
+# metadata, population aggregates). The backend is selected with
+# LIFELINE_CACHE_URL:
+#     memory://                  per-process dict (default, single replica)
+#     file:///var/cache/lifeline one file per key, read through mmap
+#     redis://host:6379/0        any Redis-protocol server, e.g. `python shared_cache.py serve`
+# Cache failures never break a request: reads fall back to a miss and writes are dropped.
+
+CACHE_URL = os.environ.get("LIFELINE_CACHE_URL", "memory://")
+# After a failed connection, Redis commands fail at once for this long, doubling
+# up to the maximum while the server stays unreachable
+RECONNECT_SECONDS = 1.0
+MAX_RECONNECT_SECONDS = 30.0
+REPLICA_ID = os.environ.get("LIFELINE_REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class CacheBackend:
+    def __init__(self):
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            value = self._get(key)
+        except OSError:
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        """Store value at key; False if the cache could not be reached."""
+        try:
+            self._set(key, value)
+            return True
+        except OSError:
+            self._count("errors")
+            return False
+
+    def add_member(self, key, member):
+        """Add member to the set stored at key; False if the cache could not be reached."""
+        try:
+            self._add_member(key, member)
+            return True
+        except OSError:
+            self._count("errors")
+            return False
+
+    def members(self, key):
+        # Sets are small registries (e.g. one entry per replica), never a scan of the keyspace
+        try:
+            return sorted(self._members(key))
+        except OSError:
+            self._count("errors")
+            return []
+
+    def _count(self, name):
+        with self.stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def get_json(self, key):
+        value = self.get(key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            # A truncated or foreign entry is a miss like any other cache failure
+            self._count("errors")
+            return None
+
+    def set_json(self, key, value):
+        return self.set(key, json.dumps(value).encode())
+
+    def get_or_compute_json(self, key, compute):
+        value = self.get_json(key)
+        if value is None:
+            # Round-trip a fresh value too, so callers see the same types on a hit and a miss
+            data = json.dumps(compute()).encode()
+            self.set(key, data)
+            value = json.loads(data)
+        return value
+
+    def stats(self):
+        with self.stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+class MemoryCache(CacheBackend):
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+        self.sets = {}
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _set(self, key, value):
+        self.data[key] = bytes(value)
+
+    def _add_member(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def _members(self, key):
+        return list(self.sets.get(key, ()))
+
+
+class FileCache(CacheBackend):
+    """One file per key. Reads go through mmap so replicas on a host share the page cache."""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, quote(key, safe=""))
+
+    def _get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:]
+        except FileNotFoundError:
+            return None
+
+    def _set(self, key, value):
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+
+    def _set_path(self, key):
+        # A set is a directory holding one empty file per member
+        return f"{self._path(key)}.members"
+
+    def _add_member(self, key, member):
+        directory = self._set_path(key)
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, quote(member, safe="")), "ab").close()
+
+    def _members(self, key):
+        try:
+            return [unquote(name) for name in os.listdir(self._set_path(key))]
+        except FileNotFoundError:
+            return []
+
+
+class RedisCache(CacheBackend):
+    """Minimal RESP client covering the handful of commands the cache needs."""
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, timeout=2.0):
+        super().__init__()
+        self.address = (host, port)
+        self.db = db
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+        self.backoff = 0.0
+        self.retry_at = 0.0
+
+    def _connect(self):
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return read_reply(self.reader)
+
+    def command(self, *args):
+        with self.lock:
+            if self.sock is None and time.monotonic() < self.retry_at:
+                # Fail fast rather than hold every request for a connect timeout
+                raise ConnectionError(f"cache unreachable, retrying in {self.retry_at - time.monotonic():.1f}s")
+            try:
+                if self.sock is None:
+                    self._connect()
+                reply = self._send(*args)
+            except OSError as error:
+                # Drop the connection; a later command reconnects
+                if self.sock is not None:
+                    self.sock.close()
+                self.sock = None
+                if not isinstance(error, RedisError):
+                    self.backoff = min(self.backoff * 2, MAX_RECONNECT_SECONDS) if self.backoff else RECONNECT_SECONDS
+                    self.retry_at = time.monotonic() + self.backoff
+                raise
+            self.backoff = 0.0
+            return reply
+
+    def _get(self, key):
+        return self.command("GET", key)
+
+    def _set(self, key, value):
+        self.command("SET", key, value)
+
+    def _add_member(self, key, member):
+        self.command("SADD", key, member)
+
+    def _members(self, key):
+        return [member.decode() for member in self.command("SMEMBERS", key)]
+
+
+class RedisError(OSError):
+    pass
+
+
+def read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise RedisError(f"unexpected reply {line!r}")
+
+
+def create_cache(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryCache()
+    if parsed.scheme == "file":
+        return FileCache(parsed.path)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.strip("/") or 0)
+        return RedisCache(parsed.hostname or "127.0.0.1", parsed.port or 6379, db)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache built from LIFELINE_CACHE_URL."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = create_cache(CACHE_URL)
+        return _cache
+
+
+# Local stand-in for a Redis server, for development and the replica benchmark
+
+def encode_reply(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    raise TypeError(type(value))
+
+
+class LocalRedisServer:
+    def __init__(self):
+        self.databases = {}
+
+    def execute(self, data, args):
+        command = args[0].decode().upper()
+        if command == "PING":
+            return "PONG"
+        if command == "SELECT":
+            return "OK"
+        if command == "GET":
+            return data.get(args[1])
+        if command == "SET":
+            data[args[1]] = args[2]
+            return "OK"
+        if command == "DEL":
+            return sum(data.pop(key, None) is not None for key in args[1:])
+        if command == "EXISTS":
+            return sum(key in data for key in args[1:])
+        if command == "SADD":
+            members = data.setdefault(args[1], set())
+            added = len(set(args[2:]) - members)
+            members.update(args[2:])
+            return added
+        if command == "SMEMBERS":
+            return list(data.get(args[1], ()))
+        if command == "FLUSHDB":
+            data.clear()
+            return "OK"
+        if command == "DBSIZE":
+            return len(data)
+        return ValueError(f"ERR unknown command '{command}'")
+
+    async def handle(self, reader, writer):
+        data = self.databases.setdefault(0, {})
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                if args[0].upper() == b"SELECT":
+                    data = self.databases.setdefault(int(args[1]), {})
+                result = self.execute(data, args)
+                if isinstance(result, ValueError):
+                    writer.write(f"-{result}\r\n".encode())
+                else:
+                    writer.write(encode_reply(result))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(host="127.0.0.1", port=6379):
+    asyncio.run(LocalRedisServer().serve(host, port))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 6379
+        print(f"Serving Redis protocol on 127.0.0.1:{port}")
+        serve(port=port)
+    else:
+        print("usage: python shared_cache.py serve [port]")
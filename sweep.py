@@ -0,0 +1,46 @@
+import numpy as np
+
+from risk_model import score_arrays
+
+# Inputs that can be varied, with the grid used by default (the input widget ranges)
+SWEEP_RANGES = {
+    "age": np.arange(25, 85),
+    "blood_pressure": np.arange(80, 201),
+    "cholesterol": np.round(np.arange(2.0, 10.01, 0.1), 1),
+    "bmi": np.round(np.arange(15.0, 50.01, 0.5), 1),
+}
+
+SWEEP_LABELS = {
+    "age": "Age",
+    "blood_pressure": "Blood Pressure (mmHg)",
+    "cholesterol": "Cholesterol Level (mmol/L)",
+    "bmi": "Body Mass Index (BMI)",
+}
+
+
+class SweepResult:
+    def __init__(self, x_name, x_values, y_name, y_values, risk):
+        self.x_name = x_name
+        self.x_values = x_values
+        self.y_name = y_name
+        self.y_values = y_values
+        # Shape (len(x_values),) for a curve, (len(x_values), len(y_values)) for a grid
+        self.risk = risk
+
+
+def sweep(base, x_name, x_values=None, y_name=None, y_values=None):
+    """Risk across one or two varying inputs, holding the rest of `base` fixed.
+
+    `base` maps calculate_qrisk3 argument names to the patient's values. The whole
+    grid is scored in a single vectorized call.
+    """
+    x_values = SWEEP_RANGES[x_name] if x_values is None else np.asarray(x_values)
+    inputs = dict(base)
+    if y_name is None:
+        inputs[x_name] = x_values
+    else:
+        y_values = SWEEP_RANGES[y_name] if y_values is None else np.asarray(y_values)
+        inputs[x_name] = x_values[:, None]
+        inputs[y_name] = y_values[None, :]
+    risk, _ = score_arrays(**inputs)
+    return SweepResult(x_name, x_values, y_name, y_values, risk)
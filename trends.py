@@ -0,0 +1,316 @@
+import atexit
+import bisect
+import math
+import os
+import threading
+import time
+
+import pandas as pd
+
+from risk_model import calculate_qrisk3
+
+# Age bands follow the range of the age slider (25-84)
+AGE_BANDS = [(25, 34), (35, 44), (45, 54), (55, 64), (65, 74), (75, 84)]
+SEXES = ["Male", "Female"]
+
+SHARD_PREFIX = "trends:shard:"
+# Set of every replica's shard key, so a snapshot never lists the cache's keys
+SHARD_REGISTRY = "trends:shards"
+# How often a replica writes its shard; other replicas see its assessments this much later
+SHARD_FLUSH_SECONDS = float(os.environ.get("LIFELINE_TRENDS_FLUSH_SECONDS", 5))
+
+# totChol in the bundled Framingham-style dataset is in mg/dL
+MG_DL_PER_MMOL_L = 38.67
+
+
+def age_band(age):
+    for i, (low, high) in enumerate(AGE_BANDS):
+        if age <= high:
+            return i
+    return len(AGE_BANDS) - 1
+
+
+def band_label(band):
+    low, high = AGE_BANDS[band]
+    return f"{low}-{high}"
+
+
+class TDigest:
+    """Merging t-digest for streaming percentile estimates in bounded memory."""
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.buffer.append(value)
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other):
+        self._compress()
+        other._compress()
+        self.means = self.means + other.means
+        self.weights = self.weights + other.weights
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+
+    def _compress(self, force=False):
+        if not self.buffer and not force:
+            return
+        if not self.buffer and not self.means:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + [(v, 1) for v in self.buffer])
+        self.buffer = []
+
+        # k1 scale function: small centroids at the tails, large ones in the middle
+        def k(q):
+            return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+        means, weights = [], []
+        cur_mean, cur_weight = points[0]
+        seen = 0
+        k_low = k(0.0)
+        for mean, weight in points[1:]:
+            if k((seen + cur_weight + weight) / self.count) - k_low <= 1:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                seen += cur_weight
+                k_low = k(seen / self.count)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        # Interpolate between centroid centres, clamped to the observed range
+        cumulative = []
+        total = 0
+        for weight in self.weights:
+            cumulative.append(total + weight / 2)
+            total += weight
+        i = bisect.bisect_left(cumulative, target)
+        if i == 0:
+            return self.min + (self.means[0] - self.min) * (target / cumulative[0] if cumulative[0] else 0)
+        if i == len(cumulative):
+            span = self.count - cumulative[-1]
+            return self.means[-1] + (self.max - self.means[-1]) * ((target - cumulative[-1]) / span if span else 0)
+        frac = (target - cumulative[i - 1]) / (cumulative[i] - cumulative[i - 1])
+        return self.means[i - 1] + (self.means[i] - self.means[i - 1]) * frac
+
+    def to_dict(self):
+        self._compress()
+        return {"compression": self.compression, "means": self.means, "weights": self.weights,
+                "count": self.count, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data["compression"])
+        digest.means = list(data["means"])
+        digest.weights = list(data["weights"])
+        digest.count = data["count"]
+        digest.min = data["min"]
+        digest.max = data["max"]
+        return digest
+
+
+class RiskStats:
+    """Running count, mean and percentile sketch for one aggregation cell."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.digest = TDigest()
+
+    def add(self, risk):
+        self.count += 1
+        self.total += risk
+        self.digest.add(risk)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.digest.merge(other.digest)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {"count": self.count, "total": self.total, "digest": self.digest.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats.digest = TDigest.from_dict(data["digest"])
+        return stats
+
+
+class TrendAggregator:
+    """Population risk aggregates updated incrementally as each assessment arrives.
+
+    Cells are keyed by (age band, sex) and by risk factor, so reading the
+    trends never requires rescanning past assessments.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_band_sex = {(band, sex): RiskStats() for band in range(len(AGE_BANDS)) for sex in SEXES}
+        self.by_factor = {}
+        self.total = RiskStats()
+
+    def add(self, age, sex, risk, risk_factors):
+        with self.lock:
+            self.by_band_sex[(age_band(age), sex)].add(risk)
+            self.total.add(risk)
+            for factor, multiplier in risk_factors.items():
+                if multiplier > 1.0:
+                    self.by_factor.setdefault(factor, RiskStats()).add(risk)
+
+    def merge(self, other):
+        # Only this aggregator is locked, and merging compresses other's digests,
+        # so other must not be receiving adds; merge a to_dict() copy of a live one
+        with self.lock:
+            for key, stats in other.by_band_sex.items():
+                self.by_band_sex[key].merge(stats)
+            for factor, stats in other.by_factor.items():
+                self.by_factor.setdefault(factor, RiskStats()).merge(stats)
+            self.total.merge(other.total)
+
+    def age_curve(self, sex, quantiles=(0.25, 0.5, 0.75)):
+        # One row per age band: midpoint age, count, mean and requested percentiles
+        rows = []
+        with self.lock:
+            for band, (low, high) in enumerate(AGE_BANDS):
+                stats = self.by_band_sex[(band, sex)]
+                row = {"Age": (low + high + 1) / 2, "Band": band_label(band), "Count": stats.count, "Mean": stats.mean}
+                for q in quantiles:
+                    row[f"P{int(q * 100)}"] = stats.digest.quantile(q)
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+    def factor_summary(self):
+        with self.lock:
+            rows = [{"Factor": factor, "Count": stats.count, "Mean Risk": stats.mean,
+                     "Median Risk": stats.digest.quantile(0.5)}
+                    for factor, stats in self.by_factor.items()]
+        return pd.DataFrame(rows, columns=["Factor", "Count", "Mean Risk", "Median Risk"])
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "by_band_sex": [[band, sex, stats.to_dict()] for (band, sex), stats in self.by_band_sex.items()],
+                "by_factor": {factor: stats.to_dict() for factor, stats in self.by_factor.items()},
+                "total": self.total.to_dict(),
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls()
+        for band, sex, stats in data["by_band_sex"]:
+            aggregator.by_band_sex[(band, sex)] = RiskStats.from_dict(stats)
+        aggregator.by_factor = {factor: RiskStats.from_dict(stats) for factor, stats in data["by_factor"].items()}
+        aggregator.total = RiskStats.from_dict(data["total"])
+        return aggregator
+
+
+def score_cardiovascular_dataset(path="data_cardiovascular_risk.csv"):
+    # Map the bundled dataset onto the assessment inputs; fields it lacks are left unspecified
+    data = pd.read_csv(path)
+    for row in data.itertuples(index=False):
+        cholesterol = None if pd.isna(row.totChol) else row.totChol / MG_DL_PER_MMOL_L
+        blood_pressure = None if pd.isna(row.sysBP) else row.sysBP
+        bmi = None if pd.isna(row.BMI) else row.BMI
+        sex = "Male" if row.sex == "M" else "Female"
+        age = min(max(int(row.age), 25), 84)
+        risk, risk_factors = calculate_qrisk3(age, sex, row.is_smoking == "YES", row.diabetes == 1,
+                                              blood_pressure, cholesterol, bmi, False, False, "Not Specified",
+                                              "Not Specified", "Not Specified", False, False, "Not Specified",
+                                              False, False)
+        yield age, sex, risk, risk_factors
+
+
+def seed_from_dataset(path="data_cardiovascular_risk.csv"):
+    aggregator = TrendAggregator()
+    for age, sex, risk, risk_factors in score_cardiovascular_dataset(path):
+        aggregator.add(age, sex, risk, risk_factors)
+    return aggregator
+
+
+class SharedTrends:
+    """Trend aggregates shared by several app replicas through the shared cache.
+
+    The seed aggregates are immutable; each replica only ever writes its own
+    shard of new assessments, so no cross-replica locking is needed. Adding an
+    assessment never touches the cache: a background thread writes the shard
+    every flush_seconds when it has changed, and once more at exit.
+    """
+
+    def __init__(self, cache, seed, replica_id, flush_seconds=SHARD_FLUSH_SECONDS):
+        self.cache = cache
+        self.seed = seed
+        self.shard_key = f"{SHARD_PREFIX}{replica_id}"
+        self.local = TrendAggregator()
+        self.flush_seconds = flush_seconds
+        self.registered = False
+        self.dirty = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="trends-flush", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def add(self, age, sex, risk, risk_factors):
+        self.local.add(age, sex, risk, risk_factors)
+        self.dirty.set()
+
+    def flush(self):
+        """Write this replica's shard if it changed since the last flush."""
+        with self.flush_lock:
+            if not self.dirty.is_set():
+                return
+            self.dirty.clear()
+            # Retried on the next flush if the cache could not be reached
+            if not self.cache.set_json(self.shard_key, self.local.to_dict()):
+                self.dirty.set()
+            elif not self.registered:
+                self.registered = self.cache.add_member(SHARD_REGISTRY, self.shard_key)
+                if not self.registered:
+                    self.dirty.set()
+
+    def _run(self):
+        while True:
+            self.dirty.wait()
+            self.flush()
+            time.sleep(self.flush_seconds)
+
+    def snapshot(self):
+        merged = TrendAggregator.from_dict(self.seed)
+        for key in self.cache.members(SHARD_REGISTRY):
+            if key != self.shard_key:
+                shard = self.cache.get_json(key)
+                if shard is not None:
+                    merged.merge(TrendAggregator.from_dict(shard))
+        # Sessions keep adding to local while this runs; to_dict copies it under its lock
+        merged.merge(TrendAggregator.from_dict(self.local.to_dict()))
+        return merged
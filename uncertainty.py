@@ -0,0 +1,94 @@
+import numpy as np
+
+from risk_model import FACTOR_NAMES, score_arrays
+
+# Monte Carlo band around the point risk. Each sample perturbs the measurements by
+# typical repeat-measurement noise, which can move them across their thresholds,
+# and scales every factor's log-multiplier by a shared random draw standing in
+# for uncertainty in the published coefficients. All samples for a chunk of
+# patients are scored in one vectorized pass.
+
+# Standard deviation of a repeat measurement, in the input units
+MEASUREMENT_SD = {"blood_pressure": 8.0, "cholesterol": 0.3, "bmi": 0.5}
+MEASUREMENT_THRESHOLDS = {"blood_pressure": 140, "cholesterol": 5.0, "bmi": 30}
+MEASUREMENT_FACTORS = {"blood_pressure": "High Blood Pressure", "cholesterol": "High Cholesterol",
+                       "bmi": "High BMI"}
+MEASUREMENT_MULTIPLIER = 1.2
+
+# Relative standard deviation of each factor's log-multiplier
+COEFFICIENT_CV = 0.25
+
+# Measurements further than this many standard deviations from a threshold never cross it
+NOISE_REACH = 6
+
+DEFAULT_SAMPLES = 2000
+DEFAULT_LEVEL = 0.9
+
+# Patients x samples scored at once, bounding peak memory for large cohorts
+CHUNK_CELLS = 2_000_000
+
+
+class RiskBand:
+    def __init__(self, risk, low, median, high, level):
+        # Point risk from score_arrays and the band's bounds, all shaped like the inputs
+        self.risk = risk
+        self.low = low
+        self.median = median
+        self.high = high
+        self.level = level
+
+
+def sample_coefficients(rng, samples):
+    """(samples, factors) scale applied to every log-multiplier; 1 is the published model."""
+    return 1 + COEFFICIENT_CV * rng.standard_normal((samples, len(FACTOR_NAMES)))
+
+
+def sample_risk(inputs, scales, rng):
+    """Risk samples shaped (patients, samples) for calculate_qrisk3 argument arrays `inputs`.
+
+    `scales` comes from sample_coefficients and is shared by every patient, since
+    coefficient uncertainty is a property of the model, not of the patient.
+    """
+    point, multipliers = score_arrays(**inputs)
+    multipliers = multipliers.reshape(-1, len(FACTOR_NAMES))
+    age = np.broadcast_to(np.asarray(inputs["age"], dtype=float), point.shape).reshape(-1)
+    samples = len(scales)
+
+    # Score with the measurement factors switched off, then redraw them per sample
+    log_fixed = np.log(multipliers)
+    for factor in MEASUREMENT_FACTORS.values():
+        log_fixed[:, FACTOR_NAMES.index(factor)] = 0
+    log_risk = np.log(age * 0.15)[:, None] + log_fixed @ scales.T
+    for name, factor in MEASUREMENT_FACTORS.items():
+        values = np.broadcast_to(np.asarray(inputs[name], dtype=float), point.shape).reshape(-1)
+        # Standard deviations of noise needed to cross the threshold. Only values close
+        # enough to flip need random draws; missing (NaN) measurements never count as high.
+        margin = (MEASUREMENT_THRESHOLDS[name] - values) / MEASUREMENT_SD[name]
+        near = np.abs(margin) < NOISE_REACH
+        high = np.repeat((margin < 0)[:, None], samples, axis=1)
+        high[near] = rng.standard_normal((near.sum(), samples), dtype=np.float32) > margin[near, None]
+        log_risk += high * (np.log(MEASUREMENT_MULTIPLIER) * scales[:, FACTOR_NAMES.index(factor)])
+    return np.minimum(np.exp(log_risk), 100)
+
+
+def risk_band(inputs, samples=DEFAULT_SAMPLES, level=DEFAULT_LEVEL, seed=None):
+    """Central `level` interval of the sampled risk for one patient or a cohort.
+
+    `inputs` maps calculate_qrisk3 argument names to scalars or arrays (missing
+    measurements as None or NaN). Results are reproducible for a given seed.
+    """
+    rng = np.random.default_rng(seed)
+    inputs = {name: np.nan if value is None else value for name, value in inputs.items()}
+    point, _ = score_arrays(**inputs)
+    shape = point.shape
+    flat = {name: np.broadcast_to(np.asarray(value), shape).reshape(-1) for name, value in inputs.items()}
+    scales = sample_coefficients(rng, samples)
+
+    tails = [(1 - level) / 2, 0.5, (1 + level) / 2]
+    bounds = np.empty((3, point.size))
+    chunk = max(1, CHUNK_CELLS // samples)
+    for start in range(0, point.size, chunk):
+        part = {name: values[start:start + chunk] for name, values in flat.items()}
+        bounds[:, start:start + chunk] = np.quantile(sample_risk(part, scales, rng), tails, axis=1)
+    low, median, high = (np.round(bound, 2).reshape(shape) for bound in bounds)
+    return RiskBand(point, low, median, high, level)
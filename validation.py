@@ -0,0 +1,157 @@
+from enum import IntEnum
+
+import numpy as np
+import pandas as pd
+
+# Schema for patient records. Categorical answers are encoded as small integer
+# enums and numeric fields are range-checked against the input widget bounds.
+# Checks run column-wise and report a per-row error mask for every field instead
+# of raising, so a batch can drop bad rows without a try/except per record.
+
+
+class Sex(IntEnum):
+    MALE = 0
+    FEMALE = 1
+
+
+class PhysicalActivity(IntEnum):
+    NOT_SPECIFIED = 0
+    SEDENTARY = 1
+    MODERATE = 2
+    ACTIVE = 3
+
+
+class DietQuality(IntEnum):
+    NOT_SPECIFIED = 0
+    UNHEALTHY = 1
+    BALANCED = 2
+    HEALTHY = 3
+
+
+class AlcoholConsumption(IntEnum):
+    NOT_SPECIFIED = 0
+    NEVER = 1
+    OCCASIONALLY = 2
+    FREQUENT = 3
+
+
+class SleepDuration(IntEnum):
+    NOT_SPECIFIED = 0
+    LESS_THAN_6_HOURS = 1
+    SIX_TO_8_HOURS = 2
+    MORE_THAN_8_HOURS = 3
+
+
+# Field -> (enum, widget labels in enum order, code used when the answer is missing or None)
+CATEGORICAL_FIELDS = {
+    "sex": (Sex, ["Male", "Female"], None),
+    "physical_activity": (PhysicalActivity, ["Not Specified", "Sedentary", "Moderate", "Active"],
+                          PhysicalActivity.NOT_SPECIFIED),
+    "diet_quality": (DietQuality, ["Not Specified", "Unhealthy", "Balanced", "Healthy"], DietQuality.NOT_SPECIFIED),
+    "alcohol_consumption": (AlcoholConsumption, ["Not Specified", "Never", "Occasionally", "Frequent"],
+                            AlcoholConsumption.NOT_SPECIFIED),
+    "sleep_duration": (SleepDuration, ["Not Specified", "Less than 6 hours", "6-8 hours", "More than 8 hours"],
+                       SleepDuration.NOT_SPECIFIED),
+}
+
+# Field -> (min, max, required, integer). Optional measurements may be missing (NaN), as with the
+# empty widgets. Integer fields reject fractions rather than have them truncated when encoded.
+NUMERIC_FIELDS = {
+    "age": (25, 84, True, True),
+    "blood_pressure": (80, 200, False, False),
+    "cholesterol": (2.0, 10.0, False, False),
+    "bmi": (15.0, 50.0, False, False),
+}
+
+BOOLEAN_FIELDS = [
+    "smoking", "diabetes", "atrial_fibrillation", "rheumatoid_arthritis", "family_history", "mental_health",
+    "chronic_kidney_disease", "migraine_history",
+]
+
+
+def encode_categorical(values, labels, missing_code):
+    """Map labels to codes; returns (codes, error mask). Unknown labels are errors."""
+    # Look up each distinct value once instead of once per row. factorize marks
+    # missing values with -1, which indexes the trailing missing_code entry.
+    lookup = {label: code for code, label in enumerate(labels)}
+    inverse, uniques = pd.factorize(np.asarray(values, dtype=object))
+    unique_codes = [lookup.get(value, -1) for value in uniques]
+    unique_codes.append(-1 if missing_code is None else missing_code)
+    codes = np.array(unique_codes, dtype=np.int8)[inverse]
+    errors = codes < 0
+    codes[errors] = 0
+    return codes, errors
+
+
+def check_numeric(values, low, high, required, integer=False):
+    """Returns (float values with NaN for missing, error mask)."""
+    values = np.asarray(values)
+    numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    missing = pd.isna(values)
+    # Values that are present but not numbers are errors, not missing
+    errors = (numbers < low) | (numbers > high) | (np.isnan(numbers) & ~missing)
+    if integer:
+        errors |= (numbers != np.floor(numbers)) & ~np.isnan(numbers)
+    if required:
+        errors |= missing
+    return numbers, errors
+
+
+def check_boolean(values):
+    """Returns (flags, error mask). Missing answers count as unchecked."""
+    values = np.asarray(values)
+    if values.dtype.kind == "b":
+        return values, np.zeros(values.shape, dtype=bool)
+    missing = pd.isna(values)
+    valid = missing | np.isin(values, [True, False])
+    flags = np.asarray(values == 1, dtype=bool) & valid & ~missing
+    return flags, ~valid
+
+
+class ValidatedBatch:
+    """Encoded columns for a batch of patient records plus per-field error masks."""
+
+    def __init__(self, columns, errors):
+        # columns: int8 enum codes, float measurements (NaN when missing) and bool flags
+        self.columns = columns
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.columns["age"])
+
+    @property
+    def valid(self):
+        invalid = np.zeros(len(self), dtype=bool)
+        for mask in self.errors.values():
+            invalid |= mask
+        return ~invalid
+
+    def select(self, mask):
+        return ValidatedBatch({name: values[mask] for name, values in self.columns.items()},
+                              {name: errors[mask] for name, errors in self.errors.items()})
+
+    def error_fields(self, row):
+        return [name for name, errors in self.errors.items() if errors[row]]
+
+    def error_summary(self):
+        return {name: int(errors.sum()) for name, errors in self.errors.items() if errors.any()}
+
+
+def validate_records(records):
+    """Validate and encode a mapping (dict of columns or DataFrame) of patient records."""
+    columns, errors = {}, {}
+    size = len(records["age"])
+    for name, (low, high, required, integer) in NUMERIC_FIELDS.items():
+        columns[name], errors[name] = check_numeric(_column(records, name, size), low, high, required, integer)
+    for name, (_, labels, missing_code) in CATEGORICAL_FIELDS.items():
+        columns[name], errors[name] = encode_categorical(_column(records, name, size), labels, missing_code)
+    for name in BOOLEAN_FIELDS:
+        columns[name], errors[name] = check_boolean(_column(records, name, size))
+    return ValidatedBatch(columns, errors)
+
+
+def _column(records, name, size):
+    # A missing column means the field was never asked; treat every row as unanswered
+    if name not in records:
+        return np.full(size, None, dtype=object)
+    return np.asarray(records[name])
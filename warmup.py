@@ -0,0 +1,247 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import audit
+import charts
+import cohorts
+import imputation
+import importance
+import risk_model
+import sessions
+import shared_cache
+import trends
+
+# Shared resources are loaded once per process, concurrently, in a background
+# thread pool. Sessions call get() and only block on resources that are not
+# ready yet. The readiness status is mirrored to a JSON file so an orchestrator
+# can probe it with `python warmup.py --probe`.
+#
+# Expensive artifacts are fetched from the shared cache first, so only the
+# first replica to start pays for reading the datasets and rendering charts.
+# Everything the loaders use is imported above, so no module is ever first
+# imported on a pool thread.
+
+STATUS_FILE = os.environ.get("LIFELINE_STATUS_FILE", ".lifeline_status.json")
+DATASET_PATH = "heart_disease_health_indicators_BRFSS2015.csv"
+TRENDS_DATASET_PATH = "data_cardiovascular_risk.csv"
+
+# Bump when the content of a cached artifact changes
+ARTIFACT_VERSION = "v1"
+
+
+def artifact_key(name):
+    return f"{name}:{ARTIFACT_VERSION}"
+
+
+def compute_dataset_metadata():
+    data = pd.read_csv(DATASET_PATH)
+    return {"rows": data.shape[0], "columns": list(data.columns)}
+
+
+def load_dataset_metadata():
+    # The BRFSS dataset is not bundled with the repo; without it there is no metadata to show
+    if not os.path.exists(DATASET_PATH):
+        return None
+    return shared_cache.get_cache().get_or_compute_json(artifact_key("dataset_metadata"), compute_dataset_metadata)
+
+
+def compute_risk_factors_tree():
+    return charts.create_risk_factors_tree().to_json().encode()
+
+
+def load_risk_factors_tree():
+    # Kept as a plain figure dict, which st.plotly_chart accepts directly
+    return json.loads(shared_cache.get_cache().get_or_compute(artifact_key("risk_factors_tree"),
+                                                              compute_risk_factors_tree))
+
+
+def compute_major_risk_factors_chart():
+    return charts.figure_to_png(charts.major_risk_factors_figure())
+
+
+def load_major_risk_factors_chart():
+    return shared_cache.get_cache().get_or_compute(artifact_key("major_risk_factors_chart"),
+                                                   compute_major_risk_factors_chart)
+
+
+def compute_heart_disease_types_chart():
+    return charts.figure_to_png(charts.heart_disease_types_figure())
+
+
+def load_heart_disease_types_chart():
+    return shared_cache.get_cache().get_or_compute(artifact_key("heart_disease_types_chart"),
+                                                   compute_heart_disease_types_chart)
+
+
+def load_recommendation_table():
+    return risk_model.recommendation_table()
+
+
+def compute_trends_seed():
+    return trends.seed_from_dataset(TRENDS_DATASET_PATH).to_dict()
+
+
+def load_trend_aggregator():
+    cache = shared_cache.get_cache()
+    seed = cache.get_or_compute_json(artifact_key("trends:seed"), compute_trends_seed)
+    return trends.SharedTrends(cache, seed, shared_cache.REPLICA_ID)
+
+
+def compute_imputation_tables():
+    return imputation.ImputationModel.from_dataset(TRENDS_DATASET_PATH).to_dict()
+
+
+def load_imputation_model():
+    tables = shared_cache.get_cache().get_or_compute_json(artifact_key("imputation"), compute_imputation_tables)
+    return imputation.ImputationModel.from_dict(tables)
+
+
+def load_cohort_index():
+    return cohorts.CohortIndex.from_bundled()
+
+
+def load_feature_importance():
+    # Precomputed by `python importance.py`; None until it has been run for the current datasets
+    return importance.load_artifact()
+
+
+TASKS = {
+    "dataset_metadata": load_dataset_metadata,
+    "risk_factors_tree": load_risk_factors_tree,
+    "major_risk_factors_chart": load_major_risk_factors_chart,
+    "heart_disease_types_chart": load_heart_disease_types_chart,
+    "recommendation_table": load_recommendation_table,
+    "trend_aggregator": load_trend_aggregator,
+    "imputation_model": load_imputation_model,
+    "cohort_index": load_cohort_index,
+    "feature_importance": load_feature_importance,
+}
+# Resources the app works without; they are reported but do not hold up readiness
+OPTIONAL_TASKS = {"dataset_metadata"}
+
+_lock = threading.Lock()
+_status_lock = threading.Lock()
+_executor = None
+_futures = {}
+_timings = {}
+_errors = {}
+_started_at = None
+_finished_at = None
+
+
+def start(max_workers=4):
+    """Begin loading every shared resource; later calls are no-ops."""
+    global _executor, _started_at
+    with _lock:
+        if _executor is not None:
+            return
+        _started_at = time.perf_counter()
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+        for name, loader in TASKS.items():
+            _futures[name] = _executor.submit(_run_task, name, loader)
+
+
+def _run_task(name, loader):
+    global _finished_at
+    started = time.perf_counter()
+    try:
+        return loader()
+    except Exception as e:
+        _errors[name] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        with _lock:
+            _timings[name] = time.perf_counter() - started
+            if len(_timings) == len(TASKS):
+                _finished_at = time.perf_counter()
+        write_status()
+
+
+def get(name, timeout=None):
+    """Return a shared resource, waiting for it if it is still loading."""
+    start()
+    return _futures[name].result(timeout)
+
+
+def get_optional(name, timeout=None):
+    """Like get, but None instead of the error when an optional resource failed to load."""
+    try:
+        return get(name, timeout)
+    except Exception:
+        if name not in OPTIONAL_TASKS:
+            raise
+        return None
+
+
+def readiness():
+    with _lock:
+        tasks = {}
+        for name in TASKS:
+            # Completion is tracked through _timings because the status file is
+            # written from inside the task, before its future resolves
+            if name not in _futures:
+                status = "pending"
+            elif name not in _timings:
+                status = "loading"
+            elif name in _errors:
+                status = "failed"
+            else:
+                status = "ready"
+            tasks[name] = {"status": status, "seconds": _timings.get(name), "error": _errors.get(name),
+                           "optional": name in OPTIONAL_TASKS}
+        elapsed = None
+        if _started_at is not None:
+            elapsed = (_finished_at or time.perf_counter()) - _started_at
+        return {
+            "ready": all(task["status"] == "ready" for name, task in tasks.items() if name not in OPTIONAL_TASKS),
+            "startup_seconds": elapsed,
+            "tasks": tasks,
+            "pid": os.getpid(),
+            "cache": shared_cache.get_cache().stats(),
+            "sessions": sessions.get_store().stats(),
+            "audit": audit.stats(),
+        }
+
+
+def write_status(path=None):
+    path = path or STATUS_FILE
+    # Serialized, so a status taken earlier can never replace a later one
+    with _status_lock:
+        status = readiness()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The status file is only a convenience for probes; never fail a load because of it
+            pass
+
+
+def probe(path=None):
+    # Exit code 0 when the last written status reports every resource ready
+    try:
+        with open(path or STATUS_FILE) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return 1
+    return 0 if status.get("ready") else 1
+
+
+if __name__ == "__main__":
+    if "--probe" in sys.argv:
+        sys.exit(probe())
+    start()
+    for name in TASKS:
+        try:
+            get(name)
+        except Exception:
+            pass
+    print(json.dumps(readiness(), indent=2))
+    sys.exit(0 if readiness()["ready"] else 1)